@@ -19,6 +19,7 @@ from app.db.base import Base # <--- Import your Base
 # --- Add imports for your model modules HERE ---
 from app.db.models import user # Import the user module
 from app.db.models import chatbot # Import the chatbot module
+from app.db.models import data_source # Import the data_source module
 
 from logging.config import fileConfig
 
@@ -0,0 +1,93 @@
+# app/api/compression.py
+"""
+Negotiated response compression (brotli or gzip).
+
+Starlette's GZipMiddleware, extended with brotli: clients that accept "br"
+get brotli (if the Brotli package is installed), others that accept "gzip"
+get gzip. Responses smaller than `minimum_size` and event streams are sent
+as they are. Every response carries `Vary: Accept-Encoding` (also the ones
+sent uncompressed), so shared caches keep the variants apart.
+"""
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Codings of an Accept-Encoding header, without the ones refused with q=0."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _vary_on_accept_encoding(send: Send) -> Send:
+    async def send_with_vary(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            vary = {value.strip().lower() for value in headers.get("Vary", "").split(",")}
+            if "accept-encoding" not in vary and "*" not in vary:
+                headers.add_vary_header("Accept-Encoding")
+        await send(message)
+
+    return send_with_vary
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        if more_body:
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 6,
+        brotli_quality: Optional[int] = 4,
+    ) -> None:
+        """
+        :param compresslevel: gzip level (1-9).
+        :param brotli_quality: brotli quality (0-11); None disables brotli.
+        """
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality if brotli is not None else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+        if self.brotli_quality is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, _vary_on_accept_encoding(send))
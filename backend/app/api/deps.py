@@ -1,4 +1,5 @@
 # app/api/deps.py
+import logging
 from typing import Generator, Optional, AsyncGenerator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer # Security scheme definition
@@ -7,12 +8,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError # For token data validation
 
 from app.core.config import settings
+from app.core.principal_cache import PRINCIPAL_FIELDS, get_principal_cache
 from app.db.session import get_async_db # Import async session getter
 # --- UPDATED IMPORTS ---
 from app import crud, schemas         # Import crud and schemas as before
 from app.db.models.user import User   # Import the User model directly
 # -----------------------
 
+logger = logging.getLogger(__name__)
+
 # Define the OAuth2 scheme
 # tokenUrl should point to your login endpoint
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -26,6 +30,13 @@ async def get_current_user(
     Dependency to get the current user from the JWT token.
     Raises exceptions if token is invalid or user not found.
     """
+    return await get_user_from_token(db, token)
+
+async def get_user_from_token(db: AsyncSession, token: str) -> User:
+    """
+    Resolves a JWT access token to its user. Also used where the token does
+    not come from the Authorization header (e.g. WebSocket query parameters).
+    """
     try:
         # Decode the JWT token
         payload = jwt.decode(
@@ -54,11 +65,26 @@ async def get_current_user(
             detail="Could not validate credentials: Invalid token payload",
          )
 
+    # Cached principal first: most requests then need no user query at all.
+    # A cache hit is a detached User with the PRINCIPAL_FIELDS columns set.
+    principal_cache = get_principal_cache()
+    try:
+        principal = await principal_cache.get(token_data.sub)
+    except Exception as e:
+        logger.warning(f"Principal cache lookup failed: {e}")
+        principal = None
+    if principal is not None:
+        return User(**principal)
+
     # Get user from database based on subject (email)
     # Reference crud.crud_user correctly
     user = await crud.crud_user.get_user_by_email(db, email=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    try:
+        await principal_cache.set(token_data.sub, {field: getattr(user, field) for field in PRINCIPAL_FIELDS})
+    except Exception as e:
+        logger.warning(f"Principal cache update failed: {e}")
     return user # Returns an instance of the User model
 
 async def get_current_active_user(
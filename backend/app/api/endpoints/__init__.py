@@ -3,4 +3,6 @@
 # Explicitly import the router from each endpoint file
 from .users import router as users_router
 from .chatbots import router as chatbots_router
-from .login import router as login_router
\ No newline at end of file
+from .login import router as login_router
+from .query import router as query_router
+from .uploads import router as uploads_router
@@ -2,13 +2,18 @@
 from app.api import deps
 from app.db import models
 from ...db.models.user import User
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Any, List
+from typing import Any, List, Optional
 
 from app import schemas
 from app import crud
 from app.db.session import get_async_db
+from app.api.http_cache import CACHE_CONTROL, chatbot_etag, etag_matches, not_modified, page_etag
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.responses import FastJSONResponse, rows_to_dicts
+from app.core.config import settings
 
 from app.schemas.chatbot import ChatbotCreate, ChatbotRead # Import directly
 from app.schemas.user import UserRead # Need this if you add user info later
@@ -40,9 +45,22 @@ async def create_new_chatbot(
 @router.get("/{chatbot_id}", response_model=schemas.ChatbotRead)
 async def read_chatbot_by_id(
     chatbot_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_async_db),
-    current_user: models.User = Depends(deps.get_current_active_user) # <<< ADD protection
+    current_user: models.User = Depends(deps.get_current_active_user), # <<< ADD protection
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
+    """
+    Read a chatbot. Send its last ETag as If-None-Match to get a 304 (checked
+    against the chatbot's version only, without loading it) when unchanged.
+    """
+    if if_none_match:
+        version = await crud.crud_chatbot.get_chatbot_version(db, chatbot_id=chatbot_id)
+        if version and (version.owner_id == current_user.id or current_user.is_superuser):
+            etag = chatbot_etag(chatbot_id, version.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
     chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
     if not chatbot:
          raise HTTPException(status_code=404, detail="Chatbot not found")
@@ -50,6 +68,8 @@ async def read_chatbot_by_id(
     if chatbot.owner_id != current_user.id and not current_user.is_superuser:
          raise HTTPException(status_code=403, detail="Not enough permissions")
     # -------------------------
+    response.headers["ETag"] = chatbot_etag(chatbot.id, chatbot.updated_at)
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return chatbot
 
 @router.get("/my/", response_model=List[schemas.ChatbotRead])
@@ -59,18 +79,40 @@ async def read_my_chatbots(
     # owner_id: int = 1, # <<< REMOVE
     current_user: models.User = Depends(deps.get_current_active_user), # <<< ADD
     # --------------------------------
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, description="Deprecated offset paging; use `cursor`"),
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
 ) -> Any:
     """
-    Retrieve chatbots owned by the current authenticated user.
+    Retrieve chatbots owned by the current authenticated user, ordered by id.
+    When there are more, the `X-Next-Cursor` response header holds the cursor
+    of the next page (pass it back as `cursor`). Send the page's last ETag as
+    If-None-Match to get a 304 when none of its chatbots changed.
     """
+    after_id = decode_cursor(cursor)
+    # One extra row tells whether there is a next page
+    if if_none_match:
+        # Versions only: no full rows loaded, no body serialized when unchanged
+        versions = await crud.crud_chatbot.get_chatbot_versions_by_owner(
+            db=db, owner_id=current_user.id, skip=skip, limit=limit + 1, after_id=after_id
+        )
+        etag = page_etag(versions, limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
     # --- Use authenticated user's ID ---
-    chatbots = await crud.crud_chatbot.get_chatbots_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit # <<< USE THIS
+    # Plain rows of the ChatbotRead columns, encoded as they are (no ORM
+    # objects, no response model validation): see app/api/responses.py
+    rows = await crud.crud_chatbot.get_chatbot_rows_by_owner(
+        db=db, owner_id=current_user.id, skip=skip, limit=limit + 1, after_id=after_id
     )
     # -----------------------------------
-    return chatbots
+    headers = {"ETag": page_etag(rows, limit), "Cache-Control": CACHE_CONTROL}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+    return FastJSONResponse(rows_to_dicts(rows), headers=headers)
 
 # --- NEW ENDPOINT: Update Chatbot ---
 @router.patch("/{chatbot_id}", response_model=schemas.ChatbotRead)
@@ -125,5 +167,76 @@ async def delete_existing_chatbot(
             detail="Chatbot not found or not authorized to delete",
          )
 
+    # Drop the chatbot's vector index files (off the event loop)
+    from app.retrieval.vector_store import delete_chatbot_index  # Loads numpy: only on first use
+    await run_in_threadpool(delete_chatbot_index, chatbot_id)
+
     # No content to return on successful delete
-    return None
\ No newline at end of file
+    return None
+
+
+# --- Bulk Endpoint ---
+@router.post("/bulk", response_model=schemas.ChatbotBulkResponse)
+async def bulk_chatbot_operations(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    bulk_in: schemas.ChatbotBulkRequest,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Create, update and delete many chatbots of the current user in one request
+    and one transaction. Each operation gets its own result; updates and
+    deletes of chatbots that do not exist or are not owned get a 404 result
+    without failing the others.
+    """
+    operations = len(bulk_in.create) + len(bulk_in.update) + len(bulk_in.delete)
+    if operations > settings.CHATBOT_BULK_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many operations ({operations}); at most {settings.CHATBOT_BULK_MAX_OPERATIONS} per request",
+        )
+    update_ids = [item.id for item in bulk_in.update]
+    if len(set(update_ids)) != len(update_ids) or len(set(bulk_in.delete)) != len(bulk_in.delete):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Duplicate chatbot ids")
+    if set(update_ids) & set(bulk_in.delete):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="A chatbot cannot be updated and deleted in the same request",
+        )
+
+    created, updated, deleted = await crud.crud_chatbot.bulk_apply_chatbots(
+        db=db,
+        owner_id=current_user.id,
+        creates=bulk_in.create,
+        updates=bulk_in.update,
+        deletes=bulk_in.delete,
+    )
+
+    results = [
+        schemas.ChatbotBulkResult(op="create", index=index, id=chatbot.id, status=status.HTTP_201_CREATED, chatbot=chatbot)
+        for index, chatbot in enumerate(created)
+    ]
+    for index, chatbot_id in enumerate(update_ids):
+        chatbot = updated.get(chatbot_id)
+        results.append(schemas.ChatbotBulkResult(
+            op="update",
+            index=index,
+            id=chatbot_id,
+            status=status.HTTP_200_OK if chatbot else status.HTTP_404_NOT_FOUND,
+            chatbot=chatbot,
+        ))
+    for index, chatbot_id in enumerate(bulk_in.delete):
+        results.append(schemas.ChatbotBulkResult(
+            op="delete",
+            index=index,
+            id=chatbot_id,
+            status=status.HTTP_204_NO_CONTENT if chatbot_id in deleted else status.HTTP_404_NOT_FOUND,
+        ))
+
+    # Drop the deleted chatbots' vector index files (off the event loop)
+    if deleted:
+        from app.retrieval.vector_store import delete_chatbot_index  # Loads numpy: only on first use
+    for chatbot_id in deleted:
+        await run_in_threadpool(delete_chatbot_index, chatbot_id)
+
+    return schemas.ChatbotBulkResponse(results=results)
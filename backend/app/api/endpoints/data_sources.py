@@ -1,57 +1,135 @@
 # app/api/endpoints/data_sources.py
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Any
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import json
 import os # For path operations
-import shutil # For saving file temporarily
 import logging
 
 # --- MODIFIED IMPORT SECTION ---
 # No longer need: from app import schemas
 from app import crud # Keep top-level crud import
 # Import specific schemas needed directly from their source files
-from app.schemas.data_source import DataSourceCreate, FileUploadResponse, ProcessingStatus, DataSourceType
+from app.schemas.data_source import (
+    DataSourceCreate,
+    DataSourcePage,
+    DataSourceProgressRead,
+    DataSourceType,
+    FileUploadResponse,
+    ProcessingStatus,
+    UploadByHashRequest,
+)
 # Import User schema if needed for type hints or responses (optional here for now)
 # from app.schemas.user import UserRead
 # -----------------------------
 from app.db.models.user import User # Keep DB model imports
 from app.db.models.chatbot import Chatbot # Keep DB model imports
 from app.api import deps # Keep dependency import
-from app.db.session import get_async_db # Keep session import
-# --- Import the Celery task ---
-from app.tasks.process_data import process_uploaded_file
+from app.db.session import AsyncSessionLocal, get_async_db # Keep session import
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.config import settings
+from app.ingestion.uploads import InvalidUploadError, UploadTooLargeError, receive_file_upload
+from app.ingestion.progress import estimate_eta
+from app.ingestion.status_events import TERMINAL_STATUSES, get_status_broker, make_status_event, publish_status_event
+from app.storage.blobs import blob_uri, get_blob_store # Uploaded files live in the content-addressed blob store
+# --- Celery task enqueueing (sent by name; the task module stays out of the API) ---
+from app.tasks.dispatch import enqueue_uploaded_file
 # ----------------------------
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Define the router
 router = APIRouter()
 
-# --- Define a temporary upload directory ---
-# In production, use a persistent volume or cloud storage (S3)
-UPLOAD_DIR = "/code/temp_uploads" # Needs to exist inside container
-os.makedirs(UPLOAD_DIR, exist_ok=True) # Create if doesn't exist
+async def register_uploaded_file(
+    db: AsyncSession,
+    *,
+    chatbot_id: int,
+    filename: str,
+    content_hash: str,
+    size_bytes: int,
+):
+    """
+    Creates the DataSource record of a file stored in the blob store and
+    enqueues its processing. Shared by all upload endpoints.
+    On failure the blob is left for the blob garbage collector.
+    """
+    # 4. Create DataSource DB Record
+    # Use imported DataSourceCreate and DataSourceType directly
+    data_source_in = DataSourceCreate(
+        type=DataSourceType.FILE, # Use imported Enum
+        uri=blob_uri(content_hash)
+    )
+    try:
+        # Ensure crud_data_source exists and is imported via 'app.crud' or directly
+        db_data_source = await crud.crud_data_source.create_data_source(
+            db=db,
+            data_source_in=data_source_in,
+            chatbot_id=chatbot_id,
+            filename=filename,
+            content_hash=content_hash,
+            size_bytes=size_bytes,
+        )
+        logger.info(f"Created DataSource DB record ID: {db_data_source.id} for file: {filename}")
+    except Exception as e:
+         logger.error(f"Failed to create DataSource record: {e}", exc_info=True)
+         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create data source record")
+
+    # 5. Trigger Background Task
+    try:
+         task_result = enqueue_uploaded_file(db_data_source.id, content_hash)
+         logger.info(f"Sent task {task_result.id} to Celery for data_source_id: {db_data_source.id}")
+    except Exception as e:
+        logger.error(f"Failed to send task to Celery: {e}", exc_info=True)
+        # Ensure ProcessingStatus is imported if using it here
+        await crud.crud_data_source.update_data_source_status(db=db, data_source_id=db_data_source.id, status=ProcessingStatus.FAILED)
+        await asyncio.to_thread(publish_status_event, db_data_source.id, ProcessingStatus.FAILED.value)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to queue processing task")
+
+    return db_data_source
+
+
+# Request body of the upload endpoint for the OpenAPI docs (the body is parsed
+# by receive_file_upload as it streams in, not by FastAPI)
+_UPLOAD_FILE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+ALLOWED_UPLOAD_CONTENT_TYPES = ["text/plain", "application/pdf", "text/markdown"]
 
 @router.post(
     "/{chatbot_id}/upload-file",
     response_model=FileUploadResponse, # Use direct schema name
-    status_code=status.HTTP_202_ACCEPTED
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=_UPLOAD_FILE_BODY,
 )
 async def upload_file_for_chatbot(
     *,
+    request: Request,
     db: AsyncSession = Depends(get_async_db),
     chatbot_id: int,
     current_user: User = Depends(deps.get_current_active_user),
-    file: UploadFile = File(...)
 ) -> Any:
     """
     Upload a file (.txt, .pdf, .md supported for now) as a data source
     for a specific chatbot owned by the current user.
-    Triggers background processing (stubbed for now).
+    The file is streamed to disk (hashed and size-checked on the way) and
+    processed in the background by the Celery worker.
     """
-    # 1. Verify Chatbot ownership
+    # 1. Verify Chatbot ownership (before reading any of the body)
     chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
     if not chatbot or chatbot.owner_id != current_user.id:
         raise HTTPException(
@@ -59,67 +137,148 @@ async def upload_file_for_chatbot(
             detail="Chatbot not found or not authorized",
         )
 
-    # 2. Basic File Validation
-    if not file.filename:
-         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No filename provided")
-
-    allowed_content_types = ["text/plain", "application/pdf", "text/markdown"]
-    if file.content_type not in allowed_content_types:
-         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file type: {file.content_type}. Supported: {', '.join(allowed_content_types)}"
-         )
-
-    # 3. Save file temporarily
-    safe_filename = os.path.basename(file.filename)
-    temp_file_path = os.path.join(UPLOAD_DIR, f"{chatbot_id}_{current_user.id}_{safe_filename}")
+    # 2. Stream the file to disk; validation errors abort the upload early
     try:
-        with open(temp_file_path, "wb") as buffer:
-             shutil.copyfileobj(file.file, buffer)
+        upload = await receive_file_upload(
+            request,
+            dest_dir=get_blob_store().staging_dir,
+            max_bytes=settings.MAX_UPLOAD_BYTES,
+            allowed_content_types=ALLOWED_UPLOAD_CONTENT_TYPES,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
          logger.error(f"Failed to save uploaded file: {e}", exc_info=True)
          raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not save file")
-    finally:
-         await file.close()
-    logger.info(f"Temporarily saved file to: {temp_file_path}")
 
-    # 4. Create DataSource DB Record
-    # Use imported DataSourceCreate and DataSourceType directly
-    data_source_in = DataSourceCreate(
-        type=DataSourceType.FILE, # Use imported Enum
-        uri=temp_file_path
+    # 3. Basic File Validation, then store the file under its content hash
+    # (an identical file already in the store is reused, nothing is rewritten)
+    safe_filename = os.path.basename(upload.filename)
+    if not safe_filename:
+         await asyncio.to_thread(os.remove, upload.path)
+         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No filename provided")
+    is_new = await asyncio.to_thread(get_blob_store().ingest, upload.path, upload.sha256)
+    logger.info(
+        f"Stored blob {upload.sha256} ({upload.size} bytes, {'new' if is_new else 'deduplicated'}) for: {safe_filename}"
     )
-    try:
-        # Ensure crud_data_source exists and is imported via 'app.crud' or directly
-        db_data_source = await crud.crud_data_source.create_data_source(
-            db=db,
-            data_source_in=data_source_in,
-            chatbot_id=chatbot_id,
-            filename=safe_filename
-        )
-        logger.info(f"Created DataSource DB record ID: {db_data_source.id} for file: {safe_filename}")
-    except Exception as e:
-         logger.error(f"Failed to create DataSource record: {e}", exc_info=True)
-         os.remove(temp_file_path)
-         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create data source record")
 
-    # 5. Trigger Background Task
-    try:
-         task_result = process_uploaded_file.delay(db_data_source.id, temp_file_path)
-         logger.info(f"Sent task {task_result.id} to Celery for data_source_id: {db_data_source.id}")
-    except Exception as e:
-        logger.error(f"Failed to send task to Celery: {e}", exc_info=True)
-        # Ensure ProcessingStatus is imported if using it here
-        await crud.crud_data_source.update_data_source_status(db=db, data_source_id=db_data_source.id, status=ProcessingStatus.FAILED)
-        os.remove(temp_file_path)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to queue processing task")
+    # 4./5. Create the DataSource record and trigger background processing
+    db_data_source = await register_uploaded_file(
+        db,
+        chatbot_id=chatbot_id,
+        filename=safe_filename,
+        content_hash=upload.sha256,
+        size_bytes=upload.size,
+    )
 
     # 6. Return Response using imported schema
     return FileUploadResponse( # Use direct schema name
         filename=safe_filename,
-        content_type=file.content_type or "unknown",
-        message="File accepted for processing."
+        content_type=upload.content_type or "unknown",
+        message="File accepted for processing.",
+        data_source_id=db_data_source.id,
+        size_bytes=upload.size,
+        content_hash=upload.sha256,
+    )
+
+
+@router.post(
+    "/{chatbot_id}/upload-by-hash",
+    response_model=FileUploadResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def upload_file_by_hash(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    chatbot_id: int,
+    upload_in: UploadByHashRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Add a file the current user has uploaded before (to any of their chatbots)
+    by its SHA-256, without sending the bytes again. Returns 404 if the content
+    is unknown, in which case the file has to be uploaded.
+    """
+    chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
+    if not chatbot or chatbot.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chatbot not found or not authorized",
+        )
+    if upload_in.content_type not in ALLOWED_UPLOAD_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {upload_in.content_type}. Supported: {', '.join(ALLOWED_UPLOAD_CONTENT_TYPES)}"
+        )
+    safe_filename = os.path.basename(upload_in.filename)
+    content_hash = upload_in.sha256.lower()
+
+    # Only content the user uploaded themselves: the store must not reveal
+    # whether someone else has a given file.
+    blob_store = get_blob_store()
+    if not await crud.crud_data_source.owner_has_content(db, owner_id=current_user.id, content_hash=content_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+    try:
+        # Refreshing the blob also protects it from a concurrent garbage collection
+        await asyncio.to_thread(blob_store.touch, content_hash)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+    size_bytes = await crud.crud_data_source.get_content_size(db, content_hash=content_hash)
+
+    db_data_source = await register_uploaded_file(
+        db,
+        chatbot_id=chatbot_id,
+        filename=safe_filename,
+        content_hash=content_hash,
+        size_bytes=size_bytes,
+    )
+    return FileUploadResponse(
+        filename=safe_filename,
+        content_type=upload_in.content_type,
+        message="File accepted for processing.",
+        data_source_id=db_data_source.id,
+        size_bytes=size_bytes,
+        content_hash=content_hash,
+    )
+
+
+@router.get("/{chatbot_id}/data-sources", response_model=DataSourcePage)
+async def list_chatbot_data_sources(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    chatbot_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+    status_filter: Optional[ProcessingStatus] = Query(None, alias="status"),
+    type_filter: Optional[DataSourceType] = Query(None, alias="type"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+) -> Any:
+    """
+    List the data sources of a chatbot, newest first, optionally filtered by
+    status and/or type. Pass `next_cursor` of a page as `cursor` to get the next one.
+    """
+    chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
+    if not chatbot or chatbot.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chatbot not found or not authorized",
+        )
+    # One extra row tells whether there is a next page
+    data_sources = await crud.crud_data_source.get_data_sources_by_chatbot(
+        db,
+        chatbot_id=chatbot_id,
+        limit=limit + 1,
+        before_id=decode_cursor(cursor),
+        status=status_filter,
+        type=type_filter,
     )
+    next_cursor = None
+    if len(data_sources) > limit:
+        data_sources = data_sources[:limit]
+        next_cursor = encode_cursor(data_sources[-1].id)
+    return DataSourcePage(items=data_sources, next_cursor=next_cursor)
 
 
 # --- Optional Status Endpoint ---
@@ -133,15 +292,150 @@ async def get_data_source_processing_status(
     data_source_id: int,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
-    """Get the processing status of a specific data source."""
-    # Ensure crud_data_source is available via 'app.crud' or direct import
-    db_data_source = await crud.crud_data_source.get_data_source(db, data_source_id)
+    """
+    Get the processing status of a specific data source.
+    Prefer the status stream endpoints below over polling this one.
+    """
+    db_data_source = await crud.crud_data_source.get_data_source_for_owner(
+        db, data_source_id=data_source_id, owner_id=current_user.id
+    )
     if not db_data_source:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Data source not found")
 
-    # Ensure crud_chatbot is available via 'app.crud' or direct import
-    chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=db_data_source.chatbot_id)
-    if not chatbot or chatbot.owner_id != current_user.id:
-         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Data source not found")
+    return db_data_source.status
+
 
-    return db_data_source.status
\ No newline at end of file
+@router.get(
+    "/data-sources/{data_source_id}/progress",
+    response_model=DataSourceProgressRead,
+)
+async def get_data_source_progress(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    data_source_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the per-stage progress (bytes/pages parsed, chunks embedded, vectors
+    stored) of a data source and the estimated time left.
+    """
+    db_data_source = await crud.crud_data_source.get_data_source_for_owner(
+        db, data_source_id=data_source_id, owner_id=current_user.id
+    )
+    if not db_data_source:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Data source not found")
+
+    current_status, progress = db_data_source.status, db_data_source.progress
+    if current_status.value not in TERMINAL_STATUSES:
+        # The worker writes progress to the row only every few seconds;
+        # the last published event is fresher.
+        try:
+            latest = await get_status_broker().latest(data_source_id)
+        except Exception as e:
+            logger.warning(f"Could not read status event of data source {data_source_id}: {e}")
+            latest = None
+        if latest and latest["status"] not in TERMINAL_STATUSES and latest.get("progress"):
+            current_status, progress = ProcessingStatus(latest["status"]), latest["progress"]
+
+    if current_status == ProcessingStatus.COMPLETED:
+        eta_seconds = 0.0
+    elif current_status == ProcessingStatus.PROCESSING:
+        eta_seconds = estimate_eta(progress)
+    else:
+        eta_seconds = None
+    return DataSourceProgressRead(
+        data_source_id=data_source_id,
+        status=current_status,
+        progress=progress,
+        eta_seconds=eta_seconds,
+    )
+
+
+async def _status_events(data_source_id: int, db_status: ProcessingStatus) -> AsyncIterator[Optional[dict]]:
+    """
+    Yields the current status event of a data source, then every published
+    event until a terminal status (COMPLETED / FAILED). Yields None after each
+    idle heartbeat interval so the caller can send a keep-alive.
+    """
+    broker = get_status_broker()
+    # Subscribe before taking the snapshot, so no transition is missed in between
+    async with broker.subscribe(data_source_id) as events:
+        current = await broker.latest(data_source_id)
+        # The DB row is authoritative once processing is over (events expire)
+        if current is None or (db_status.value in TERMINAL_STATUSES and current["status"] != db_status.value):
+            current = make_status_event(data_source_id, db_status.value)
+        yield current
+        while current["status"] not in TERMINAL_STATUSES:
+            try:
+                current = await asyncio.wait_for(events.get(), timeout=settings.STATUS_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield current
+
+
+@router.get("/data-sources/{data_source_id}/status/stream")
+async def stream_data_source_status(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    data_source_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of the status and progress of a data source.
+    Authorization is checked once when the stream is opened; the events come
+    from the ingestion tasks (no DB query per event). The stream ends after
+    the COMPLETED or FAILED event.
+    """
+    db_data_source = await crud.crud_data_source.get_data_source_for_owner(
+        db, data_source_id=data_source_id, owner_id=current_user.id
+    )
+    if not db_data_source:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Data source not found")
+    db_status = db_data_source.status
+
+    async def event_stream():
+        async for event in _status_events(data_source_id, db_status):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/data-sources/{data_source_id}/status/ws")
+async def data_source_status_websocket(
+    websocket: WebSocket,
+    data_source_id: int,
+    token: str = Query(...), # Browsers cannot set headers on WebSockets
+):
+    """WebSocket variant of the status stream: one JSON message per event."""
+    # Short-lived session: no DB connection is held while the socket is open
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await deps.get_user_from_token(db, token)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        db_data_source = await crud.crud_data_source.get_data_source_for_owner(
+            db, data_source_id=data_source_id, owner_id=user.id
+        )
+    if not user.is_active or not db_data_source:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        async for event in _status_events(data_source_id, db_data_source.status):
+            if event is None:
+                await websocket.send_json({"type": "keep-alive"})
+            else:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
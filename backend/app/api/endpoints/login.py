@@ -3,11 +3,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm # Standard form for username/password
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any
+import logging
 
 from app import schemas, crud
 from app.db.session import get_async_db
 from app.core import security # Import security utils
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/login/access-token", response_model=schemas.Token)
@@ -21,8 +24,22 @@ async def login_for_access_token(
     (Username is the user's email).
     """
     # 1. Authenticate User
+    # bcrypt runs in the bounded password hashing pool; when it is saturated the
+    # login is shed with a 503 rather than stalling the other requests.
     user = await crud.crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    # End the read transaction so no DB connection is held while bcrypt runs
+    await db.commit()
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await security.verify_and_update_password(form_data.password, user.hashed_password)
+        except security.PasswordHashingBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts in progress, please retry",
+                headers={"Retry-After": "1"},
+            )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -31,6 +48,11 @@ async def login_for_access_token(
     elif not user.is_active:
          raise HTTPException(status_code=400, detail="Inactive user")
 
+    # Stored hash made with an outdated cost: store the rehash (transparent to the user)
+    if new_hash:
+        await crud.crud_user.update_password_hash(db, user_id=user.id, hashed_password=new_hash)
+        logger.info(f"Rehashed password of user {user.id} with the current bcrypt settings")
+
     # 2. Create Access Token
     access_token = security.create_access_token(
         subject=user.email # Use email as subject, or user.id
@@ -0,0 +1,56 @@
+# app/api/endpoints/query.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any
+import logging
+
+from app import crud
+from app.api import deps
+from app.db.models.user import User
+from app.db.session import get_async_db
+from app.schemas.query import QueryHit, QueryRequest, QueryResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/{chatbot_id}/query", response_model=QueryResponse)
+async def query_chatbot(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    chatbot_id: int,
+    query_in: QueryRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the chunks of a chatbot's knowledge most relevant to a question.
+    Repeated questions are answered from an in-process cache.
+    """
+    # Same ownership check as read_chatbot_by_id
+    chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
+    if not chatbot:
+        raise HTTPException(status_code=404, detail="Chatbot not found")
+    if chatbot.owner_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    # The retrieval stack (numpy, embedding backend, vector store) is loaded
+    # on the first query, not at API startup
+    from app.retrieval.query import run_query
+    from app.retrieval.vector_store import VectorStoreError
+
+    # Embedding and scoring are CPU-bound; keep them off the event loop
+    try:
+        hits, cached = await run_in_threadpool(
+            run_query, chatbot_id, query_in.query, query_in.top_k, query_in.mode
+        )
+    except VectorStoreError as e:
+        logger.error(f"Query failed for chatbot {chatbot_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return QueryResponse(
+        chatbot_id=chatbot_id,
+        query=query_in.query,
+        hits=[QueryHit(**vars(hit)) for hit in hits],
+        cached=cached,
+    )
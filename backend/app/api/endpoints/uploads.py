@@ -0,0 +1,228 @@
+# app/api/endpoints/uploads.py
+"""
+Resumable upload API for very large files.
+
+    POST   /{chatbot_id}/uploads                                  -> create a session
+    PUT    /{chatbot_id}/uploads/{upload_id}/parts/{part_number}  -> raw part bytes (any order, in parallel)
+    GET    /{chatbot_id}/uploads/{upload_id}                      -> received parts / byte ranges
+    POST   /{chatbot_id}/uploads/{upload_id}/complete             -> assemble, create DataSource, enqueue
+    DELETE /{chatbot_id}/uploads/{upload_id}                      -> abort
+
+A client that loses its connection asks for the received ranges and only
+re-sends the missing parts.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Optional
+from datetime import datetime, timezone
+import asyncio
+import os
+import logging
+
+from app import crud
+from app.api import deps
+from app.api.endpoints.data_sources import ALLOWED_UPLOAD_CONTENT_TYPES, register_uploaded_file
+from app.core.config import settings
+from app.db.models.user import User
+from app.db.session import get_async_db
+from app.ingestion import upload_sessions
+from app.ingestion.upload_sessions import UploadPartTooLarge, UploadSessionError, UploadSessionNotFound
+from app.schemas.data_source import FileUploadResponse
+from app.schemas.upload import UploadComplete, UploadPartRead, UploadSessionCreate, UploadSessionRead
+from app.storage.blobs import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _get_owned_chatbot(db: AsyncSession, chatbot_id: int, current_user: User) -> None:
+    chatbot = await crud.crud_chatbot.get_chatbot(db, chatbot_id=chatbot_id)
+    if not chatbot or chatbot.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chatbot not found or not authorized",
+        )
+
+
+async def _get_session(chatbot_id: int, upload_id: str, current_user: User) -> dict:
+    try:
+        session = await asyncio.to_thread(upload_sessions.load_session, settings.UPLOAD_SESSION_DIR, upload_id)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    if session["chatbot_id"] != chatbot_id or session["owner_id"] != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return session
+
+
+def _session_read(session: dict, parts: Optional[list] = None) -> UploadSessionRead:
+    parts = parts or []
+    return UploadSessionRead(
+        upload_id=session["upload_id"],
+        chatbot_id=session["chatbot_id"],
+        filename=session["filename"],
+        content_type=session["content_type"],
+        part_size=session["part_size"],
+        total_size=session["total_size"],
+        expires_at=datetime.fromtimestamp(session["expires_at"], tz=timezone.utc),
+        received_parts=[UploadPartRead(**part) for part in parts],
+        received_ranges=upload_sessions.received_ranges(session, parts),
+        received_bytes=sum(part["size"] for part in parts),
+    )
+
+
+@router.post(
+    "/{chatbot_id}/uploads",
+    response_model=UploadSessionRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    chatbot_id: int,
+    session_in: UploadSessionCreate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Start a resumable upload for a chatbot owned by the current user."""
+    await _get_owned_chatbot(db, chatbot_id, current_user)
+
+    filename = os.path.basename(session_in.filename)
+    if not filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No filename provided")
+    if session_in.content_type not in ALLOWED_UPLOAD_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {session_in.content_type}. Supported: {', '.join(ALLOWED_UPLOAD_CONTENT_TYPES)}"
+        )
+    if session_in.total_size is not None and session_in.total_size > settings.MAX_RESUMABLE_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum upload size of {settings.MAX_RESUMABLE_UPLOAD_BYTES} bytes",
+        )
+
+    session = await asyncio.to_thread(
+        upload_sessions.create_session,
+        settings.UPLOAD_SESSION_DIR,
+        owner_id=current_user.id,
+        chatbot_id=chatbot_id,
+        filename=filename,
+        content_type=session_in.content_type,
+        part_size=session_in.part_size or settings.UPLOAD_PART_SIZE,
+        total_size=session_in.total_size,
+        ttl_seconds=settings.UPLOAD_SESSION_TTL_SECONDS,
+    )
+    logger.info(f"Created upload session {session['upload_id']} for chatbot {chatbot_id}: {filename}")
+    return _session_read(session)
+
+
+@router.put(
+    "/{chatbot_id}/uploads/{upload_id}/parts/{part_number}",
+    response_model=UploadPartRead,
+)
+async def upload_part(
+    *,
+    request: Request,
+    chatbot_id: int,
+    upload_id: str,
+    part_number: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Upload one part (raw request body). Part n holds bytes
+    [n * part_size, (n + 1) * part_size) of the file; re-sending a part replaces it.
+    """
+    session = await _get_session(chatbot_id, upload_id, current_user)
+    try:
+        part = await upload_sessions.write_part(
+            session, part_number, request.stream(), settings.MAX_RESUMABLE_UPLOAD_BYTES
+        )
+    except UploadPartTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileNotFoundError:
+        # Session finalized or aborted while this part was in flight
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return part
+
+
+@router.get(
+    "/{chatbot_id}/uploads/{upload_id}",
+    response_model=UploadSessionRead,
+)
+async def get_upload_session(
+    *,
+    chatbot_id: int,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Get the parts and byte ranges received so far (to resume an interrupted upload)."""
+    session = await _get_session(chatbot_id, upload_id, current_user)
+    parts = await asyncio.to_thread(upload_sessions.received_parts, session)
+    return _session_read(session, parts)
+
+
+@router.post(
+    "/{chatbot_id}/uploads/{upload_id}/complete",
+    response_model=FileUploadResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def complete_upload_session(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    chatbot_id: int,
+    upload_id: str,
+    complete_in: Optional[UploadComplete] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Assemble the parts (in place, no copy), store the file as a blob, create the DataSource and start processing."""
+    session = await _get_session(chatbot_id, upload_id, current_user)
+    blob_store = get_blob_store()
+    file_path = await asyncio.to_thread(blob_store.staging_path)
+    try:
+        size, sha256 = await asyncio.to_thread(
+            upload_sessions.finalize_session, session, file_path, complete_in.sha256 if complete_in else None
+        )
+    except UploadSessionError as e:
+        await asyncio.to_thread(os.remove, file_path)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except FileNotFoundError:
+        # Completed or aborted concurrently
+        await asyncio.to_thread(os.remove, file_path)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    is_new = await asyncio.to_thread(blob_store.ingest, file_path, sha256)
+    logger.info(
+        f"Assembled upload {upload_id} into blob {sha256} ({size} bytes, {'new' if is_new else 'deduplicated'})"
+    )
+
+    db_data_source = await register_uploaded_file(
+        db,
+        chatbot_id=chatbot_id,
+        filename=session["filename"],
+        content_hash=sha256,
+        size_bytes=size,
+    )
+    return FileUploadResponse(
+        filename=session["filename"],
+        content_type=session["content_type"],
+        message="File accepted for processing.",
+        data_source_id=db_data_source.id,
+        size_bytes=size,
+        content_hash=sha256,
+    )
+
+
+@router.delete(
+    "/{chatbot_id}/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def abort_upload_session(
+    *,
+    chatbot_id: int,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Response:
+    """Abort an upload and discard the received parts."""
+    session = await _get_session(chatbot_id, upload_id, current_user)
+    await asyncio.to_thread(upload_sessions.abort_session, session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -16,6 +16,8 @@ from app.api import deps
 # Import the async database session dependency
 from app.db.session import get_async_db
 
+from app.core.security import PasswordHashingBusy
+
 # Import the database model for type hinting the current_user dependency
 from app.db.models.user import User
 
@@ -63,7 +65,14 @@ async def create_new_user(
 
     # If user doesn't exist, call the CRUD function to create the user
     # The CRUD function handles password hashing internally
-    user = await crud.crud_user.create_user(db=db, user_in=user_in)
+    try:
+        user = await crud.crud_user.create_user(db=db, user_in=user_in)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
 
     # Return the created user object (will be serialized according to UserRead schema)
     return user
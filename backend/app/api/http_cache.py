@@ -0,0 +1,61 @@
+# app/api/http_cache.py
+"""
+Conditional GET helpers (ETag / If-None-Match).
+
+A chatbot's ETag is derived from its id and updated_at, which every write
+bumps, so whether a client's copy is current can be answered from those two
+columns (a small version query) without loading or serializing the row.
+A page's ETag is derived from the versions of the rows on it.
+
+The ETags are weak (W/"..."): the same version is sent as identity, gzip or
+brotli bodies (CompressionMiddleware), which are not byte-identical as a
+strong validator would promise. If-None-Match uses weak comparison anyway.
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi import Response, status
+
+# Authenticated data: browsers and proxies may keep it, but must revalidate
+CACHE_CONTROL = "private, no-cache"
+
+
+def _version_token(updated_at: Optional[datetime]) -> str:
+    return updated_at.isoformat() if updated_at is not None else ""
+
+
+def chatbot_etag(chatbot_id: int, updated_at: Optional[datetime]) -> str:
+    digest = hashlib.sha256(_version_token(updated_at).encode()).hexdigest()[:16]
+    return f'W/"{chatbot_id}-{digest}"'
+
+
+def page_etag(rows: Iterable, *extra) -> str:
+    """
+    ETag of a list page from the (id, updated_at) of its rows.
+
+    :param extra: Other inputs that change the response (e.g. the page size).
+    """
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(f"{value}|".encode())
+    for row in rows:
+        digest.update(f"{row.id}:{_version_token(row.updated_at)};".encode())
+    return f'W/"p-{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
@@ -0,0 +1,33 @@
+# app/api/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+Listing endpoints return a `next_cursor` that encodes the sort key of the last
+row of the page; the next page is read with `WHERE id > :last` (or `<` for
+newest-first listings) straight from an index, so every page costs the same
+however deep the client pages. The cursor is opaque to clients.
+"""
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(last_id: int) -> str:
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Id after which the next page starts (None for the first page). Raises 400 for malformed cursors."""
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(payload)["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return last_id
@@ -0,0 +1,32 @@
+# app/api/responses.py
+"""
+Fast JSON responses for list endpoints.
+
+FastAPI validates a handler's return value against its response_model and
+converts it with jsonable_encoder before json.dumps: a lot of per-row Python
+work for data that comes straight from the database. FastJSONResponse skips
+both and encodes with pydantic-core's (Rust) JSON serializer, which formats
+datetimes, enums etc. exactly as the response models do.
+
+Only return it with data already in the response model's shape (e.g. rows
+selected with the model's columns); the response_model then only documents
+the endpoint.
+"""
+from typing import Any, List, Sequence
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+from sqlalchemy import Row
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def rows_to_dicts(rows: Sequence[Row]) -> List[dict]:
+    """Result rows as dicts keyed by column label (several times faster than Row._asdict)."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
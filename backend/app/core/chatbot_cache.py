@@ -0,0 +1,284 @@
+# app/core/chatbot_cache.py
+"""
+Read-through cache of chatbot rows (crud_chatbot.get_chatbot).
+
+Nearly every chatbot-scoped request starts by loading the chatbot to check
+its owner. Two tiers sit in front of that query:
+
+    local   per-process LRU with a short TTL (CHATBOT_CACHE_LOCAL_TTL_SECONDS):
+            no network round trip at all for hot chatbots
+    shared  CHATBOT_CACHE_BACKEND: "redis" (shared by all uvicorn workers),
+            "memory" (process-wide stand-in for tests) or "none"
+
+Concurrent misses for the same chatbot are coalesced (single flight): one
+request queries the database, the others wait for its result, so a burst
+after a deploy or an eviction costs one query per chatbot, not one per request.
+
+update_chatbot / delete_chatbot (and the bulk operations) call invalidate().
+An invalidation clears both tiers of this process and leaves a tombstone in
+them for CHATBOT_CACHE_TOMBSTONE_SECONDS, so a load that read the old row just
+before the write cannot put it back. The window only has to outlast loads in
+flight at the time of the write (one query each); once it is over, the next
+load caches the new row again. Other processes may serve their local copy for
+at most CHATBOT_CACHE_LOCAL_TTL_SECONDS.
+"""
+import abc
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Columns of the chatbots table kept in the cache
+CHATBOT_FIELDS = ("id", "name", "owner_id", "status", "created_at", "updated_at")
+
+_TOMBSTONE = "__invalidated__"
+
+
+def to_snapshot(chatbot) -> dict:
+    """JSON-compatible snapshot of a chatbot row."""
+    snapshot = {field: getattr(chatbot, field) for field in CHATBOT_FIELDS}
+    snapshot["status"] = getattr(snapshot["status"], "value", snapshot["status"])
+    for field in ("created_at", "updated_at"):
+        if snapshot[field] is not None:
+            snapshot[field] = snapshot[field].isoformat()
+    return snapshot
+
+
+def from_snapshot(snapshot: dict) -> dict:
+    """Column values of a snapshot (datetimes parsed back), for Chatbot(**values)."""
+    values = dict(snapshot)
+    for field in ("created_at", "updated_at"):
+        if values[field] is not None:
+            values[field] = datetime.fromisoformat(values[field])
+    return values
+
+
+class SharedChatbotCache(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, chatbot_id: int) -> Optional[dict]:
+        """Cached snapshot of a chatbot, or None."""
+
+    @abc.abstractmethod
+    async def set(self, chatbot_id: int, snapshot: dict) -> None:
+        """Caches a snapshot, unless the chatbot was invalidated within the tombstone window."""
+
+    @abc.abstractmethod
+    async def invalidate(self, chatbot_id: int) -> None:
+        """Drops a chatbot (it was changed or deleted)."""
+
+
+class NullSharedChatbotCache(SharedChatbotCache):
+    """Shared tier disabled."""
+
+    async def get(self, chatbot_id: int) -> Optional[dict]:
+        return None
+
+    async def set(self, chatbot_id: int, snapshot: dict) -> None:
+        pass
+
+    async def invalidate(self, chatbot_id: int) -> None:
+        pass
+
+
+class _LocalTier:
+    """LRU with a TTL and tombstones (used from the event loop only)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, tombstone_seconds: float):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.tombstone_ttl = tombstone_seconds
+        self._entries: "OrderedDict[int, Tuple[float, object]]" = OrderedDict()
+
+    def lookup(self, chatbot_id: int) -> Optional[object]:
+        entry = self._entries.get(chatbot_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[chatbot_id]
+            return None
+        self._entries.move_to_end(chatbot_id)
+        return value
+
+    def store(self, chatbot_id: int, value: object, ttl: Optional[float] = None) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[chatbot_id] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(chatbot_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, chatbot_id: int) -> Optional[dict]:
+        value = self.lookup(chatbot_id)
+        return None if value is None or value == _TOMBSTONE else value
+
+    def set(self, chatbot_id: int, snapshot: dict) -> None:
+        if self.lookup(chatbot_id) != _TOMBSTONE:
+            self.store(chatbot_id, snapshot)
+
+    def invalidate(self, chatbot_id: int) -> None:
+        self.store(chatbot_id, _TOMBSTONE, ttl=self.tombstone_ttl)
+
+
+class InMemorySharedChatbotCache(SharedChatbotCache):
+    """Process-wide stand-in for the shared tier (tests, local runs without Redis)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, tombstone_seconds: float):
+        self._tier = _LocalTier(ttl_seconds, max_entries, tombstone_seconds)
+
+    async def get(self, chatbot_id: int) -> Optional[dict]:
+        snapshot = self._tier.get(chatbot_id)
+        return dict(snapshot) if snapshot is not None else None
+
+    async def set(self, chatbot_id: int, snapshot: dict) -> None:
+        self._tier.set(chatbot_id, dict(snapshot))
+
+    async def invalidate(self, chatbot_id: int) -> None:
+        self._tier.invalidate(chatbot_id)
+
+
+class RedisSharedChatbotCache(SharedChatbotCache):
+    """Shared tier in Redis; entries expire after the TTL, tombstones after their window."""
+
+    def __init__(self, url: str, ttl_seconds: int, tombstone_seconds: float):
+        import redis.asyncio
+
+        self.ttl = ttl_seconds
+        self.tombstone_ms = max(1, int(tombstone_seconds * 1000))
+        self._client = redis.asyncio.Redis.from_url(url)
+
+    @staticmethod
+    def _key(chatbot_id: int) -> str:
+        return f"chatbot:{chatbot_id}"
+
+    async def get(self, chatbot_id: int) -> Optional[dict]:
+        payload = await self._client.get(self._key(chatbot_id))
+        if not payload or payload.decode() == _TOMBSTONE:
+            return None
+        return json.loads(payload)
+
+    async def set(self, chatbot_id: int, snapshot: dict) -> None:
+        # NX: never overwrite a live tombstone (or a fresher entry)
+        await self._client.set(self._key(chatbot_id), json.dumps(snapshot), ex=self.ttl, nx=True)
+
+    async def invalidate(self, chatbot_id: int) -> None:
+        await self._client.set(self._key(chatbot_id), _TOMBSTONE, px=self.tombstone_ms)
+
+
+class ChatbotCache:
+    """Local tier + shared tier + single-flight loading."""
+
+    def __init__(
+        self, shared: SharedChatbotCache, local_ttl_seconds: float, local_max_entries: int,
+        tombstone_seconds: float,
+    ):
+        self.shared = shared
+        self._local = _LocalTier(local_ttl_seconds, local_max_entries, tombstone_seconds)
+        # (event loop, chatbot id) -> future of the load in progress
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, int], asyncio.Future] = {}
+
+    async def get_or_load(
+        self, chatbot_id: int, loader: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """
+        Snapshot of a chatbot from the cache, or from `loader` (which queries
+        the database) on a miss. Missing chatbots are not cached.
+        """
+        snapshot = self._local.get(chatbot_id)
+        if snapshot is not None:
+            return snapshot
+        try:
+            snapshot = await self.shared.get(chatbot_id)
+        except Exception as e:
+            logger.warning(f"Chatbot cache read failed for {chatbot_id}: {e}")
+            snapshot = None
+        if snapshot is not None:
+            self._local.set(chatbot_id, snapshot)
+            return snapshot
+
+        key = (asyncio.get_running_loop(), chatbot_id)
+        while key in self._inflight:
+            # Another request is loading this chatbot: share its result
+            pending = self._inflight[key]
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This request was cancelled
+                # The loading request was cancelled: load again
+
+        future = key[0].create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # No "never retrieved" warnings
+        self._inflight[key] = future
+        try:
+            snapshot = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(snapshot)
+        finally:
+            del self._inflight[key]
+
+        if snapshot is not None:
+            self._local.set(chatbot_id, snapshot)
+            try:
+                await self.shared.set(chatbot_id, snapshot)
+            except Exception as e:
+                logger.warning(f"Chatbot cache write failed for {chatbot_id}: {e}")
+        return snapshot
+
+    async def invalidate(self, chatbot_id: int) -> None:
+        """Drops a chatbot from both tiers; errors are logged (the TTL bounds staleness)."""
+        self._local.invalidate(chatbot_id)
+        try:
+            await self.shared.invalidate(chatbot_id)
+        except Exception as e:
+            logger.warning(f"Could not invalidate cached chatbot {chatbot_id}: {e}")
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], SharedChatbotCache]] = {
+    "redis": lambda: RedisSharedChatbotCache(
+        settings.CHATBOT_CACHE_URL, settings.CHATBOT_CACHE_TTL_SECONDS, settings.CHATBOT_CACHE_TOMBSTONE_SECONDS
+    ),
+    "memory": lambda: InMemorySharedChatbotCache(
+        settings.CHATBOT_CACHE_TTL_SECONDS, settings.CHATBOT_CACHE_LOCAL_MAX_ENTRIES,
+        settings.CHATBOT_CACHE_TOMBSTONE_SECONDS,
+    ),
+    "none": NullSharedChatbotCache,
+}
+
+
+def register_chatbot_cache(name: str, factory: Callable[[], SharedChatbotCache]) -> None:
+    _BACKEND_FACTORIES[name] = factory
+    get_chatbot_cache.cache_clear()
+
+
+@lru_cache()
+def get_chatbot_cache(name: Optional[str] = None) -> ChatbotCache:
+    """
+    Returns the (process-wide, cached) chatbot cache.
+
+    :param name: Registered shared tier backend; defaults to settings.CHATBOT_CACHE_BACKEND.
+                 "none" also disables the local tier.
+    """
+    name = name or settings.CHATBOT_CACHE_BACKEND
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown chatbot cache backend: {name}") from None
+    local_ttl = settings.CHATBOT_CACHE_LOCAL_TTL_SECONDS if name != "none" else 0
+    return ChatbotCache(
+        factory(), local_ttl, settings.CHATBOT_CACHE_LOCAL_MAX_ENTRIES, settings.CHATBOT_CACHE_TOMBSTONE_SECONDS
+    )
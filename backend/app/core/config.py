@@ -3,6 +3,7 @@ import os
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 from functools import lru_cache 
+from typing import Dict
 # Load .env file if it exists (for local overrides without compose)
 # Useful if you want to run locally without docker-compose sometimes
 load_dotenv()
@@ -21,6 +22,169 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256" # Algorithm for JWT signing
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 # How long access tokens are valid
 
+    # Password Hashing Settings
+    # bcrypt cost factor; stored hashes with a different cost are rehashed on login.
+    # Hashing runs in a dedicated pool of PASSWORD_HASH_WORKERS threads with at most
+    # PASSWORD_HASH_MAX_PENDING operations queued; beyond that logins get a 503.
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Principal Cache Settings
+    # Authenticated users are cached by token subject for PRINCIPAL_CACHE_TTL_SECONDS,
+    # saving the user lookup on every request. PRINCIPAL_CACHE_BACKEND is "redis"
+    # (shared by all uvicorn workers), "memory" (per process, at most
+    # PRINCIPAL_CACHE_MAX_ENTRIES users) or "none". A user changed directly in the
+    # database (e.g. deactivated) keeps its cached access for up to the TTL.
+    PRINCIPAL_CACHE_BACKEND: str = "redis"
+    PRINCIPAL_CACHE_URL: str = "redis://redis:6379/0"
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Chatbot Cache Settings
+    # Chatbot rows are cached in front of crud_chatbot.get_chatbot: per process for
+    # CHATBOT_CACHE_LOCAL_TTL_SECONDS (at most CHATBOT_CACHE_LOCAL_MAX_ENTRIES chatbots;
+    # 0 disables this tier), then in a shared tier for CHATBOT_CACHE_TTL_SECONDS.
+    # CHATBOT_CACHE_BACKEND is "redis", "memory" (per process) or "none" (no caching).
+    # After a write, loads are not cached for CHATBOT_CACHE_TOMBSTONE_SECONDS (longer
+    # than a load takes), so a load that read the old row cannot put it back.
+    CHATBOT_CACHE_BACKEND: str = "redis"
+    CHATBOT_CACHE_URL: str = "redis://redis:6379/0"
+    CHATBOT_CACHE_TTL_SECONDS: int = 300
+    CHATBOT_CACHE_LOCAL_TTL_SECONDS: float = 5.0
+    CHATBOT_CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CHATBOT_CACHE_TOMBSTONE_SECONDS: float = 5.0
+
+    # Chatbot API Settings
+    # A bulk request (POST /chatbots/bulk) carries at most CHATBOT_BULK_MAX_OPERATIONS
+    # creates, updates and deletes in total; they run in one transaction.
+    CHATBOT_BULK_MAX_OPERATIONS: int = 1000
+
+    # Response Compression Settings
+    # Responses of at least RESPONSE_COMPRESSION_MIN_BYTES are compressed with
+    # brotli (if installed and accepted by the client) or gzip.
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    RESPONSE_COMPRESSION_GZIP_LEVEL: int = 6
+    RESPONSE_COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Upload Settings
+    # Uploads larger than MAX_UPLOAD_BYTES are rejected with 413 as soon as the
+    # limit is crossed.
+    MAX_UPLOAD_BYTES: int = 512 * 1024 * 1024
+    # Resumable (chunked) uploads: a larger limit, parts of UPLOAD_PART_SIZE bytes
+    # by default, and sessions kept for UPLOAD_SESSION_TTL_SECONDS. The session
+    # directory must be on the same filesystem as the upload directory.
+    MAX_RESUMABLE_UPLOAD_BYTES: int = 20 * 1024 * 1024 * 1024
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_DIR: str = "/code/blobs/.sessions"
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Blob Store Settings (content-addressed storage of uploaded files)
+    # BLOB_STORE_BACKEND names a registered backend ("local" stores files under
+    # BLOB_STORE_DIR, a volume shared by the API and the workers). Uploads are
+    # received into BLOB_STAGING_DIR, which should be on the same filesystem.
+    # Unreferenced blobs older than BLOB_GC_GRACE_SECONDS are deleted every
+    # BLOB_GC_INTERVAL_SECONDS by the collect_blob_garbage task (celery beat).
+    BLOB_STORE_BACKEND: str = "local"
+    BLOB_STORE_DIR: str = "/code/blobs"
+    BLOB_STAGING_DIR: str = "/code/blobs/.staging"
+    BLOB_GC_GRACE_SECONDS: int = 60 * 60
+    BLOB_GC_INTERVAL_SECONDS: int = 60 * 60
+
+    # Ingestion Settings (used by the Celery processing task)
+    # Files are read incrementally in blocks of PARSE_READ_SIZE bytes and
+    # split into chunks of CHUNK_SIZE characters, with CHUNK_OVERLAP characters
+    # shared between neighbouring chunks.
+    PARSE_READ_SIZE: int = 64 * 1024
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    # Larger files are split into shards processed in parallel by several
+    # workers (a Celery chord); the shards are merged into the chatbot index.
+    INGEST_SHARD_BYTES: int = 8 * 1024 * 1024 # Text files
+    INGEST_SHARD_PAGES: int = 50 # PDFs
+    # Per-stage progress (bytes parsed, chunks embedded, vectors stored) is
+    # coalesced in memory: published at most every INGEST_PROGRESS_PUBLISH_SECONDS
+    # and written to the data source row at most every INGEST_PROGRESS_PERSIST_SECONDS.
+    INGEST_PROGRESS_PUBLISH_SECONDS: float = 1.0
+    INGEST_PROGRESS_PERSIST_SECONDS: float = 10.0
+
+    # Embedding Settings
+    # Chunks are embedded EMBEDDING_BATCH_SIZE at a time as one matrix operation.
+    # EMBEDDING_DTYPE is the dtype of the produced vectors (float16/float32/float64).
+    EMBEDDING_BACKEND: str = "hashing"
+    EMBEDDING_BATCH_SIZE: int = 256
+    EMBEDDING_DTYPE: str = "float32"
+    EMBEDDING_DIM: int = 256
+    EMBEDDING_HASH_FEATURES: int = 2 ** 14 # Size of the hashed n-gram feature space
+
+    # Embedding Cache Settings
+    # Chunk embeddings are cached on disk by (model id, normalized chunk hash)
+    # and shared by all chatbots and workers. EMBEDDING_CACHE_EVICTION is
+    # "lru" or "lfu" and applies once the cache exceeds EMBEDDING_CACHE_MAX_BYTES.
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "/code/vector_store/embedding_cache.sqlite3"
+    EMBEDDING_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    EMBEDDING_CACHE_EVICTION: str = "lru"
+
+    # Celery Worker Settings
+    # Each worker process keeps one event loop and one DB pool of this size;
+    # it bounds the ingestions one process can have in flight on the DB.
+    WORKER_DB_POOL_SIZE: int = 5
+
+    # Status Event Settings
+    # Ingestion tasks publish data source status/progress events, forwarded to
+    # clients by the status stream endpoints (SSE / WebSocket).
+    # STATUS_BROKER_BACKEND is "redis" (shared by API and workers) or "memory"
+    # (single process: tests, local runs without Redis).
+    STATUS_BROKER_BACKEND: str = "redis"
+    STATUS_BROKER_URL: str = "redis://redis:6379/0"
+    STATUS_EVENT_TTL_SECONDS: int = 60 * 60 # How long the last event of a data source is kept
+    STATUS_STREAM_HEARTBEAT_SECONDS: int = 15 # Keep-alive interval of idle streams
+
+    # Vector Store Settings
+    # Root directory of the per-chatbot indexes. Must be a volume shared by the
+    # API server (readers) and the Celery workers (writers).
+    VECTOR_STORE_DIR: str = "/code/vector_store"
+    # Files a new manifest no longer references (replaced segments, IVF lists,
+    # codes) are deleted only after this long, since queries that opened the
+    # previous manifest may still map them.
+    VECTOR_STORE_RETIRED_GRACE_SECONDS: int = 10 * 60
+    # Opened (memory-mapped) chatbot indexes kept per API process, least recently
+    # used first out; an index unused for half the grace period is closed as well.
+    VECTOR_STORE_OPEN_CACHE_SIZE: int = 256
+
+    # IVF (approximate nearest-neighbour) Index Settings
+    # Chatbots with fewer than IVF_MIN_VECTORS chunks are searched exactly.
+    # IVF_NPROBE is the default recall/latency knob: lists scanned per query.
+    IVF_MIN_VECTORS: int = 20000
+    IVF_NPROBE: int = 8
+    IVF_NLIST: int = 0 # Number of lists; 0 picks ~4 * sqrt(chunk count)
+    IVF_TRAIN_SAMPLE: int = 65536 # Vectors sampled for k-means training
+    IVF_KMEANS_ITERATIONS: int = 20
+    IVF_RETRAIN_FACTOR: float = 4.0 # Retrain once the chatbot grew this much since training
+
+    # Vector Quantization Settings
+    # VECTOR_CODEC is "none" (float32), "int8" (scalar) or "pq" (product quantization).
+    # VECTOR_CODEC_OVERRIDES picks a different codec per chatbot id,
+    # e.g. VECTOR_CODEC_OVERRIDES='{"42": "pq"}'.
+    VECTOR_CODEC: str = "none"
+    VECTOR_CODEC_OVERRIDES: Dict[int, str] = {}
+    QUANTIZATION_MIN_VECTORS: int = 4096 # Codecs are trained once a chatbot has this many chunks
+    PQ_SUBVECTORS: int = 32 # Bytes per PQ code; must divide EMBEDDING_DIM
+    QUANTIZATION_RERANK_FACTOR: int = 4 # Re-rank k * factor candidates at full precision (0: off)
+
+    # Lexical / Hybrid Retrieval Settings
+    # RETRIEVAL_MODE is "vector", "bm25" or "hybrid" (reciprocal rank fusion of both).
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    RETRIEVAL_MODE: str = "hybrid"
+    HYBRID_CANDIDATES: int = 50 # Hits taken from each retriever before fusion
+    HYBRID_RRF_K: int = 60
+
+    # Query Cache Settings (per API process, bounded by estimated bytes)
+    QUERY_EMBEDDING_CACHE_BYTES: int = 32 * 1024 * 1024
+    QUERY_RESULT_CACHE_BYTES: int = 64 * 1024 * 1024
+
     class Config:
         # If you were using a .env file heavily, you'd specify it here
         env_file = ".env"
@@ -36,8 +200,9 @@ def get_settings() -> Settings:
     return Settings()
 
 # Create an instance of the Settings class.
-# This instance will be imported and used throughout the application.
-settings = Settings()
+# This instance will be imported and used throughout the application
+# (the same instance get_settings() returns).
+settings = get_settings()
 
 # You could add print statements here for debugging during startup if needed
 # print(f"Loaded DATABASE_URL: {settings.DATABASE_URL}")
@@ -0,0 +1,164 @@
+# app/core/principal_cache.py
+"""
+Cache of authenticated principals, keyed by JWT subject (the user's email).
+
+get_current_user used to load the user from the database on every request
+just to learn who the caller is. The cached principal is a small snapshot of
+the user row (id, email, is_active, is_superuser; never the password hash),
+kept for PRINCIPAL_CACHE_TTL_SECONDS.
+
+No code path changes a cached field of a user (email, is_active,
+is_superuser) yet: such changes are made directly in the database, and take
+effect only once the cached principal expires, up to
+PRINCIPAL_CACHE_TTL_SECONDS later (deactivating a user included). Password
+rehashes on login do not touch cached fields. A write added to the API that
+changes a cached field must call invalidate_principal() after its commit.
+An invalidation leaves a tombstone for one TTL: a request that read the old
+row just before the change cannot put it back into the cache afterwards.
+
+Backends: "redis" (shared by all uvicorn workers), "memory" (per process,
+LRU-bounded; tests and single-process runs) and "none" (always a miss).
+"""
+import abc
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Columns of the users table kept in the cache
+PRINCIPAL_FIELDS = ("id", "email", "is_active", "is_superuser")
+
+_TOMBSTONE = "__invalidated__"
+
+
+class PrincipalCache(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, subject: str) -> Optional[dict]:
+        """Cached principal of a subject, or None."""
+
+    @abc.abstractmethod
+    async def set(self, subject: str, principal: dict) -> None:
+        """Caches a principal, unless the subject was invalidated within the TTL."""
+
+    @abc.abstractmethod
+    async def invalidate(self, subject: str) -> None:
+        """Drops a subject (its user was changed or deactivated)."""
+
+
+class NullPrincipalCache(PrincipalCache):
+    """Caching disabled."""
+
+    async def get(self, subject: str) -> Optional[dict]:
+        return None
+
+    async def set(self, subject: str, principal: dict) -> None:
+        pass
+
+    async def invalidate(self, subject: str) -> None:
+        pass
+
+
+class LocalPrincipalCache(PrincipalCache):
+    """Per-process LRU cache with a TTL (used from the event loop only)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+    def _lookup(self, subject: str) -> Optional[object]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[subject]
+            return None
+        self._entries.move_to_end(subject)
+        return value
+
+    def _store(self, subject: str, value: object) -> None:
+        self._entries[subject] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, subject: str) -> Optional[dict]:
+        value = self._lookup(subject)
+        return None if value is None or value == _TOMBSTONE else dict(value)
+
+    async def set(self, subject: str, principal: dict) -> None:
+        if self._lookup(subject) == _TOMBSTONE:
+            return
+        self._store(subject, dict(principal))
+
+    async def invalidate(self, subject: str) -> None:
+        self._store(subject, _TOMBSTONE)
+
+
+class RedisPrincipalCache(PrincipalCache):
+    """Shared cache in Redis; entries expire after the TTL (Redis bounds the memory)."""
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio
+
+        self.ttl = ttl_seconds
+        self._client = redis.asyncio.Redis.from_url(url)
+
+    @staticmethod
+    def _key(subject: str) -> str:
+        return f"principal:{subject}"
+
+    async def get(self, subject: str) -> Optional[dict]:
+        payload = await self._client.get(self._key(subject))
+        if not payload or payload.decode() == _TOMBSTONE:
+            return None
+        return json.loads(payload)
+
+    async def set(self, subject: str, principal: dict) -> None:
+        # NX: never overwrite a tombstone (or a fresher entry)
+        await self._client.set(self._key(subject), json.dumps(principal), ex=self.ttl, nx=True)
+
+    async def invalidate(self, subject: str) -> None:
+        await self._client.set(self._key(subject), _TOMBSTONE, ex=self.ttl)
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], PrincipalCache]] = {
+    "redis": lambda: RedisPrincipalCache(settings.PRINCIPAL_CACHE_URL, settings.PRINCIPAL_CACHE_TTL_SECONDS),
+    "memory": lambda: LocalPrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_MAX_ENTRIES),
+    "none": NullPrincipalCache,
+}
+
+
+def register_principal_cache(name: str, factory: Callable[[], PrincipalCache]) -> None:
+    _BACKEND_FACTORIES[name] = factory
+    get_principal_cache.cache_clear()
+
+
+@lru_cache()
+def get_principal_cache(name: Optional[str] = None) -> PrincipalCache:
+    """
+    Returns the (process-wide, cached) principal cache.
+
+    :param name: Registered backend name; defaults to settings.PRINCIPAL_CACHE_BACKEND.
+    """
+    name = name or settings.PRINCIPAL_CACHE_BACKEND
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown principal cache backend: {name}") from None
+    return factory()
+
+
+async def invalidate_principal(subject: str) -> None:
+    """Drops a subject from the cache; errors are logged (the TTL bounds staleness)."""
+    try:
+        await get_principal_cache().invalidate(subject)
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached principal {subject}: {e}")
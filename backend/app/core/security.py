@@ -1,7 +1,10 @@
 # backend/app/core/security.py
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone # Ensure timezone is imported
-from typing import Any, Union # For type hinting
+from typing import Any, Callable, Optional, Tuple, TypeVar, Union # For type hinting
 
 from jose import jwt, JWTError # Import jwt and potential error class
 from passlib.context import CryptContext
@@ -13,7 +16,8 @@ from app.core.config import settings # Import your application settings
 # Use bcrypt for hashing passwords.
 # schemes=["bcrypt"] ensures only bcrypt is used.
 # deprecated="auto" handles potential future changes in default schemes.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt__rounds is the cost of new hashes; hashes with another cost "need update".
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -35,6 +39,60 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# Each bcrypt operation costs tens of milliseconds of CPU. On the event loop
+# that would stall every other request of the worker, so the async variants
+# below run them in a small dedicated pool. Operations beyond the pool size
+# plus PASSWORD_HASH_MAX_PENDING are refused (PasswordHashingBusy) instead of
+# queueing without bound: callers shed the request with a 503.
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when too many password hashing operations are already pending."""
+
+
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def _run_password_op(func: Callable[..., T], *args) -> T:
+    if not _password_slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Too many password operations in progress")
+    try:
+        job = _password_executor.submit(func, *args)
+    except BaseException:
+        _password_slots.release()
+        raise
+    # The slot is held by the job, not by this request: a cancelled request
+    # (client disconnect) leaves a running job behind, which still counts
+    # against the limit until it finishes (or is dropped from the queue).
+    job.add_done_callback(lambda _: _password_slots.release())
+    return await asyncio.wrap_future(job)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the password hashing pool. Raises PasswordHashingBusy when saturated."""
+    return await _run_password_op(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and, if the stored hash uses outdated settings (e.g. a
+    different bcrypt cost), also returns a new hash to store. Runs in the
+    password hashing pool; raises PasswordHashingBusy when saturated.
+
+    :return: (valid, new hash or None)
+    """
+    return await _run_password_op(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in the password hashing pool. Raises PasswordHashingBusy when saturated."""
+    return await _run_password_op(get_password_hash, password)
+
+
 # 2. JWT Token Creation Setup
 # ---------------------------
 # Retrieve JWT settings from the central configuration
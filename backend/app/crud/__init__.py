@@ -1,3 +1,4 @@
 # backend/app/crud/__init__.py
 from . import crud_user
-from . import crud_chatbot
\ No newline at end of file
+from . import crud_chatbot
+from . import crud_data_source
@@ -1,39 +1,106 @@
 # app/crud/crud_chatbot.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update # If needed for update later
+from sqlalchemy import Enum as SQLEnum, Row, Select, String, case, delete, insert, type_coerce, update
 from app.db.models.chatbot import Chatbot, ChatbotStatus # Import DB model and Enum
-from app.schemas.chatbot import ChatbotCreate # Import Pydantic schema
-from typing import List
-from app.schemas.chatbot import ChatbotUpdate
+from app.schemas.chatbot import ChatbotCreate, ChatbotRead # Import Pydantic schemas
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from app.core.chatbot_cache import from_snapshot, get_chatbot_cache, to_snapshot
+from app.schemas.chatbot import ChatbotBulkUpdate, ChatbotUpdate
 
 async def get_chatbot(db: AsyncSession, chatbot_id: int) -> Chatbot | None:
-    """Gets a single chatbot by ID."""
-    result = await db.execute(select(Chatbot).filter(Chatbot.id == chatbot_id))
-    
-    return result.scalars().first()
+    """
+    Gets a single chatbot by ID, through the read-through chatbot cache.
+    The returned object is detached from the session (read-only use).
+    """
+    async def load() -> dict | None:
+        result = await db.execute(select(Chatbot).filter(Chatbot.id == chatbot_id))
+        chatbot = result.scalars().first()
+        return to_snapshot(chatbot) if chatbot else None
+
+    snapshot = await get_chatbot_cache().get_or_load(chatbot_id, load)
+    if snapshot is None:
+        return None
+    values = from_snapshot(snapshot)
+    values["status"] = ChatbotStatus(values["status"])
+    return Chatbot(**values)
+
+async def get_chatbot_version(db: AsyncSession, chatbot_id: int) -> Row | None:
+    """Gets (owner_id, updated_at) of a chatbot, for cheap ETag checks."""
+    result = await db.execute(
+        select(Chatbot.owner_id, Chatbot.updated_at).filter(Chatbot.id == chatbot_id)
+    )
+    return result.first()
+
+def _owner_page(query: Select, *, owner_id: int, skip: int, limit: int, after_id: Optional[int]) -> Select:
+    query = query.filter(Chatbot.owner_id == owner_id)
+    if after_id is not None:
+        query = query.filter(Chatbot.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.order_by(Chatbot.id).limit(limit)
 
-async def get_chatbots_by_owner(db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100) -> List[Chatbot]:
-    """Gets a list of chatbots for a specific owner."""
+async def get_chatbots_by_owner(
+    db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[Chatbot]:
+    """
+    Gets a list of chatbots for a specific owner, ordered by id.
+    Pass the last id of the previous page as `after_id` (keyset pagination on
+    the (owner_id, id) index, constant time per page); `skip` is the legacy
+    OFFSET paging and gets slower with every page.
+    """
     result = await db.execute(
-        select(Chatbot)
-        .filter(Chatbot.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
+        _owner_page(select(Chatbot), owner_id=owner_id, skip=skip, limit=limit, after_id=after_id)
     )
     return result.scalars().all()
 
+def _read_column(field: str):
+    column = getattr(Chatbot, field)
+    if isinstance(column.type, SQLEnum):
+        # The stored enum name (equal to its value) as a plain string:
+        # strings encode much faster than enum members
+        return type_coerce(column, String).label(field)
+    return column
+
+async def get_chatbot_rows_by_owner(
+    db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[Row]:
+    """
+    Same page as get_chatbots_by_owner, as plain rows of the ChatbotRead
+    columns (in its field order) instead of ORM objects, for the fast
+    serialization path of list endpoints.
+    """
+    columns = [_read_column(field) for field in ChatbotRead.model_fields]
+    result = await db.execute(
+        _owner_page(select(*columns), owner_id=owner_id, skip=skip, limit=limit, after_id=after_id)
+    )
+    return result.all()
+
+async def get_chatbot_versions_by_owner(
+    db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[Row]:
+    """Same page as get_chatbots_by_owner, but only (id, updated_at) of each chatbot, for ETag checks."""
+    result = await db.execute(
+        _owner_page(
+            select(Chatbot.id, Chatbot.updated_at), owner_id=owner_id, skip=skip, limit=limit, after_id=after_id
+        )
+    )
+    return result.all()
+
 async def create_chatbot(db: AsyncSession, *, chatbot_in: ChatbotCreate, owner_id: int) -> Chatbot:
-    """Creates a new chatbot."""
-    db_chatbot = Chatbot(
-        name=chatbot_in.name,
-        owner_id=owner_id
-        # status uses default PENDING from the model
-        # created_at/updated_at use server defaults
+    """Creates a new chatbot (one INSERT ... RETURNING, no refresh)."""
+    result = await db.execute(
+        insert(Chatbot)
+        .values(
+            name=chatbot_in.name,
+            owner_id=owner_id,
+            status=ChatbotStatus.PENDING,
+            # created_at/updated_at use server defaults, returned by RETURNING
+        )
+        .returning(Chatbot)
     )
-    db.add(db_chatbot)
+    db_chatbot = result.scalars().one()
     await db.commit()
-    await db.refresh(db_chatbot)
     return db_chatbot
 
 # --- NEW FUNCTION: Update Chatbot ---
@@ -44,32 +111,33 @@ async def update_chatbot(
     Updates a chatbot. Ensures the user owns the chatbot.
     Returns the updated chatbot object or None if not found or not owned.
     """
-    # First, get the existing chatbot
-    db_chatbot = await get_chatbot(db=db, chatbot_id=chatbot_id)
-
-    # Check if chatbot exists and if the user owns it
-    if not db_chatbot or db_chatbot.owner_id != owner_id:
-        return None # Indicate not found or not authorized
-
     # Get the update data from the input schema
-    update_data = chatbot_in.model_dump(exclude_unset=True) # Get only fields that were provided
-
-    # Update the chatbot object in memory
-    needs_update = False
-    for field, value in update_data.items():
-        if hasattr(db_chatbot, field) and value is not None:
-             setattr(db_chatbot, field, value)
-             needs_update = True
-
-    # Only commit if there were actual changes
-    if needs_update:
-        # Manually set updated_at if needed, or rely on DB trigger if set up
-        # db_chatbot.updated_at = datetime.datetime.now(datetime.timezone.utc)
-        db.add(db_chatbot) # Add tracked object back to session (though often tracked already)
-        await db.commit()
-        await db.refresh(db_chatbot)
+    update_data = {
+        field: value
+        for field, value in chatbot_in.model_dump(exclude_unset=True).items() # Get only fields that were provided
+        if value is not None and hasattr(Chatbot, field)
+    }
+    if not update_data:
+        # Nothing to change: just the owner-scoped read
+        result = await db.execute(
+            select(Chatbot).filter(Chatbot.id == chatbot_id, Chatbot.owner_id == owner_id)
+        )
+        return result.scalars().first()
 
-    return db_chatbot
+    # One owner-scoped statement: no row comes back if the chatbot does not
+    # exist or belongs to someone else (updated_at is set by its onupdate)
+    result = await db.execute(
+        update(Chatbot)
+        .where(Chatbot.id == chatbot_id, Chatbot.owner_id == owner_id)
+        .values(**update_data)
+        .returning(Chatbot)
+        .execution_options(populate_existing=True)
+    )
+    db_chatbot = result.scalars().first()
+    await db.commit()
+    if db_chatbot is not None:
+        await get_chatbot_cache().invalidate(chatbot_id)
+    return db_chatbot # None: not found or not owned
 # ------------------------------------
 
 # --- NEW FUNCTION: Delete Chatbot ---
@@ -78,15 +146,95 @@ async def delete_chatbot(db: AsyncSession, *, chatbot_id: int, owner_id: int) ->
     Deletes a chatbot. Ensures the user owns the chatbot.
     Returns True if deleted, False otherwise (not found or not owned).
     """
-    # First, get the existing chatbot to verify ownership
-    db_chatbot = await get_chatbot(db=db, chatbot_id=chatbot_id)
-
-    # Check if chatbot exists and if the user owns it
-    if not db_chatbot or db_chatbot.owner_id != owner_id:
-        return False # Indicate not found or not authorized
-
-    # If checks pass, proceed with deletion
-    await db.delete(db_chatbot) # Mark the object for deletion
-    await db.commit()           # Commit the transaction
-    return True                 # Indicate successful deletion
-# ----------------------------------
\ No newline at end of file
+    # Ownership is part of the DELETE itself; RETURNING tells whether a row matched
+    result = await db.execute(
+        delete(Chatbot)
+        .where(Chatbot.id == chatbot_id, Chatbot.owner_id == owner_id)
+        .returning(Chatbot.id)
+    )
+    deleted = result.scalars().first() is not None
+    await db.commit()
+    if deleted:
+        await get_chatbot_cache().invalidate(chatbot_id)
+    return deleted
+# ----------------------------------
+
+# --- Bulk operations ---
+async def bulk_apply_chatbots(
+    db: AsyncSession,
+    *,
+    owner_id: int,
+    creates: Sequence[ChatbotCreate] = (),
+    updates: Sequence[ChatbotBulkUpdate] = (),
+    deletes: Sequence[int] = (),
+) -> Tuple[List[Chatbot], Dict[int, Chatbot], Set[int]]:
+    """
+    Creates, updates and deletes chatbots of one owner in a single transaction,
+    with one set-based statement per kind of operation (not one per chatbot).
+    Updates and deletes only touch chatbots the owner has; the others are
+    simply missing from the result. Any database error rolls back everything.
+    The ids of `updates` and `deletes` must be distinct.
+
+    :return: (created chatbots in input order, {id: updated chatbot}, deleted ids)
+    """
+    created: List[Chatbot] = []
+    updated: Dict[int, Chatbot] = {}
+    deleted: Set[int] = set()
+    try:
+        if creates:
+            # Multi-row INSERT ... RETURNING, rows returned in parameter order
+            # (batched on PostgreSQL; SQLite, which cannot order RETURNING,
+            # falls back to one INSERT per row within the same transaction)
+            result = await db.execute(
+                insert(Chatbot).returning(Chatbot, sort_by_parameter_order=True),
+                [
+                    {"name": chatbot_in.name, "owner_id": owner_id, "status": ChatbotStatus.PENDING}
+                    for chatbot_in in creates
+                ],
+            )
+            created = list(result.scalars().all())
+
+        if updates:
+            # One UPDATE for all items: each column is set through a CASE on the
+            # id (portable equivalent of UPDATE ... FROM (VALUES ...)); items
+            # that leave a field unset keep its current value.
+            columns: Dict[str, Dict[int, object]] = {}
+            for item in updates:
+                for field, value in item.model_dump(exclude_unset=True, exclude={"id"}).items():
+                    if value is not None and hasattr(Chatbot, field):
+                        columns.setdefault(field, {})[item.id] = value
+            ids = [item.id for item in updates]
+            if columns:
+                result = await db.execute(
+                    update(Chatbot)
+                    .where(Chatbot.id.in_(ids), Chatbot.owner_id == owner_id)
+                    .values({
+                        field: case(values, value=Chatbot.id, else_=getattr(Chatbot, field))
+                        for field, values in columns.items()
+                    })
+                    .returning(Chatbot)
+                    .execution_options(populate_existing=True)
+                )
+            else:
+                # Nothing to change: just the owner-scoped read
+                result = await db.execute(
+                    select(Chatbot).filter(Chatbot.id.in_(ids), Chatbot.owner_id == owner_id)
+                )
+            updated = {chatbot.id: chatbot for chatbot in result.scalars().all()}
+
+        if deletes:
+            result = await db.execute(
+                delete(Chatbot)
+                .where(Chatbot.id.in_(deletes), Chatbot.owner_id == owner_id)
+                .returning(Chatbot.id)
+            )
+            deleted = set(result.scalars().all())
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    cache = get_chatbot_cache()
+    for chatbot_id in [*updated, *deleted]:
+        await cache.invalidate(chatbot_id)
+    return created, updated, deleted
@@ -1,38 +1,83 @@
 # app/crud/crud_data_source.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import insert, update
 
 from app.db.models.data_source import DataSource
-from app.schemas.data_source import DataSourceCreate, ProcessingStatus
-from typing import Optional
+from app.db.models.chatbot import Chatbot
+from app.schemas.data_source import DataSourceCreate, DataSourceType, ProcessingStatus
+from typing import Iterable, List, Optional, Set
 
 async def get_data_source(db: AsyncSession, data_source_id: int) -> DataSource | None:
     """Gets a single data source by ID."""
     result = await db.execute(select(DataSource).filter(DataSource.id == data_source_id))
     return result.scalars().first()
 
+async def get_data_source_for_owner(db: AsyncSession, data_source_id: int, owner_id: int) -> DataSource | None:
+    """Gets a data source by ID if it belongs to one of the owner's chatbots (one query)."""
+    result = await db.execute(
+        select(DataSource)
+        .join(Chatbot, Chatbot.id == DataSource.chatbot_id)
+        .filter(DataSource.id == data_source_id, Chatbot.owner_id == owner_id)
+    )
+    return result.scalars().first()
+
+async def get_data_sources_by_chatbot(
+    db: AsyncSession,
+    *,
+    chatbot_id: int,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    status: Optional[ProcessingStatus] = None,
+    type: Optional[DataSourceType] = None,
+) -> List[DataSource]:
+    """
+    Lists a chatbot's data sources, newest first. Keyset pagination: pass the
+    last id of the previous page as `before_id`; each page is an index range
+    scan on (chatbot_id[, status | type], id), whatever the page depth.
+    """
+    query = select(DataSource).filter(DataSource.chatbot_id == chatbot_id)
+    if status is not None:
+        query = query.filter(DataSource.status == status)
+    if type is not None:
+        query = query.filter(DataSource.type == type)
+    if before_id is not None:
+        query = query.filter(DataSource.id < before_id)
+    result = await db.execute(query.order_by(DataSource.id.desc()).limit(limit))
+    return result.scalars().all()
+
 async def create_data_source(
-    db: AsyncSession, *, data_source_in: DataSourceCreate, chatbot_id: int, filename: Optional[str] = None
+    db: AsyncSession,
+    *,
+    data_source_in: DataSourceCreate,
+    chatbot_id: int,
+    filename: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    size_bytes: Optional[int] = None,
 ) -> DataSource:
-    """Creates a new data source record."""
-    db_data_source = DataSource(
-        chatbot_id=chatbot_id,
-        type=data_source_in.type,
-        uri=data_source_in.uri,
-        # content=data_source_in.content, # If storing content directly
-        filename=filename,
-        status=ProcessingStatus.PENDING # Explicitly set initial status
-    )
-    db.add(db_data_source)
+    """Creates a new data source record (one INSERT ... RETURNING, no refresh)."""
+    result = await db.execute(
+        insert(DataSource)
+        .values(
+            chatbot_id=chatbot_id,
+            type=data_source_in.type,
+            uri=data_source_in.uri,
+            # content=data_source_in.content, # If storing content directly
+            filename=filename,
+            content_hash=content_hash,
+            size_bytes=size_bytes,
+            status=ProcessingStatus.PENDING, # Explicitly set initial status
+        )
+        .returning(DataSource)
+    )
+    db_data_source = result.scalars().one()
     await db.commit()
-    await db.refresh(db_data_source)
     return db_data_source
 
 async def update_data_source_status(
-    db: AsyncSession, *, data_source_id: int, status: ProcessingStatus
+    db: AsyncSession, *, data_source_id: int, status: ProcessingStatus, progress: Optional[dict] = None
 ) -> DataSource | None:
-    """Updates the status of a data source."""
+    """Updates the status of a data source (and its progress snapshot, if given)."""
     # Option 1: Fetch, update attribute, commit (tracks object)
     # db_obj = await get_data_source(db, data_source_id)
     # if not db_obj: return None
@@ -43,16 +88,66 @@ async def update_data_source_status(
     # return db_obj
 
     # Option 2: Direct update statement (more efficient for single field)
+    values = {"status": status}
+    if progress is not None:
+        values["progress"] = progress
     result = await db.execute(
         update(DataSource)
         .where(DataSource.id == data_source_id)
-        .values(status=status)
+        .values(**values)
         .returning(DataSource) # Return the updated row
     )
     await db.commit() # Commit after execute for update/delete
     updated_obj = result.scalars().first()
     return updated_obj
 
+async def update_data_source_embedding_stats(
+    db: AsyncSession, *, data_source_id: int, hits: int, misses: int
+) -> None:
+    """Records how many chunks of the last processing run were served from the embedding cache."""
+    await db.execute(
+        update(DataSource)
+        .where(DataSource.id == data_source_id)
+        .values(embedding_cache_hits=hits, embedding_cache_misses=misses)
+    )
+    await db.commit()
+
+async def update_data_source_progress(db: AsyncSession, *, data_source_id: int, progress: dict) -> None:
+    """Stores the latest progress snapshot of a data source (called at a bounded rate)."""
+    await db.execute(
+        update(DataSource)
+        .where(DataSource.id == data_source_id)
+        .values(progress=progress)
+    )
+    await db.commit()
+
+async def get_referenced_content_hashes(db: AsyncSession, content_hashes: Iterable[str]) -> Set[str]:
+    """Returns the subset of content hashes (blobs) still referenced by a data source."""
+    content_hashes = list(content_hashes)
+    if not content_hashes:
+        return set()
+    result = await db.execute(
+        select(DataSource.content_hash).filter(DataSource.content_hash.in_(content_hashes)).distinct()
+    )
+    return set(result.scalars().all())
+
+async def owner_has_content(db: AsyncSession, *, owner_id: int, content_hash: str) -> bool:
+    """True if one of the owner's chatbots already has a data source with this content."""
+    result = await db.execute(
+        select(DataSource.id)
+        .join(Chatbot, Chatbot.id == DataSource.chatbot_id)
+        .filter(DataSource.content_hash == content_hash, Chatbot.owner_id == owner_id)
+        .limit(1)
+    )
+    return result.scalars().first() is not None
+
+async def get_content_size(db: AsyncSession, *, content_hash: str) -> Optional[int]:
+    """Size in bytes recorded for a content hash by an earlier upload."""
+    result = await db.execute(
+        select(DataSource.size_bytes).filter(DataSource.content_hash == content_hash).limit(1)
+    )
+    return result.scalars().first()
+
 # Add functions later to get status, list data sources, etc.
 async def get_data_source_status(db: AsyncSession, data_source_id: int) -> ProcessingStatus | None:
     """Gets the status of a data source."""
@@ -1,9 +1,10 @@
 # app/crud/crud_user.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update
 from app.db.models.user import User # Import DB model
 from app.schemas.user import UserCreate # Import Pydantic schema
-from app.core.security import get_password_hash # Import hashing function
+from app.core.security import get_password_hash_async # Import hashing function (runs off the event loop)
 
 async def get_user(db: AsyncSession, user_id: int) -> User | None:
     """Gets a single user by ID."""
@@ -16,15 +17,22 @@ async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, *, user_in: UserCreate) -> User:
-    """Creates a new user."""
-    hashed_password = get_password_hash(user_in.password)
-    # Create a User model instance (DB model)
-    db_user = User(
-        email=user_in.email,
-        hashed_password=hashed_password
-        # is_active and is_superuser use defaults from the model
+    """Creates a new user (one INSERT ... RETURNING, no refresh)."""
+    hashed_password = await get_password_hash_async(user_in.password)
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user_in.email,
+            hashed_password=hashed_password,
+            # is_active and is_superuser use defaults from the model
+        )
+        .returning(User) # DB-generated data (like ID) comes back with the INSERT
     )
-    db.add(db_user) # Add instance to the session
+    db_user = result.scalars().one()
     await db.commit() # Commit the transaction
-    await db.refresh(db_user) # Refresh instance to get DB-generated data (like ID)
-    return db_user
\ No newline at end of file
+    return db_user
+
+async def update_password_hash(db: AsyncSession, *, user_id: int, hashed_password: str) -> None:
+    """Replaces a user's password hash (same password, e.g. rehashed with a new bcrypt cost)."""
+    await db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+    await db.commit()
@@ -1,6 +1,6 @@
 # backend/app/db/models/chatbot.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, DateTime, Enum as SQLEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 from typing import TYPE_CHECKING # Import TYPE_CHECKING
@@ -18,6 +18,10 @@ if TYPE_CHECKING:
 
 class Chatbot(Base):
     __tablename__ = "chatbots"
+    __table_args__ = (
+        # Keyset pagination of an owner's chatbots: WHERE owner_id = ? AND id > ? ORDER BY id
+        Index("ix_chatbots_owner_id_id", "owner_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True, nullable=False)
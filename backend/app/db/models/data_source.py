@@ -1,5 +1,5 @@
 # app/db/models/data_source.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import JSON, BigInteger, Column, Index, Integer, String, ForeignKey, DateTime, Enum as SQLEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 import enum # Keep enum import here if needed
@@ -10,6 +10,13 @@ from app.schemas.data_source import DataSourceType, ProcessingStatus
 
 class DataSource(Base):
     __tablename__ = "data_sources"
+    __table_args__ = (
+        # Keyset pagination of a chatbot's data sources (newest first), optionally
+        # filtered by status or type: WHERE chatbot_id = ? [AND status = ?] AND id < ? ORDER BY id DESC
+        Index("ix_data_sources_chatbot_id_id", "chatbot_id", "id"),
+        Index("ix_data_sources_chatbot_id_status_id", "chatbot_id", "status", "id"),
+        Index("ix_data_sources_chatbot_id_type_id", "chatbot_id", "type", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     chatbot_id: Mapped[int] = mapped_column(Integer, ForeignKey("chatbots.id"), nullable=False)
@@ -20,6 +27,16 @@ class DataSource(Base):
     # content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     # Store original filename for file uploads
     filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # SHA-256 (hex) and size of uploaded files, computed while the upload is streamed to disk
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
+    size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+    # Embedding cache statistics of the last processing run (chunks served from / added to the cache)
+    embedding_cache_hits: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    embedding_cache_misses: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Per-stage progress of the current/last processing run (see app/ingestion/progress.py),
+    # written periodically by the worker; live updates go through the status broker
+    progress: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
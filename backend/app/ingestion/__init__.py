@@ -0,0 +1,2 @@
+# backend/app/ingestion/__init__.py
+# Building blocks for the data source ingestion pipeline run by the Celery tasks.
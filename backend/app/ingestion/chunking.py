@@ -0,0 +1,288 @@
+# app/ingestion/chunking.py
+"""
+Streaming parse-and-chunk stage of the ingestion pipeline.
+
+Files are never loaded whole: text files are read in fixed-size blocks and
+PDFs page by page, and chunks are yielded from generators as soon as enough
+text has been buffered. Memory use is bounded by the read size plus one
+chunk, regardless of how large the uploaded file is.
+"""
+import codecs
+import os
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+
+# File extensions accepted by upload_file_for_chatbot, mapped to a parser kind
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown"}
+PDF_EXTENSIONS = {".pdf"}
+
+# Separators tried (in order) when looking for a natural place to cut a chunk
+_CUT_SEPARATORS = ("\n\n", "\n", " ")
+
+
+class UnsupportedFileTypeError(ValueError):
+    """Raised when a file has an extension the pipeline cannot parse."""
+
+
+@dataclass
+class TextChunk:
+    """A piece of extracted text ready for embedding."""
+    index: int   # Position of the chunk within the data source (0-based)
+    text: str
+    offset: int  # Character offset of the chunk within the extracted text
+
+
+def iter_text_blocks(file_path: str, read_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Yields decoded text from a plain text / markdown file in blocks.
+
+    :param file_path: Path of the file to read.
+    :param read_size: Number of characters to read per block (defaults to settings.PARSE_READ_SIZE).
+    """
+    read_size = read_size or settings.PARSE_READ_SIZE
+    # Text mode handles multi-byte characters split across block boundaries.
+    # Undecodable bytes are replaced rather than failing the whole upload.
+    with open(file_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        while True:
+            block = f.read(read_size)
+            if not block:
+                break
+            yield block
+
+
+def iter_text_range_blocks(
+    file_path: str,
+    start: int,
+    end: int,
+    read_size: Optional[int] = None,
+    on_read: Optional[Callable[[int], None]] = None,
+) -> Iterator[str]:
+    """
+    Yields decoded text from the byte range [start, end) of a text file.
+    Range boundaries must fall on character boundaries (see plan_file_shards).
+
+    :param file_path: Path of the file to read.
+    :param start: First byte of the range.
+    :param end: End (exclusive) of the range.
+    :param read_size: Number of bytes to read per block (defaults to settings.PARSE_READ_SIZE).
+    :param on_read: Called with the number of bytes of each block read (progress reporting).
+    """
+    read_size = read_size or settings.PARSE_READ_SIZE
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = f.read(min(read_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            if on_read is not None:
+                on_read(len(data))
+            block = decoder.decode(data)
+            if block:
+                yield block
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def pdf_page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    with open(file_path, "rb") as f:
+        return len(PdfReader(f).pages)
+
+
+def iter_pdf_blocks(
+    file_path: str,
+    start_page: int = 0,
+    end_page: Optional[int] = None,
+    on_read: Optional[Callable[[int], None]] = None,
+) -> Iterator[str]:
+    """
+    Yields the extracted text of a PDF file one page at a time.
+
+    :param file_path: Path of the PDF file to read.
+    :param start_page: First page to extract (0-based).
+    :param end_page: Page to stop before (defaults to the end of the document).
+    :param on_read: Called with 1 after each page is extracted (progress reporting).
+    """
+    # Imported lazily: the parser is only needed by workers processing PDFs
+    from pypdf import PdfReader
+
+    # Pass an open file object (not the path) so pypdf seeks within the file
+    # instead of reading the whole document into memory first.
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        end_page = len(reader.pages) if end_page is None else min(end_page, len(reader.pages))
+        for page_number in range(start_page, end_page):
+            text = reader.pages[page_number].extract_text() or ""
+            if on_read is not None:
+                on_read(1)
+            if text:
+                # Keep words on different pages from being glued together
+                yield text + "\n"
+
+
+def iter_file_blocks(file_path: str, read_size: Optional[int] = None) -> Iterator[str]:
+    """Dispatches to the block reader matching the file extension."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return iter_text_blocks(file_path, read_size=read_size)
+    if extension in PDF_EXTENSIONS:
+        return iter_pdf_blocks(file_path)
+    raise UnsupportedFileTypeError(f"Unsupported file extension: {extension or '(none)'}")
+
+
+def _find_cut(buffer: str, start: int, chunk_size: int, overlap: int) -> int:
+    """
+    Returns the end position of the chunk starting at `start`.
+    Prefers cutting after a paragraph/line/word break in the second half of the window.
+    """
+    hard_end = start + chunk_size
+    lowest = start + max(overlap + 1, chunk_size // 2)
+    for separator in _CUT_SEPARATORS:
+        idx = buffer.rfind(separator, lowest, hard_end)
+        if idx != -1:
+            return idx + len(separator)
+    return hard_end
+
+
+def chunk_text_stream(
+    blocks: Iterable[str],
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    start_index: int = 0,
+) -> Iterator[TextChunk]:
+    """
+    Splits a stream of text blocks into overlapping chunks.
+
+    :param blocks: Iterable of text blocks (e.g. from iter_file_blocks).
+    :param chunk_size: Maximum chunk length in characters (defaults to settings.CHUNK_SIZE).
+    :param overlap: Characters shared between consecutive chunks (defaults to settings.CHUNK_OVERLAP).
+    :param start_index: Index assigned to the first chunk.
+    :return: Generator of TextChunk objects. Whitespace-only chunks are skipped.
+    """
+    chunk_size = chunk_size or settings.CHUNK_SIZE
+    overlap = settings.CHUNK_OVERLAP if overlap is None else overlap
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+
+    index = start_index
+    buffer = ""
+    buffer_offset = 0  # Offset of buffer[0] within the whole text
+
+    for block in blocks:
+        buffer += block
+        pos = 0
+        # Emit every full chunk available in the buffer
+        while len(buffer) - pos >= chunk_size:
+            cut = _find_cut(buffer, pos, chunk_size, overlap)
+            text = buffer[pos:cut]
+            if text.strip():
+                yield TextChunk(index=index, text=text, offset=buffer_offset + pos)
+                index += 1
+            pos = cut - overlap
+        # Compact once per block instead of once per chunk
+        buffer = buffer[pos:]
+        buffer_offset += pos
+
+    # Flush the tail; skip it when it is entirely covered by the previous chunk's overlap
+    if buffer.strip() and (index == start_index or len(buffer) > overlap):
+        yield TextChunk(index=index, text=buffer, offset=buffer_offset)
+
+
+def iter_file_chunks(
+    file_path: str,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+) -> Iterator[TextChunk]:
+    """
+    Reads a .txt, .md or .pdf file incrementally and yields its chunks.
+
+    :param file_path: Path of the uploaded file.
+    :param chunk_size: Maximum chunk length in characters.
+    :param overlap: Characters shared between consecutive chunks.
+    """
+    return chunk_text_stream(iter_file_blocks(file_path), chunk_size=chunk_size, overlap=overlap)
+
+
+# --- Sharding (fan-out ingestion of large files) ---
+
+def _next_line_start(f, position: int, size: int) -> int:
+    """First byte after the newline at or following `position` (or `size` if there is none)."""
+    f.seek(position)
+    while position < size:
+        data = f.read(64 * 1024)
+        if not data:
+            break
+        idx = data.find(b"\n")
+        if idx != -1:
+            return position + idx + 1
+        position += len(data)
+    return size
+
+
+def plan_file_shards(
+    file_path: str,
+    shard_bytes: Optional[int] = None,
+    shard_pages: Optional[int] = None,
+    extension: Optional[str] = None,
+) -> List[dict]:
+    """
+    Splits a file into independently processable shards: byte ranges for text
+    files (cut after a newline, so no character or line is split) and page
+    ranges for PDFs. Small files yield a single shard.
+
+    :param shard_bytes: Target size of a text shard (defaults to settings.INGEST_SHARD_BYTES).
+    :param shard_pages: Pages per PDF shard (defaults to settings.INGEST_SHARD_PAGES).
+    :param extension: File type, e.g. ".pdf" (defaults to the extension of file_path;
+        needed for blobs, whose paths have none).
+    :return: List of shard specs, e.g. {"kind": "text", "start": 0, "end": 8388608}
+        or {"kind": "pdf", "start_page": 0, "end_page": 50}.
+    """
+    extension = (extension or os.path.splitext(file_path)[1]).lower()
+    if extension in PDF_EXTENSIONS:
+        shard_pages = shard_pages or settings.INGEST_SHARD_PAGES
+        pages = pdf_page_count(file_path)
+        return [
+            {"kind": "pdf", "start_page": start, "end_page": min(start + shard_pages, pages)}
+            for start in range(0, max(pages, 1), shard_pages)
+        ]
+    if extension not in TEXT_EXTENSIONS:
+        raise UnsupportedFileTypeError(f"Unsupported file extension: {extension or '(none)'}")
+
+    shard_bytes = shard_bytes or settings.INGEST_SHARD_BYTES
+    size = os.path.getsize(file_path)
+    shards, start = [], 0
+    with open(file_path, "rb") as f:
+        while start < size:
+            end = size if size - start <= shard_bytes else _next_line_start(f, start + shard_bytes, size)
+            shards.append({"kind": "text", "start": start, "end": end})
+            start = end
+    return shards or [{"kind": "text", "start": 0, "end": 0}]
+
+
+def iter_shard_chunks(
+    file_path: str,
+    shard: dict,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    on_read: Optional[Callable[[int], None]] = None,
+) -> Iterator[TextChunk]:
+    """
+    Yields the chunks of one shard from plan_file_shards. Chunk indexes start
+    at 0 in every shard; they are made contiguous when the shards are merged.
+
+    :param on_read: Called with the number of bytes (text) or pages (PDF) of each block read.
+    """
+    if shard["kind"] == "pdf":
+        blocks = iter_pdf_blocks(file_path, shard["start_page"], shard["end_page"], on_read=on_read)
+    else:
+        blocks = iter_text_range_blocks(file_path, shard["start"], shard["end"], on_read=on_read)
+    return chunk_text_stream(blocks, chunk_size=chunk_size, overlap=overlap)
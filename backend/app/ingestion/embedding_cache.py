@@ -0,0 +1,222 @@
+# app/ingestion/embedding_cache.py
+"""
+Durable embedding cache shared by every chatbot and upload.
+
+Entries are keyed by (embedding model id, hash of the normalized chunk text),
+so re-uploading the same handbook to another chatbot, or an edited version
+with mostly unchanged chunks, only embeds the chunks that are actually new.
+
+The cache is a single SQLite database (WAL mode) on the volume shared by the
+workers. Its total size is capped at settings.EMBEDDING_CACHE_MAX_BYTES;
+when the cap is exceeded the least recently used (or, with
+EMBEDDING_CACHE_EVICTION="lfu", least frequently used) entries are evicted.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.ingestion.embeddings import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+# Estimated per-row cost on top of the vector bytes (key, columns, index entries)
+_ROW_OVERHEAD_BYTES = 96
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model_id   TEXT    NOT NULL,
+    chunk_hash BLOB    NOT NULL,
+    vector     BLOB    NOT NULL,
+    size       INTEGER NOT NULL,
+    last_used  INTEGER NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (model_id, chunk_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used);
+CREATE INDEX IF NOT EXISTS ix_embeddings_hits ON embeddings (hits, last_used);
+CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 1), total_bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO cache_stats (id, total_bytes) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings
+    BEGIN UPDATE cache_stats SET total_bytes = total_bytes + NEW.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings
+    BEGIN UPDATE cache_stats SET total_bytes = total_bytes - OLD.size WHERE id = 1; END;
+"""
+
+
+def chunk_hash(text: str) -> bytes:
+    """128-bit hash of a chunk after Unicode and whitespace normalization."""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Process-local handle on the shared on-disk cache."""
+
+    def __init__(self, path: str, max_bytes: int, eviction: str = "lru"):
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get_many(self, model_id: str, hashes: Sequence[bytes], dim: int, dtype: np.dtype) -> Dict[bytes, np.ndarray]:
+        """Returns the cached vectors among `hashes` and refreshes their recency/frequency."""
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        now = int(time.time())
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start:start + _LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings WHERE model_id = ? AND chunk_hash IN ({marks})",
+                    [model_id, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=dtype)
+                    if vector.shape[0] == dim:
+                        found[key] = vector
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ?, hits = hits + 1 "
+                        f"WHERE model_id = ? AND chunk_hash IN ({marks})",
+                        [now, model_id, *batch],
+                    )
+        return found
+
+    def put_many(self, model_id: str, hashes: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Stores freshly computed vectors, evicting old entries if the cap is exceeded."""
+        if not len(hashes):
+            return
+        now = int(time.time())
+        rows = []
+        for key, vector in zip(hashes, vectors):
+            blob = np.ascontiguousarray(vector).tobytes()
+            rows.append((model_id, key, blob, len(blob) + _ROW_OVERHEAD_BYTES, now))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model_id, chunk_hash, vector, size, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._evict_if_needed(row_size=rows[0][3])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict_if_needed(self, row_size: int) -> None:
+        total = self._conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% of the cap so eviction does not run on every insert
+        target = int(self.max_bytes * 0.9)
+        order = "last_used" if self.eviction == "lru" else "hits, last_used"
+        evicted = 0
+        while total > target:
+            # Entries of one model have the same size, so this is close to exact
+            limit = min((total - target) // row_size + 1, 10000)
+            cursor = self._conn.execute(
+                f"DELETE FROM embeddings WHERE (model_id, chunk_hash) IN "
+                f"(SELECT model_id, chunk_hash FROM embeddings ORDER BY {order} LIMIT ?)",
+                (limit,),
+            )
+            if cursor.rowcount <= 0:
+                break
+            evicted += cursor.rowcount
+            total = self._conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 1").fetchone()[0]
+        logger.info(f"Embedding cache evicted {evicted} entries ({self.eviction}), now {total} bytes")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT total_bytes FROM cache_stats WHERE id = 1").fetchone()[0]
+
+
+class CachedEmbedder:
+    """
+    Wraps an EmbeddingBackend with the shared cache. Hits and misses are
+    counted so the ingestion task can report the hit rate per data source.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, cache: Optional[EmbeddingCache]):
+        self.backend = backend
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeds a batch, computing only the cache misses (as one batch) and writing them back."""
+        if self.cache is None:
+            self.misses += len(texts)
+            return self.backend.embed(texts)
+
+        model_id, dim, dtype = self.backend.model_id, self.backend.dim, self.backend.dtype
+        hashes = [chunk_hash(text) for text in texts]
+        cached = self.cache.get_many(model_id, hashes, dim, dtype)
+
+        vectors = np.empty((len(texts), dim), dtype=dtype)
+        missing: List[int] = []
+        for i, key in enumerate(hashes):
+            vector = cached.get(key)
+            if vector is None:
+                missing.append(i)
+            else:
+                vectors[i] = vector
+        if missing:
+            computed = self.backend.embed([texts[i] for i in missing])
+            vectors[missing] = computed
+            # Duplicate chunks within a batch are written once
+            unique: Dict[bytes, int] = {}
+            for row, i in enumerate(missing):
+                unique.setdefault(hashes[i], row)
+            self.cache.put_many(model_id, list(unique.keys()), computed[list(unique.values())])
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return vectors
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Returns the process-wide cache handle, or None when the cache is disabled."""
+    global _cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        # Worker threads (--pool threads) may ask concurrently: open the database once
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    settings.EMBEDDING_CACHE_PATH,
+                    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+                    eviction=settings.EMBEDDING_CACHE_EVICTION,
+                )
+    return _cache
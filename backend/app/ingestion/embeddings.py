@@ -0,0 +1,176 @@
+# app/ingestion/embeddings.py
+"""
+Pluggable embedding backends used by the ingestion task (and later by queries).
+
+Backends embed whole batches of texts with a single matrix operation.
+The default "hashing" backend is local and CPU-only: it hashes byte n-grams
+into a fixed feature space and projects the counts with a seeded random
+matrix, so every process (API server or Celery worker) produces identical
+vectors without downloading a model.
+"""
+import abc
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# dtypes accepted for EMBEDDING_DTYPE
+SUPPORTED_DTYPES = ("float16", "float32", "float64")
+
+
+def iter_batches(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Groups any iterable (e.g. a chunk generator) into lists of at most batch_size items."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class EmbeddingBackend(abc.ABC):
+    """Interface every embedding backend implements."""
+
+    # Identifies the model *and* its parameters; vectors from different ids are not comparable
+    model_id: str
+    dim: int
+    dtype: np.dtype
+
+    @abc.abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds a batch of texts.
+
+        :param texts: The texts to embed.
+        :return: Array of shape (len(texts), dim), rows L2-normalized.
+        """
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embeds a single query string, returning a vector of shape (dim,)."""
+        return self.embed([text])[0]
+
+    def embed_batches(self, texts: Iterable[str], batch_size: int | None = None) -> Iterator[np.ndarray]:
+        """Embeds a stream of texts in batches of batch_size (defaults to settings.EMBEDDING_BATCH_SIZE)."""
+        for batch in iter_batches(texts, batch_size or settings.EMBEDDING_BATCH_SIZE):
+            yield self.embed(batch)
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Hashed byte n-gram features projected to a dense vector with NumPy.
+
+    The whole batch is featurized at once: texts are concatenated, n-gram
+    hashes are computed with vectorized integer arithmetic and counted with a
+    single np.bincount, and the count matrix is projected with one matmul.
+    """
+
+    # Large odd multiplier for multiplicative hashing of packed n-gram bytes
+    _HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(
+        self,
+        dim: int = 256,
+        n_features: int = 2 ** 14,
+        ngram_sizes: Tuple[int, ...] = (3, 4),
+        seed: int = 0,
+        dtype: str = "float32",
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}. Supported: {', '.join(SUPPORTED_DTYPES)}")
+        if any(n < 1 or n > 8 for n in ngram_sizes):
+            raise ValueError("n-gram sizes must be between 1 and 8 bytes")
+        self.dim = dim
+        self.n_features = n_features
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.dtype = np.dtype(dtype)
+        # float16 matmuls are slow on CPUs; compute in float32 and cast the result
+        self._compute_dtype = np.float64 if self.dtype == np.float64 else np.float32
+        sizes = "-".join(str(n) for n in self.ngram_sizes)
+        self.model_id = f"hashing-ngram-v1:d{dim}:f{n_features}:n{sizes}:s{seed}"
+
+        rng = np.random.default_rng(seed)
+        self._projection = (
+            rng.standard_normal((n_features, dim)).astype(self._compute_dtype) / np.sqrt(dim)
+        )
+
+    def _feature_counts(self, texts: Sequence[str]) -> np.ndarray:
+        """Builds the (len(texts), n_features) n-gram count matrix for a batch."""
+        encoded = [t.lower().encode("utf-8") for t in texts]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        # Row index of every byte in the concatenated buffer
+        row_of_byte = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        # Start position of each text, used to drop n-grams spanning two texts
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(encoded) else np.zeros(0, np.int64)
+
+        indices = []
+        for n in self.ngram_sizes:
+            if data.size < n:
+                continue
+            count = data.size - n + 1
+            # Pack n consecutive bytes into one integer
+            packed = np.zeros(count, dtype=np.uint64)
+            for offset in range(n):
+                packed = (packed << np.uint64(8)) | data[offset:offset + count]
+            rows = row_of_byte[:count]
+            # Keep only n-grams that end inside the same text they start in
+            valid = (np.arange(count) + n - 1) < (starts[rows] + lengths[rows])
+            # Mix the n-gram size in so "abc" as a 3-gram and 4-gram differ
+            hashed = (packed + np.uint64(n)) * self._HASH_MULTIPLIER
+            buckets = (hashed >> np.uint64(40)) % np.uint64(self.n_features)
+            indices.append(rows[valid] * self.n_features + buckets[valid].astype(np.int64))
+
+        flat = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        counts = np.bincount(flat, minlength=len(encoded) * self.n_features)
+        return counts.reshape(len(encoded), self.n_features).astype(self._compute_dtype)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=self.dtype)
+        features = self._feature_counts(texts)
+        # Sublinear term frequency keeps very repetitive chunks from dominating
+        np.log1p(features, out=features)
+        vectors = features @ self._projection
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors.astype(self.dtype, copy=False)
+
+
+# --- Backend registry ---
+# Maps EMBEDDING_BACKEND names to factories building a configured backend.
+_BACKEND_FACTORIES: Dict[str, Callable[[], EmbeddingBackend]] = {
+    "hashing": lambda: HashingEmbeddingBackend(
+        dim=settings.EMBEDDING_DIM,
+        n_features=settings.EMBEDDING_HASH_FEATURES,
+        dtype=settings.EMBEDDING_DTYPE,
+    ),
+}
+
+
+def register_embedding_backend(name: str, factory: Callable[[], EmbeddingBackend]) -> None:
+    """Registers an additional backend (e.g. a hosted model) under `name`."""
+    _BACKEND_FACTORIES[name] = factory
+    get_embedding_backend.cache_clear()
+
+
+@lru_cache()
+def get_embedding_backend(name: str | None = None) -> EmbeddingBackend:
+    """
+    Returns the (process-wide, cached) embedding backend.
+
+    :param name: Registered backend name; defaults to settings.EMBEDDING_BACKEND.
+    """
+    name = name or settings.EMBEDDING_BACKEND
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend: {name}") from None
+    return factory()
@@ -0,0 +1,169 @@
+# app/ingestion/progress.py
+"""
+Fine-grained ingestion progress.
+
+Each ingestion task (the whole file, or one shard of a large file) counts its
+progress per stage:
+
+    parsed    bytes (text) or pages (PDF) read from the file, out of a known total
+    embedded  chunks embedded
+    stored    vectors written to the vector store
+
+Counters are only updated in memory. They are published to the status broker
+at most every INGEST_PROGRESS_PUBLISH_SECONDS (the broker merges the parts of
+a sharded ingestion into one snapshot) and written to the data source row at
+most every INGEST_PROGRESS_PERSIST_SECONDS, so reporting progress never turns
+into one DB commit per batch.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.ingestion.status_events import get_status_broker, make_status_event
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("parsed", "embedded", "stored")
+
+
+def shard_work_units(shard: dict) -> tuple:
+    """(total, unit) of the parse stage of a shard from plan_file_shards."""
+    if shard["kind"] == "pdf":
+        return shard["end_page"] - shard["start_page"], "pages"
+    return shard["end"] - shard["start"], "bytes"
+
+
+def new_part_snapshot(total: int, unit: str, now: Optional[float] = None) -> dict:
+    """Progress of one part (file or shard) before any work was done."""
+    now = now or time.time()
+    snapshot = {stage: 0 for stage in STAGES}
+    snapshot.update({"parsed_total": total, "unit": unit, "started_at": None, "updated_at": now})
+    return snapshot
+
+
+def merge_part_snapshots(parts: Dict[str, dict]) -> Optional[dict]:
+    """
+    Merges the progress of the parts of an ingestion into one snapshot:
+    {"unit", "parsed": {"done", "total"}, "embedded": {"done"}, "stored": {"done"},
+     "parts", "started_at", "updated_at"}.
+    """
+    if not parts:
+        return None
+    values = list(parts.values())
+    started = [part["started_at"] for part in values if part.get("started_at")]
+    return {
+        "unit": values[0]["unit"],
+        "parsed": {
+            "done": sum(part["parsed"] for part in values),
+            "total": sum(part["parsed_total"] for part in values),
+        },
+        "embedded": {"done": sum(part["embedded"] for part in values)},
+        "stored": {"done": sum(part["stored"] for part in values)},
+        "parts": len(values),
+        "started_at": min(started) if started else None,
+        "updated_at": max(part["updated_at"] for part in values),
+    }
+
+
+def estimate_eta(progress: Optional[dict], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left, from the parse throughput observed between the start and the
+    last update (parsing drives the whole pipeline). None until there is a rate.
+    """
+    if not progress or not progress.get("started_at"):
+        return None
+    done, total = progress["parsed"]["done"], progress["parsed"]["total"]
+    elapsed = progress["updated_at"] - progress["started_at"]
+    if done <= 0 or elapsed <= 0:
+        return None
+    remaining = (total - done) / (done / elapsed)
+    # Time already spent since the snapshot was taken counts against the estimate
+    now = now or time.time()
+    return max(0.0, remaining - max(0.0, now - progress["updated_at"]))
+
+
+def report_progress(data_source_id: int, parts: Dict[str, dict], status: str = "PROCESSING") -> Optional[dict]:
+    """
+    Stores the snapshots of some parts of an ingestion in the status broker and
+    publishes a status event with the merged progress and ETA (blocking).
+    Never raises.
+
+    :return: The merged progress of all parts reported so far (None if the broker failed).
+    """
+    try:
+        broker = get_status_broker()
+        progress = merge_part_snapshots(broker.update_progress(data_source_id, parts))
+        broker.publish(
+            data_source_id,
+            make_status_event(data_source_id, status, progress=progress, eta_seconds=estimate_eta(progress)),
+        )
+    except Exception as e:
+        logger.warning(f"Could not publish progress of data source {data_source_id}: {e}")
+        return None
+    return progress
+
+
+class ProgressTracker:
+    """
+    Coalesces the progress counters of one part of an ingestion.
+    Thread-safe; `add` is cheap and never blocks on I/O unless a flush is due.
+    """
+
+    def __init__(
+        self,
+        data_source_id: int,
+        part: str,
+        total: int,
+        unit: str,
+        publish: Callable[[int, Dict[str, dict]], Optional[dict]] = report_progress,
+        persist: Optional[Callable[[int, dict], None]] = None,
+        publish_interval: Optional[float] = None,
+        persist_interval: Optional[float] = None,
+    ):
+        """
+        :param part: Key of this part ("0" for a whole file, the shard index otherwise).
+        :param publish: publish(data_source_id, {part: snapshot}) -> merged progress of all parts.
+        :param persist: persist(data_source_id, merged progress), for the less frequent DB write.
+        """
+        self.data_source_id = data_source_id
+        self.part = part
+        self._publish = publish
+        self._persist = persist
+        self._publish_interval = settings.INGEST_PROGRESS_PUBLISH_SECONDS if publish_interval is None else publish_interval
+        self._persist_interval = settings.INGEST_PROGRESS_PERSIST_SECONDS if persist_interval is None else persist_interval
+        self._lock = threading.Lock()
+        self._snapshot = new_part_snapshot(total, unit)
+        self._snapshot["started_at"] = time.time()
+        self._last_publish = self._last_persist = time.monotonic()
+
+    def add(self, stage: str, amount: int) -> None:
+        with self._lock:
+            self._snapshot[stage] += amount
+            now = time.monotonic()
+            publish = now - self._last_publish >= self._publish_interval
+            persist = self._persist is not None and now - self._last_persist >= self._persist_interval
+        if publish or persist:
+            self.flush(persist=persist)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._snapshot)
+        snapshot["updated_at"] = time.time()
+        return snapshot
+
+    def flush(self, persist: bool = False) -> None:
+        """Publishes the current counters (and writes them to the DB if `persist`)."""
+        with self._lock:
+            self._last_publish = time.monotonic()
+            if persist:
+                self._last_persist = self._last_publish
+        snapshot = self.snapshot()
+        try:
+            progress = self._publish(self.data_source_id, {self.part: snapshot})
+            if persist and self._persist is not None and progress is not None:
+                self._persist(self.data_source_id, progress)
+        except Exception as e:
+            # Progress is informative only: never fail an ingestion over it
+            logger.warning(f"Could not report progress of data source {self.data_source_id}: {e}")
@@ -0,0 +1,271 @@
+# app/ingestion/status_events.py
+"""
+Data source status events (push-based status instead of polling).
+
+Ingestion tasks publish an event on every status or progress transition of a
+data source; the status stream endpoints (SSE / WebSocket) forward them to
+the client. Nothing is read from the database per event.
+
+    worker:  publish_status_event(ds_id, "PROCESSING", chunks=512)
+    API:     async with broker.subscribe(ds_id) as events: ... await events.get()
+
+The "redis" broker uses Redis pub/sub (API and workers in separate processes)
+and keeps the last event of each data source under a key, so a client that
+connects late still gets the current state. Each API process holds ONE pub/sub
+connection and fans the messages out to its local subscribers, however many
+clients are connected. The "memory" broker does the same within a single
+process (tests, local runs without Redis).
+"""
+import abc
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber; a slow client skips intermediate progress
+# events (only the latest state matters), never the terminal one.
+_SUBSCRIBER_QUEUE_SIZE = 64
+
+TERMINAL_STATUSES = frozenset({"COMPLETED", "FAILED"})
+
+
+def status_channel(data_source_id: int) -> str:
+    return f"data_source:{data_source_id}:status"
+
+
+def make_status_event(data_source_id: int, status: str, **fields) -> dict:
+    event = {"data_source_id": data_source_id, "status": status, "timestamp": time.time()}
+    event.update(fields)
+    return event
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    # Runs on the subscriber's event loop
+    if queue.full():
+        try:
+            queue.get_nowait()  # Drop the oldest event
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(event)
+
+
+class StatusBroker(abc.ABC):
+    """Publishes data source status events and fans them out to local subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # channel -> {(loop, queue)} of this process's subscribers
+        self._subscribers: Dict[str, Set[tuple]] = defaultdict(set)
+
+    @abc.abstractmethod
+    def publish(self, data_source_id: int, event: dict) -> None:
+        """Publishes an event (blocking; safe to call from any thread)."""
+
+    @abc.abstractmethod
+    async def latest(self, data_source_id: int) -> Optional[dict]:
+        """Last event published for a data source, if still known."""
+
+    @abc.abstractmethod
+    def update_progress(self, data_source_id: int, parts: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Stores the progress snapshots of some parts (shards) of an ingestion and
+        returns the snapshots of all its parts, so any worker can merge them (blocking).
+        """
+
+    async def _channel_added(self, channel: str) -> None:
+        """Called when a channel gets its first local subscriber."""
+
+    async def _channel_removed(self, channel: str) -> None:
+        """Called when a channel loses its last local subscriber."""
+
+    def _dispatch(self, channel: str, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                pass  # Subscriber's loop is closed
+
+    @asynccontextmanager
+    async def subscribe(self, data_source_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving the events of a data source while the `with` block is active."""
+        channel = status_channel(data_source_id)
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            first = not self._subscribers[channel]
+            self._subscribers[channel].add(entry)
+        try:
+            if first:
+                await self._channel_added(channel)
+            yield entry[1]
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(entry)
+                last = not self._subscribers[channel]
+                if last:
+                    del self._subscribers[channel]
+            if last:
+                await self._channel_removed(channel)
+
+
+class InMemoryStatusBroker(StatusBroker):
+    """Single-process broker (tests, local runs without Redis)."""
+
+    def __init__(self):
+        super().__init__()
+        self._latest: Dict[int, dict] = {}
+        self._progress: Dict[int, Dict[str, dict]] = defaultdict(dict)
+
+    def publish(self, data_source_id: int, event: dict) -> None:
+        with self._lock:
+            self._latest[data_source_id] = event
+        self._dispatch(status_channel(data_source_id), event)
+
+    async def latest(self, data_source_id: int) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(data_source_id)
+
+    def update_progress(self, data_source_id: int, parts: Dict[str, dict]) -> Dict[str, dict]:
+        with self._lock:
+            self._progress[data_source_id].update(parts)
+            return dict(self._progress[data_source_id])
+
+
+class RedisStatusBroker(StatusBroker):
+    """Redis pub/sub broker, shared by the API processes and the Celery workers."""
+
+    def __init__(self, url: str, event_ttl_seconds: int):
+        super().__init__()
+        import redis
+        import redis.asyncio
+
+        self._url = url
+        self._event_ttl = event_ttl_seconds
+        self._sync_client = redis.Redis.from_url(url)  # Publishing (worker threads)
+        self._async_client: Optional["redis.asyncio.Redis"] = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _latest_key(data_source_id: int) -> str:
+        return f"data_source:{data_source_id}:last_status"
+
+    def publish(self, data_source_id: int, event: dict) -> None:
+        payload = json.dumps(event)
+        pipe = self._sync_client.pipeline(transaction=False)
+        pipe.set(self._latest_key(data_source_id), payload, ex=self._event_ttl)
+        pipe.publish(status_channel(data_source_id), payload)
+        pipe.execute()
+
+    def update_progress(self, data_source_id: int, parts: Dict[str, dict]) -> Dict[str, dict]:
+        key = f"data_source:{data_source_id}:progress"
+        pipe = self._sync_client.pipeline(transaction=False)
+        pipe.hset(key, mapping={part: json.dumps(snapshot) for part, snapshot in parts.items()})
+        pipe.expire(key, self._event_ttl)
+        pipe.hgetall(key)
+        stored = pipe.execute()[-1]
+        return {
+            (part.decode() if isinstance(part, bytes) else part): json.loads(snapshot)
+            for part, snapshot in stored.items()
+        }
+
+    def _client(self):
+        if self._async_client is None:
+            import redis.asyncio
+            self._async_client = redis.asyncio.Redis.from_url(self._url)
+        return self._async_client
+
+    async def latest(self, data_source_id: int) -> Optional[dict]:
+        payload = await self._client().get(self._latest_key(data_source_id))
+        return json.loads(payload) if payload else None
+
+    async def _channel_added(self, channel: str) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._client().pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(channel)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _channel_removed(self, channel: str) -> None:
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self) -> None:
+        # The one pub/sub connection of this process; runs while the API is up
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Status event listener error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                try:
+                    event = json.loads(message["data"])
+                except ValueError:
+                    continue
+                self._dispatch(channel, event)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        self._sync_client.close()
+
+
+_BROKER_FACTORIES: Dict[str, Callable[[], StatusBroker]] = {
+    "redis": lambda: RedisStatusBroker(settings.STATUS_BROKER_URL, settings.STATUS_EVENT_TTL_SECONDS),
+    "memory": InMemoryStatusBroker,
+}
+
+
+def register_status_broker(name: str, factory: Callable[[], StatusBroker]) -> None:
+    _BROKER_FACTORIES[name] = factory
+    get_status_broker.cache_clear()
+
+
+@lru_cache()
+def get_status_broker(name: Optional[str] = None) -> StatusBroker:
+    """
+    Returns the (process-wide, cached) status broker.
+
+    :param name: Registered broker name; defaults to settings.STATUS_BROKER_BACKEND.
+    """
+    name = name or settings.STATUS_BROKER_BACKEND
+    try:
+        factory = _BROKER_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown status broker backend: {name}") from None
+    return factory()
+
+
+def publish_status_event(data_source_id: int, status: str, **fields) -> None:
+    """
+    Publishes a status/progress event of a data source (blocking).
+    Never raises: status events must not fail an ingestion.
+    """
+    try:
+        get_status_broker().publish(data_source_id, make_status_event(data_source_id, status, **fields))
+    except Exception as e:
+        logger.warning(f"Could not publish status event for data source {data_source_id}: {e}")
@@ -0,0 +1,252 @@
+# app/ingestion/upload_sessions.py
+"""
+Resumable, chunked uploads.
+
+A session reserves a directory on the upload volume:
+
+    <UPLOAD_SESSION_DIR>/<upload_id>/
+        session.json        # owner, chatbot, filename, part size, expiry
+        data                # the file being assembled
+        parts/<n>.json      # written once part n is durably in `data`
+
+Part n always covers bytes [n * part_size, n * part_size + len) of the file,
+so parts can arrive in any order and in parallel: each one is written
+straight into place with pwrite(). Finalizing therefore never copies the
+parts: it checks they are contiguous, hashes the file once and renames it.
+Session state lives only on disk, so any API process can serve any request.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+
+SESSION_FILE = "session.json"
+DATA_FILE = "data"
+PARTS_DIR = "parts"
+
+
+class UploadSessionError(ValueError):
+    """Raised for invalid part uploads or an incomplete session on finalize."""
+
+
+class UploadSessionNotFound(LookupError):
+    """Raised for unknown or expired upload sessions."""
+
+
+class UploadPartTooLarge(UploadSessionError):
+    """Raised as soon as a part exceeds the session's part size or the upload size limit."""
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _session_dir(root: str, upload_id: str) -> str:
+    # upload ids are generated hex strings; reject anything else (path traversal)
+    if not upload_id.isalnum():
+        raise UploadSessionNotFound(upload_id)
+    return os.path.join(root, upload_id)
+
+
+def sweep_expired_sessions(root: str, now: Optional[float] = None) -> int:
+    """Removes sessions past their expiry; returns how many were removed."""
+    now = now or time.time()
+    removed = 0
+    if not os.path.isdir(root):
+        return 0
+    for upload_id in os.listdir(root):
+        try:
+            with open(os.path.join(root, upload_id, SESSION_FILE), "r", encoding="utf-8") as f:
+                expired = json.load(f)["expires_at"] < now
+        except (OSError, ValueError, KeyError):
+            continue
+        if expired:
+            shutil.rmtree(os.path.join(root, upload_id), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def create_session(
+    root: str,
+    *,
+    owner_id: int,
+    chatbot_id: int,
+    filename: str,
+    content_type: str,
+    part_size: int,
+    total_size: Optional[int],
+    ttl_seconds: int,
+) -> dict:
+    """Creates a session directory and returns the session record."""
+    os.makedirs(root, exist_ok=True)
+    sweep_expired_sessions(root)
+    upload_id = uuid.uuid4().hex
+    directory = _session_dir(root, upload_id)
+    os.makedirs(os.path.join(directory, PARTS_DIR))
+    with open(os.path.join(directory, DATA_FILE), "wb"):
+        pass
+    session = {
+        "upload_id": upload_id,
+        "owner_id": owner_id,
+        "chatbot_id": chatbot_id,
+        "filename": filename,
+        "content_type": content_type,
+        "part_size": part_size,
+        "total_size": total_size,
+        "created_at": time.time(),
+        "expires_at": time.time() + ttl_seconds,
+    }
+    _write_json_atomic(os.path.join(directory, SESSION_FILE), session)
+    return session
+
+
+def load_session(root: str, upload_id: str) -> dict:
+    directory = _session_dir(root, upload_id)
+    try:
+        with open(os.path.join(directory, SESSION_FILE), "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        raise UploadSessionNotFound(upload_id)
+    if session["expires_at"] < time.time():
+        shutil.rmtree(directory, ignore_errors=True)
+        raise UploadSessionNotFound(upload_id)
+    session["path"] = directory
+    return session
+
+
+def received_parts(session: dict) -> List[dict]:
+    """Parts durably received so far ({part_number, size, sha256}), by part number."""
+    parts_dir = os.path.join(session["path"], PARTS_DIR)
+    parts = []
+    for name in os.listdir(parts_dir):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(parts_dir, name), "r", encoding="utf-8") as f:
+                    parts.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Part being rewritten right now
+    return sorted(parts, key=lambda part: part["part_number"])
+
+
+def received_ranges(session: dict, parts: List[dict]) -> List[Tuple[int, int]]:
+    """Merged [start, end) byte ranges covered by the received parts."""
+    ranges: List[Tuple[int, int]] = []
+    for part in parts:
+        start = part["part_number"] * session["part_size"]
+        end = start + part["size"]
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+async def write_part(
+    session: dict, part_number: int, chunks: AsyncIterator[bytes], max_upload_bytes: int
+) -> dict:
+    """
+    Streams one part into its place in the session's data file.
+    Writes and hashing run in worker threads; the event loop never blocks on disk.
+    """
+    if part_number < 0:
+        raise UploadSessionError("Part numbers start at 0")
+    part_size = session["part_size"]
+    offset = part_number * part_size
+    limit = min(part_size, max_upload_bytes - offset)
+    if session["total_size"] is not None:
+        limit = min(limit, session["total_size"] - offset)
+    if limit <= 0:
+        raise UploadPartTooLarge(f"Part {part_number} is beyond the end of the upload")
+
+    directory = session["path"]
+    marker = os.path.join(directory, PARTS_DIR, f"{part_number}.json")
+    # A part being re-sent is not "received" until it is completely rewritten
+    await asyncio.to_thread(_remove_if_exists, marker)
+    fd = await asyncio.to_thread(os.open, os.path.join(directory, DATA_FILE), os.O_WRONLY)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if size + len(chunk) > limit:
+                raise UploadPartTooLarge(f"Part {part_number} exceeds {limit} bytes")
+            await asyncio.to_thread(_pwrite_and_hash, fd, hasher, chunk, offset + size)
+            size += len(chunk)
+        await asyncio.to_thread(os.fsync, fd)
+    finally:
+        await asyncio.to_thread(os.close, fd)
+
+    part = {"part_number": part_number, "size": size, "sha256": hasher.hexdigest()}
+    await asyncio.to_thread(_write_json_atomic, marker, part)
+    return part
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _pwrite_and_hash(fd: int, hasher, data: bytes, offset: int) -> None:
+    hasher.update(data)
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def finalize_session(session: dict, dest_path: str, expected_sha256: Optional[str] = None) -> Tuple[int, str]:
+    """
+    Checks that parts 0..n-1 are all present (every part but the last one full),
+    hashes the assembled file and renames it to `dest_path` (replacing it;
+    e.g. a blob store staging path on the same filesystem). Blocking.
+
+    :return: (size, sha256 hex digest)
+    """
+    parts = received_parts(session)
+    if not parts:
+        raise UploadSessionError("No parts received")
+    part_size = session["part_size"]
+    numbers = [part["part_number"] for part in parts]
+    missing = sorted(set(range(numbers[-1] + 1)) - set(numbers))
+    if missing:
+        raise UploadSessionError(f"Missing parts: {missing[:20]}")
+    short = [part["part_number"] for part in parts[:-1] if part["size"] != part_size]
+    if short:
+        raise UploadSessionError(f"Parts {short[:20]} are smaller than the part size {part_size}")
+    size = numbers[-1] * part_size + parts[-1]["size"]
+    if session["total_size"] is not None and size != session["total_size"]:
+        raise UploadSessionError(f"Received {size} bytes, expected {session['total_size']}")
+
+    data_path = os.path.join(session["path"], DATA_FILE)
+    hasher = hashlib.sha256()
+    with open(data_path, "r+b") as f:
+        f.truncate(size)  # Drop bytes of an over-long last part sent earlier, if any
+        while True:
+            block = f.read(1024 * 1024)
+            if not block:
+                break
+            hasher.update(block)
+    sha256 = hasher.hexdigest()
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        raise UploadSessionError(f"SHA-256 mismatch: received file hashes to {sha256}")
+
+    os.replace(data_path, dest_path)
+    shutil.rmtree(session["path"], ignore_errors=True)
+    return size, sha256
+
+
+def abort_session(session: dict) -> None:
+    shutil.rmtree(session["path"], ignore_errors=True)
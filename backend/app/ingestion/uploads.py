@@ -0,0 +1,167 @@
+# app/ingestion/uploads.py
+"""
+Streaming receiver for file uploads.
+
+The multipart request body is parsed as it arrives (python-multipart's
+streaming parser) instead of being spooled by Starlette before the endpoint
+runs. File bytes are written to disk in fixed-size pieces from a worker
+thread, with the SHA-256 hash and byte count computed in the same pass, so a
+large upload never blocks the event loop and is never copied twice. Uploads
+over the size limit are rejected as soon as the limit is crossed (or right
+away, from Content-Length).
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, List, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+# Allowance for the multipart framing around the file in Content-Length checks
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class InvalidUploadError(ValueError):
+    """Raised for malformed upload requests (not multipart, no file part, bad content type)."""
+
+
+class UploadTooLargeError(ValueError):
+    """Raised as soon as an upload is known to exceed the size limit."""
+
+
+@dataclass
+class StoredUpload:
+    """A received file, written to a staging path."""
+    path: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+
+
+def _write_and_hash(f: BinaryIO, hasher, pieces: Iterable[bytes]) -> None:
+    # hashlib and file writes release the GIL, so this runs well in a thread
+    for piece in pieces:
+        hasher.update(piece)
+        f.write(piece)
+
+
+def _discard(f: BinaryIO, path: str) -> None:
+    f.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def receive_file_upload(
+    request: Request,
+    dest_dir: str,
+    max_bytes: int,
+    field_name: str = "file",
+    allowed_content_types: Optional[Iterable[str]] = None,
+) -> StoredUpload:
+    """
+    Streams the `field_name` file part of a multipart/form-data request into `dest_dir`.
+
+    :param request: The incoming request; its body must not have been read yet.
+    :param dest_dir: Directory of the received file (e.g. the blob store staging directory).
+    :param max_bytes: Maximum accepted file size.
+    :param allowed_content_types: Accepted Content-Type values of the file part (any if None).
+    :return: The stored file; the caller moves it into place or removes it.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data request")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + _MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_bytes} bytes")
+
+    allowed = set(allowed_content_types) if allowed_content_types is not None else None
+    await asyncio.to_thread(os.makedirs, dest_dir, exist_ok=True)
+    fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=dest_dir, prefix=".upload-")
+    f = os.fdopen(fd, "wb")
+    hasher = hashlib.sha256()
+
+    # Parser state, filled in by the (synchronous) callbacks
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "in_file": False, "found": False}
+    pending: List[bytes] = []
+    part_info = {"filename": "", "content_type": ""}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"], state["header_value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        is_target = (
+            not state["found"]
+            and disposition.get(b"name", b"").decode("latin-1") == field_name
+            and b"filename" in disposition
+        )
+        state["in_file"] = is_target
+        if is_target:
+            state["found"] = True
+            part_info["filename"] = disposition[b"filename"].decode("utf-8", errors="replace")
+            part_info["content_type"] = state["headers"].get(b"content-type", b"").decode("latin-1").strip()
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end():
+        state["in_file"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    size = 0
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state["found"] and allowed is not None and part_info["content_type"] not in allowed:
+                raise InvalidUploadError(
+                    f"Unsupported file type: {part_info['content_type']}. Supported: {', '.join(sorted(allowed))}"
+                )
+            if pending:
+                size += sum(len(piece) for piece in pending)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_bytes} bytes")
+                pieces = pending[:]
+                pending.clear()
+                await asyncio.to_thread(_write_and_hash, f, hasher, pieces)
+        parser.finalize()
+        if not state["found"]:
+            raise InvalidUploadError(f"No file provided in form field '{field_name}'")
+        await asyncio.to_thread(f.close)
+    except BaseException:
+        await asyncio.to_thread(_discard, f, tmp_path)
+        raise
+
+    return StoredUpload(
+        path=tmp_path,
+        filename=part_info["filename"],
+        content_type=part_info["content_type"],
+        size=size,
+        sha256=hasher.hexdigest(),
+    )
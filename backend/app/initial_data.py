@@ -15,7 +15,6 @@ from app.db.models.chatbot import Chatbot
 # --- Import other models if needed ---
 
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 async def init_db():
@@ -49,4 +48,5 @@ async def init_db():
          await async_engine.dispose()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(init_db())
\ No newline at end of file
@@ -2,12 +2,17 @@
 import logging
 from fastapi import FastAPI
 
+from app.api.compression import CompressionMiddleware
+from app.core.config import settings
+
 # --- Explicitly import the ROUTER from each specific endpoint module ---
 # These are the modules you DO have:
 from app.api.endpoints.users import router as users_router
 from app.api.endpoints.chatbots import router as chatbots_router
 from app.api.endpoints.login import router as login_router
 from app.api.endpoints.data_sources import router as data_sources_router
+from app.api.endpoints.query import router as query_router
+from app.api.endpoints.uploads import router as uploads_router
 # --- Removed import for items ---
 
 # Configure logging
@@ -21,6 +26,14 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Compress larger responses (chatbot and data source lists) for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+    compresslevel=settings.RESPONSE_COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY,
+)
+
 # Define a common prefix for API versioning
 api_prefix = "/api/v1"
 
@@ -45,6 +58,16 @@ app.include_router(
     prefix=f"{api_prefix}/chatbots", # Mounts relative to chatbots (e.g., /chatbots/{id}/upload-file)
     tags=["data_sources"]
 )
+app.include_router(
+    query_router,
+    prefix=f"{api_prefix}/chatbots", # e.g. POST /chatbots/{id}/query
+    tags=["query"]
+)
+app.include_router(
+    uploads_router,
+    prefix=f"{api_prefix}/chatbots", # e.g. PUT /chatbots/{id}/uploads/{upload_id}/parts/{n}
+    tags=["uploads"]
+)
 # --- Removed include_router for items ---
 
 # Root endpoint
@@ -0,0 +1,2 @@
+# backend/app/retrieval/__init__.py
+# Per-chatbot indexes built by the ingestion task and queried by the API.
@@ -0,0 +1,65 @@
+# app/retrieval/hybrid.py
+"""
+Hybrid retrieval: fuses BM25 keyword hits with vector similarity hits.
+
+Both retrievers return their own top candidates, which are merged with
+reciprocal rank fusion (RRF): score = sum(1 / (rrf_k + rank)). RRF only
+uses ranks, so the very different BM25 and cosine score scales need no
+calibration.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.retrieval.vector_store import SearchHit, VectorStore
+
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[SearchHit]], k: int, rrf_k: int = 60) -> List[SearchHit]:
+    """
+    Merges ranked hit lists into one list of at most k hits.
+    Hits are identified by (data_source_id, chunk_index); the fused score replaces the original one.
+    """
+    fused: Dict[Tuple[int, int], float] = {}
+    hits: Dict[Tuple[int, int], SearchHit] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = (hit.data_source_id, hit.chunk_index)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            hits.setdefault(key, hit)
+    best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [
+        SearchHit(score=score, data_source_id=key[0], chunk_index=key[1], text=hits[key].text)
+        for key, score in best
+    ]
+
+
+def search(
+    store: VectorStore, query_text: str, query_vector: Optional[np.ndarray], k: int = 5, mode: str | None = None
+) -> List[SearchHit]:
+    """
+    Runs a query in the given retrieval mode.
+
+    :param store: The chatbot's vector store.
+    :param query_text: Raw query text (used by BM25).
+    :param query_vector: Embedded query (used by vector search; may be None in "bm25" mode).
+    :param k: Number of hits to return.
+    :param mode: "vector", "bm25" or "hybrid" (defaults to settings.RETRIEVAL_MODE).
+    """
+    mode = mode or settings.RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode}. Supported: {', '.join(RETRIEVAL_MODES)}")
+    if mode == "vector":
+        return store.search(query_vector, k)
+    if mode == "bm25":
+        return store.lexical_search(query_text, k)
+
+    # Each retriever contributes a deeper candidate list than k so fusion has overlap to work with
+    depth = max(k, settings.HYBRID_CANDIDATES)
+    return reciprocal_rank_fusion(
+        [store.lexical_search(query_text, depth), store.search(query_vector, depth)],
+        k=k,
+        rrf_k=settings.HYBRID_RRF_K,
+    )
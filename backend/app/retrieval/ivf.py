@@ -0,0 +1,179 @@
+# app/retrieval/ivf.py
+"""
+IVF (inverted file) approximate nearest-neighbour index for the vector store.
+
+Vectors are clustered with spherical k-means; each segment stores its row ids
+grouped by nearest centroid. A query scores only the rows in the `nprobe`
+lists whose centroids are most similar to it (see VectorStore.search).
+
+The index is maintained incrementally by the ingestion task: once a chatbot
+reaches settings.IVF_MIN_VECTORS, centroids are trained on a sample of its
+vectors; every later segment only needs its rows assigned to the existing
+centroids. Centroids are retrained when the chatbot has grown by
+settings.IVF_RETRAIN_FACTOR since the last training.
+"""
+import logging
+import math
+import os
+import uuid
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.retrieval.vector_store import (
+    MANIFEST_FILE,
+    VECTOR_DTYPE,
+    Segment,
+    _chatbot_lock,
+    _load_manifest,
+    _write_json_atomic,
+    chatbot_dir,
+    ivf_centroids_path,
+    ivf_list_paths,
+    retire_files,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows scored against the centroids per matmul, bounding temporary memory
+_ASSIGN_BATCH_ROWS = 8192
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row of `vectors`."""
+    labels = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], _ASSIGN_BATCH_ROWS):
+        block = np.asarray(vectors[start:start + _ASSIGN_BATCH_ROWS], dtype=VECTOR_DTYPE)
+        labels[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_kmeans(sample: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means (cosine similarity) on a sample of vectors.
+
+    :param sample: (n, dim) float32 training vectors.
+    :param n_lists: Number of centroids to train.
+    :param iterations: Lloyd iterations.
+    :return: (n_lists, dim) float32 unit-norm centroids.
+    """
+    n = sample.shape[0]
+    if n < n_lists:
+        raise ValueError(f"Need at least {n_lists} training vectors, got {n}")
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(n, size=n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign_lists(sample, centroids)
+        sizes = np.bincount(labels, minlength=n_lists)
+        # Per-cluster sums with one sort + reduceat instead of an unbuffered np.add.at
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        non_empty = sizes > 0
+        sums = np.zeros_like(centroids)
+        sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+        # Re-seed empty clusters with random points so no list goes unused
+        empty = np.flatnonzero(sizes == 0)
+        if empty.size:
+            sums[empty] = sample[rng.choice(n, size=empty.size, replace=False)]
+        centroids = _normalize_rows(sums).astype(VECTOR_DTYPE)
+    return centroids
+
+
+def default_n_lists(total_vectors: int, sample_size: int) -> int:
+    """About 4 * sqrt(N) lists, keeping at least ~40 training points per centroid."""
+    n_lists = int(4 * math.sqrt(total_vectors))
+    return max(1, min(n_lists, sample_size // 40, 65536))
+
+
+def _sample_vectors(segments: List[Segment], sample_size: int, seed: int = 0) -> np.ndarray:
+    """Uniform sample of rows across all segments (only the sampled pages are read)."""
+    counts = np.array([s.count for s in segments], dtype=np.int64)
+    total = int(counts.sum())
+    rng = np.random.default_rng(seed)
+    picks = np.sort(rng.choice(total, size=min(sample_size, total), replace=False))
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    parts = []
+    for i, segment in enumerate(segments):
+        lo, hi = np.searchsorted(picks, [bounds[i], bounds[i + 1]])
+        if hi > lo:
+            parts.append(np.asarray(segment.vectors[picks[lo:hi] - bounds[i]], dtype=VECTOR_DTYPE))
+    return np.concatenate(parts)
+
+
+def build_segment_lists(segment: Segment, ivf_id: str, centroids: np.ndarray) -> None:
+    """Assigns a segment's rows to centroids and writes its inverted list files."""
+    n_lists = centroids.shape[0]
+    labels = assign_lists(segment.vectors, centroids)
+    order = np.argsort(labels, kind="stable").astype(np.int64)
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=n_lists)))).astype(np.int64)
+    order_path, offsets_path = ivf_list_paths(segment.path, ivf_id)
+    for path, array in ((order_path, order), (offsets_path, offsets)):
+        tmp_path = f"{path}.tmp"
+        array.tofile(tmp_path)
+        os.replace(tmp_path, path)
+
+
+def update_ivf_index(chatbot_id: int, root: Optional[str] = None) -> Optional[str]:
+    """
+    Brings a chatbot's IVF index up to date after new segments were committed.
+
+    Trains (or retrains) centroids when needed, builds inverted lists for
+    segments that lack them and publishes the result in the manifest.
+
+    :return: The current IVF id, or None when the chatbot is too small for an index.
+    """
+    directory = chatbot_dir(chatbot_id, root)
+    with _chatbot_lock(directory):
+        manifest = _load_manifest(directory)
+        entries = manifest["segments"]
+        total = sum(entry["count"] for entry in entries)
+        if total < settings.IVF_MIN_VECTORS:
+            return None
+
+        segments = {entry["id"]: Segment(os.path.join(directory, "segments", entry["id"])) for entry in entries}
+        old_ivf = manifest["ivf"]
+        retrain = old_ivf is None or total >= old_ivf["trained_count"] * settings.IVF_RETRAIN_FACTOR
+
+        if retrain:
+            sample = _sample_vectors([s for s in segments.values() if s.count], settings.IVF_TRAIN_SAMPLE)
+            n_lists = settings.IVF_NLIST or default_n_lists(total, sample.shape[0])
+            centroids = train_kmeans(sample, n_lists, iterations=settings.IVF_KMEANS_ITERATIONS)
+            ivf = {"id": uuid.uuid4().hex[:12], "n_lists": n_lists, "trained_count": total}
+            path = ivf_centroids_path(directory, ivf["id"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            centroids.tofile(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            logger.info(f"Trained {n_lists} IVF centroids for chatbot {chatbot_id} on {sample.shape[0]} vectors")
+        else:
+            ivf = old_ivf
+            centroids = np.fromfile(ivf_centroids_path(directory, ivf["id"]), dtype=VECTOR_DTYPE)
+            centroids = centroids.reshape(ivf["n_lists"], manifest["dim"])
+
+        built = 0
+        for entry in entries:
+            if entry.get("ivf") != ivf["id"]:
+                build_segment_lists(segments[entry["id"]], ivf["id"], centroids)
+                entry["ivf"] = ivf["id"]
+                built += 1
+
+        if built or retrain:
+            manifest["ivf"] = ivf
+            manifest["version"] += 1
+            # Files of replaced centroids are no longer referenced by the manifest
+            # (deleted after the grace period: open stores may still map them)
+            if retrain and old_ivf is not None:
+                old_files = [ivf_centroids_path(directory, old_ivf["id"])]
+                for segment in segments.values():
+                    old_files.extend(ivf_list_paths(segment.path, old_ivf["id"]))
+                retire_files(manifest, (os.path.relpath(path, directory) for path in old_files))
+            _write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest)
+            logger.info(f"Built IVF lists for {built} segment(s) of chatbot {chatbot_id}")
+    return ivf["id"]
@@ -0,0 +1,198 @@
+# app/retrieval/lexical.py
+"""
+Compact BM25 inverted index, one per vector store segment.
+
+The index is built by SegmentWriter in the same streaming pass that writes
+the vectors, so the uploaded file is read only once. Terms are identified by
+a 32-bit hash, which keeps the dictionary a plain sorted array that can be
+memory-mapped and searched with np.searchsorted.
+
+Segment files:
+
+    lex_terms.u32     # (T,) sorted term hashes
+    lex_offsets.i64   # (T + 1,) start of each term's postings
+    lex_gaps.u16|u32  # (P,) doc ids, delta-encoded per term (first entry absolute)
+    lex_tfs.u16       # (P,) term frequencies
+    lex_lengths.u32   # (count,) document (chunk) lengths in tokens
+
+BM25 length norms are precomputed per segment from the chatbot-wide average
+length when a store is opened; scoring a query is a handful of vectorized
+operations over the postings of its terms.
+"""
+import os
+import re
+from array import array
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+TERMS_FILE = "lex_terms.u32"
+OFFSETS_FILE = "lex_offsets.i64"
+TFS_FILE = "lex_tfs.u16"
+LENGTHS_FILE = "lex_lengths.u32"
+POSTINGS_TMP_FILE = "lex_postings.tmp"
+
+# Words, numbers and codes such as "e-1234", "v2.3.1" or "part_no" as one token
+_TOKEN_RE = re.compile(r"\w+(?:[-_./]\w+)*")
+_SUBTOKEN_RE = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens of a text. Compound codes are kept whole and also
+    split into their parts, so "XJ-900" matches both "xj-900" and "900".
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if _SUBTOKEN_RE.search(token):
+            tokens.extend(part for part in _SUBTOKEN_RE.split(token) if part)
+    return tokens
+
+
+def term_hash(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def _gaps_file(dtype: str) -> str:
+    return f"lex_gaps.{'u16' if dtype == 'uint16' else 'u32'}"
+
+
+class LexicalIndexWriter:
+    """
+    Accumulates postings for one segment while its chunks are streamed in.
+
+    Postings are spilled to a temporary file after every batch (12 bytes
+    each), so memory stays bounded while a large file is ingested; they are
+    sorted into the final term-ordered layout on finish().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.total_length = 0
+        self._lengths = array("I")  # Compact per-chunk token counts
+        self._postings = open(os.path.join(path, POSTINGS_TMP_FILE), "wb")
+
+    def add(self, texts: Sequence[str]) -> None:
+        hashes: List[int] = []
+        rows: List[int] = []
+        tfs: List[int] = []
+        for text in texts:
+            counts = Counter(term_hash(t) for t in tokenize(text))
+            length = sum(counts.values())
+            self._lengths.append(length)
+            self.total_length += length
+            hashes.extend(counts.keys())
+            tfs.extend(counts.values())
+            rows.extend([self.count] * len(counts))
+            self.count += 1
+        if hashes:
+            block = np.empty((len(hashes), 3), dtype=np.uint32)
+            block[:, 0] = hashes
+            block[:, 1] = rows
+            block[:, 2] = np.minimum(tfs, 65535)
+            self._postings.write(block.tobytes())
+
+    def finish(self) -> dict:
+        """Writes the final index files and returns the metadata stored in the segment meta.json."""
+        self._postings.close()
+        tmp_path = os.path.join(self.path, POSTINGS_TMP_FILE)
+        postings = np.fromfile(tmp_path, dtype=np.uint32).reshape(-1, 3)
+        os.remove(tmp_path)
+
+        # Rows were appended in increasing order, so a stable sort by term keeps them sorted per term
+        order = np.argsort(postings[:, 0], kind="stable")
+        terms_sorted = postings[order, 0]
+        rows = postings[order, 1].astype(np.int64)
+        tfs = postings[order, 2].astype(np.uint16)
+        del postings, order
+
+        # First posting of every distinct term
+        starts = np.flatnonzero(np.diff(terms_sorted.astype(np.int64), prepend=-1) != 0)
+        terms = terms_sorted[starts]
+        offsets = np.append(starts, terms_sorted.size).astype(np.int64)
+
+        # Delta-encode doc ids within each term's postings list
+        gaps = np.diff(rows, prepend=0)
+        gaps[starts] = rows[starts]
+        gap_dtype = "uint16" if gaps.size == 0 or gaps.max() < 65536 else "uint32"
+
+        terms.astype(np.uint32).tofile(os.path.join(self.path, TERMS_FILE))
+        offsets.tofile(os.path.join(self.path, OFFSETS_FILE))
+        gaps.astype(gap_dtype).tofile(os.path.join(self.path, _gaps_file(gap_dtype)))
+        tfs.tofile(os.path.join(self.path, TFS_FILE))
+        np.frombuffer(self._lengths, dtype=np.uint32).tofile(os.path.join(self.path, LENGTHS_FILE))
+        return {
+            "terms": int(terms.size),
+            "postings": int(gaps.size),
+            "gap_dtype": gap_dtype,
+            "total_length": int(self.total_length),
+        }
+
+    def abort(self) -> None:
+        self._postings.close()
+
+
+class LexicalSegment:
+    """Memory-mapped read view of a segment's inverted index."""
+
+    def __init__(self, path: str, count: int, meta: dict):
+        self.count = count
+        self.total_length = meta["total_length"]
+        n_terms, n_postings = meta["terms"], meta["postings"]
+
+        def _map(filename, dtype, shape):
+            if shape[0] == 0:
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(os.path.join(path, filename), dtype=dtype, mode="r", shape=shape)
+
+        self.terms = _map(TERMS_FILE, np.uint32, (n_terms,))
+        self.offsets = _map(OFFSETS_FILE, np.int64, (n_terms + 1,))
+        self.gaps = _map(_gaps_file(meta["gap_dtype"]), np.dtype(meta["gap_dtype"]), (n_postings,))
+        self.tfs = _map(TFS_FILE, np.uint16, (n_postings,))
+        self.lengths = _map(LENGTHS_FILE, np.uint32, (count,))
+        self.norms: Optional[np.ndarray] = None
+
+    def prepare_norms(self, avg_length: float, k1: float, b: float) -> None:
+        """Precomputes k1 * (1 - b + b * dl / avgdl) for every document."""
+        self.norms = (k1 * (1.0 - b + b * self.lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    def lookup(self, hashes: np.ndarray) -> Dict[int, int]:
+        """Maps the query term hashes present in this segment to their term slot."""
+        slots = np.searchsorted(self.terms, hashes)
+        found = {}
+        for h, slot in zip(hashes, slots):
+            if slot < self.terms.size and self.terms[slot] == h:
+                found[int(h)] = int(slot)
+        return found
+
+    def document_frequency(self, slot: int) -> int:
+        return int(self.offsets[slot + 1] - self.offsets[slot])
+
+    def score(self, slots: Dict[int, int], idf: Dict[int, float], k1: float) -> np.ndarray:
+        """BM25 scores of every document in the segment (zeros for non-matching ones)."""
+        docs_parts, weight_parts = [], []
+        for h, slot in slots.items():
+            start, end = self.offsets[slot], self.offsets[slot + 1]
+            docs = np.cumsum(self.gaps[start:end], dtype=np.int64)
+            tf = self.tfs[start:end].astype(np.float32)
+            docs_parts.append(docs)
+            weight_parts.append(idf[h] * tf * (k1 + 1.0) / (tf + self.norms[docs]))
+        if not docs_parts:
+            return np.zeros(self.count, dtype=np.float32)
+        return np.bincount(
+            np.concatenate(docs_parts), weights=np.concatenate(weight_parts), minlength=self.count
+        ).astype(np.float32)
+
+
+def query_hashes(text: str) -> np.ndarray:
+    """Sorted unique term hashes of a query string."""
+    return np.unique(np.fromiter((term_hash(t) for t in tokenize(text)), dtype=np.uint32))
+
+
+def bm25_idf(total_docs: int, document_frequencies: Iterable[int]) -> List[float]:
+    """Okapi BM25 idf (the +1 variant, never negative)."""
+    return [float(np.log(1.0 + (total_docs - df + 0.5) / (df + 0.5))) for df in document_frequencies]
@@ -0,0 +1,288 @@
+# app/retrieval/quantization.py
+"""
+Compressed embedding codecs for the vector store.
+
+Two codecs are available, selected per chatbot (see codec_for_chatbot):
+
+- "int8": scalar quantization. Each dimension is mapped linearly onto 256
+  levels between its trained min and max: 1 byte per dimension (4x smaller).
+- "pq":   product quantization. The vector is split into PQ_SUBVECTORS
+  sub-vectors, each replaced by the id of its nearest of 256 trained
+  sub-centroids: 1 byte per sub-vector (dim * 4 / PQ_SUBVECTORS times smaller).
+
+Queries are never quantized (asymmetric distance computation): the query is
+turned into per-code lookups once, and codes are scored without decoding
+them. VectorStore.search can then re-rank a short candidate list against the
+full-precision vectors, which stay on disk and are only paged in for those rows.
+
+Codecs are trained by the ingestion task after a segment is committed
+(update_codec_index) and stored next to the IVF centroids:
+
+    chatbot_<id>/codec/<codec_id>.npz          # codec parameters
+    chatbot_<id>/segments/<sid>/codes-<codec_id>.u8   # (count, code_size) uint8 codes
+"""
+import logging
+import os
+import uuid
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.retrieval.ivf import _sample_vectors
+from app.retrieval.vector_store import (
+    MANIFEST_FILE,
+    VECTOR_DTYPE,
+    Segment,
+    _chatbot_lock,
+    _load_manifest,
+    _write_json_atomic,
+    chatbot_dir,
+    retire_files,
+    top_k,
+)
+
+logger = logging.getLogger(__name__)
+
+CODEC_TYPES = ("none", "int8", "pq")
+
+# Rows encoded per step, bounding temporary memory while encoding a segment
+_ENCODE_BATCH_ROWS = 8192
+# Rows scored per step, bounding the float32 temporaries of scoring codes
+_SCORE_BLOCK_ROWS = 8192
+
+
+def codec_for_chatbot(chatbot_id: int) -> str:
+    """Codec configured for a chatbot: its VECTOR_CODEC_OVERRIDES entry, else VECTOR_CODEC."""
+    codec = settings.VECTOR_CODEC_OVERRIDES.get(chatbot_id, settings.VECTOR_CODEC)
+    if codec not in CODEC_TYPES:
+        raise ValueError(f"Unknown vector codec: {codec}. Supported: {', '.join(CODEC_TYPES)}")
+    return codec
+
+
+def codec_path(directory: str, codec_id: str) -> str:
+    return os.path.join(directory, "codec", f"{codec_id}.npz")
+
+
+def codes_path(segment_path: str, codec_id: str) -> str:
+    return os.path.join(segment_path, f"codes-{codec_id}.u8")
+
+
+class ScalarQuantizer:
+    """Per-dimension linear int8 (stored as uint8) quantization."""
+
+    type = "int8"
+
+    def __init__(self, minimum: np.ndarray, scale: np.ndarray):
+        self.minimum = minimum.astype(VECTOR_DTYPE)
+        self.scale = scale.astype(VECTOR_DTYPE)
+        self.code_size = minimum.shape[0]
+
+    @classmethod
+    def train(cls, sample: np.ndarray) -> "ScalarQuantizer":
+        minimum = sample.min(axis=0)
+        scale = (sample.max(axis=0) - minimum) / 255.0
+        scale[scale == 0] = 1.0
+        return cls(minimum, scale)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((np.asarray(vectors, dtype=VECTOR_DTYPE) - self.minimum) / self.scale)
+        return np.clip(levels, 0, 255).astype(np.uint8)
+
+    def prepare(self, query: np.ndarray):
+        # q . (min + scale * code) = q . min + (q * scale) . code
+        return float(query @ self.minimum), (query * self.scale).astype(VECTOR_DTYPE)
+
+    def score(self, prepared, codes: np.ndarray) -> np.ndarray:
+        bias, weights = prepared
+        return codes.astype(VECTOR_DTYPE) @ weights + bias
+
+    def save(self, path: str) -> None:
+        np.savez(path, type=self.type, minimum=self.minimum, scale=self.scale)
+
+
+def _kmeans_l2(sample: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain (Euclidean) k-means used to train the PQ sub-codebooks."""
+    centroids = sample[rng.choice(sample.shape[0], size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest_l2(sample, centroids)
+        sizes = np.bincount(labels, minlength=k)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        non_empty = sizes > 0
+        sums = np.zeros_like(centroids)
+        sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+        centroids[non_empty] = sums[non_empty] / sizes[non_empty, None]
+        empty = np.flatnonzero(~non_empty)
+        if empty.size:
+            centroids[empty] = sample[rng.choice(sample.shape[0], size=empty.size, replace=False)]
+    return centroids
+
+
+def _nearest_l2(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin ||v - c||^2 = argmax (v . c - ||c||^2 / 2)
+    return np.argmax(vectors @ centroids.T - 0.5 * np.sum(centroids ** 2, axis=1), axis=1)
+
+
+class ProductQuantizer:
+    """Product quantization with 256 centroids (one byte) per sub-vector."""
+
+    type = "pq"
+
+    def __init__(self, codebooks: np.ndarray):
+        # codebooks: (n_subvectors, 256, sub_dim)
+        self.codebooks = codebooks.astype(VECTOR_DTYPE)
+        self.code_size, _, self.sub_dim = codebooks.shape
+
+    @classmethod
+    def train(cls, sample: np.ndarray, n_subvectors: int, iterations: int = 20, seed: int = 0) -> "ProductQuantizer":
+        dim = sample.shape[1]
+        if dim % n_subvectors:
+            raise ValueError(f"Embedding dimension {dim} is not divisible by {n_subvectors} sub-vectors")
+        if sample.shape[0] < 256:
+            raise ValueError("Product quantization needs at least 256 training vectors")
+        sub_dim = dim // n_subvectors
+        rng = np.random.default_rng(seed)
+        codebooks = np.stack([
+            _kmeans_l2(np.ascontiguousarray(sample[:, j * sub_dim:(j + 1) * sub_dim]), 256, iterations, rng)
+            for j in range(n_subvectors)
+        ])
+        return cls(codebooks)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=VECTOR_DTYPE)
+        codes = np.empty((vectors.shape[0], self.code_size), dtype=np.uint8)
+        for j in range(self.code_size):
+            sub = vectors[:, j * self.sub_dim:(j + 1) * self.sub_dim]
+            codes[:, j] = _nearest_l2(sub, self.codebooks[j])
+        return codes
+
+    def prepare(self, query: np.ndarray) -> np.ndarray:
+        # Lookup table: inner product of each query sub-vector with every sub-centroid
+        sub_queries = query.reshape(self.code_size, 1, self.sub_dim)
+        return np.sum(self.codebooks * sub_queries, axis=2)  # (n_subvectors, 256)
+
+    def score(self, lookup: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # Accumulated per sub-vector: one (n,) temporary instead of an (n, n_subvectors) gather
+        scores = np.zeros(codes.shape[0], dtype=VECTOR_DTYPE)
+        for j in range(self.code_size):
+            scores += lookup[j, codes[:, j]]
+        return scores
+
+    def save(self, path: str) -> None:
+        np.savez(path, type=self.type, codebooks=self.codebooks)
+
+
+def load_codec(path: str):
+    """Loads a codec saved with `save()`."""
+    with np.load(path) as data:
+        codec_type = str(data["type"])
+        if codec_type == ScalarQuantizer.type:
+            return ScalarQuantizer(data["minimum"], data["scale"])
+        if codec_type == ProductQuantizer.type:
+            return ProductQuantizer(data["codebooks"])
+    raise ValueError(f"Unknown codec type in {path}: {codec_type}")
+
+
+def score_top_k(codec, prepared, codes: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k (rows, scores) of `codes`, best first, restricted to `rows` when given.
+    Codes are scored in blocks of _SCORE_BLOCK_ROWS with a running top-k, so
+    temporary memory does not grow with the segment.
+    """
+    count = codes.shape[0] if rows is None else rows.shape[0]
+    best_rows = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0, dtype=VECTOR_DTYPE)
+    for start in range(0, count, _SCORE_BLOCK_ROWS):
+        stop = min(start + _SCORE_BLOCK_ROWS, count)
+        if rows is None:
+            block_rows = np.arange(start, stop)
+            scores = codec.score(prepared, codes[start:stop])
+        else:
+            block_rows = rows[start:stop]
+            scores = codec.score(prepared, codes[block_rows])
+        keep = top_k(scores, k)
+        # Earlier blocks first, so ties keep favouring lower rows
+        best_rows = np.concatenate((best_rows, block_rows[keep]))
+        best_scores = np.concatenate((best_scores, scores[keep]))
+        best = top_k(best_scores, k)
+        best_rows, best_scores = best_rows[best], best_scores[best]
+    return best_rows, best_scores
+
+
+def encode_segment(segment: Segment, codec_id: str, codec) -> None:
+    """Writes the codes of every row of a segment, encoding in bounded batches."""
+    path = codes_path(segment.path, codec_id)
+    with open(f"{path}.tmp", "wb") as f:
+        for start in range(0, segment.count, _ENCODE_BATCH_ROWS):
+            f.write(codec.encode(segment.vectors[start:start + _ENCODE_BATCH_ROWS]).tobytes())
+    os.replace(f"{path}.tmp", path)
+
+
+def update_codec_index(chatbot_id: int, root: Optional[str] = None) -> Optional[str]:
+    """
+    Trains the chatbot's configured codec if needed and encodes segments without codes.
+    Mirrors update_ivf_index: retraining happens when the codec type changed or
+    the chatbot grew by settings.IVF_RETRAIN_FACTOR since training.
+
+    :return: The current codec id, or None when vectors are stored uncompressed.
+    """
+    directory = chatbot_dir(chatbot_id, root)
+    wanted = codec_for_chatbot(chatbot_id)
+    with _chatbot_lock(directory):
+        manifest = _load_manifest(directory)
+        old_codec = manifest.get("codec")
+        entries = manifest["segments"]
+        total = sum(entry["count"] for entry in entries)
+
+        if wanted == "none" or total < settings.QUANTIZATION_MIN_VECTORS:
+            if old_codec is not None and wanted == "none":
+                manifest["codec"] = None
+                manifest["version"] += 1
+                _retire_codec(directory, manifest, old_codec, entries)
+                _write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest)
+            return None
+
+        segments = {entry["id"]: Segment(os.path.join(directory, "segments", entry["id"])) for entry in entries}
+        retrain = (
+            old_codec is None
+            or old_codec["type"] != wanted
+            or total >= old_codec["trained_count"] * settings.IVF_RETRAIN_FACTOR
+        )
+        if retrain:
+            sample = _sample_vectors([s for s in segments.values() if s.count], settings.IVF_TRAIN_SAMPLE)
+            if wanted == "int8":
+                codec = ScalarQuantizer.train(sample)
+            else:
+                codec = ProductQuantizer.train(sample, settings.PQ_SUBVECTORS)
+            codec_info = {"id": uuid.uuid4().hex[:12], "type": wanted, "trained_count": total}
+            path = codec_path(directory, codec_info["id"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            codec.save(path)
+            logger.info(f"Trained {wanted} codec for chatbot {chatbot_id} on {sample.shape[0]} vectors")
+        else:
+            codec_info = old_codec
+            codec = load_codec(codec_path(directory, codec_info["id"]))
+
+        encoded = 0
+        for entry in entries:
+            if entry.get("codec") != codec_info["id"]:
+                encode_segment(segments[entry["id"]], codec_info["id"], codec)
+                entry["codec"] = codec_info["id"]
+                encoded += 1
+
+        if encoded or retrain:
+            manifest["codec"] = codec_info
+            manifest["version"] += 1
+            if retrain and old_codec is not None:
+                _retire_codec(directory, manifest, old_codec, entries)
+            _write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest)
+            logger.info(f"Encoded {encoded} segment(s) of chatbot {chatbot_id} with {wanted}")
+    return codec_info["id"]
+
+
+def _retire_codec(directory: str, manifest: dict, old_codec: dict, entries: list) -> None:
+    """Retires a replaced codec and its codes (deleted after the grace period: open stores may still map them)."""
+    paths = [codec_path(directory, old_codec["id"])]
+    paths.extend(codes_path(os.path.join(directory, "segments", entry["id"]), old_codec["id"]) for entry in entries)
+    retire_files(manifest, (os.path.relpath(path, directory) for path in paths))
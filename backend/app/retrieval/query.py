@@ -0,0 +1,156 @@
+# app/retrieval/query.py
+"""
+Query execution for the chatbot query endpoint, with bounded LRU caches.
+
+Two size-aware caches live in each API process:
+
+- query embeddings, keyed by (embedding model id, normalized query text).
+  They do not depend on a chatbot's data, so repeated questions are never
+  re-embedded, whichever chatbot they are asked to.
+- results, keyed by (chatbot id, query, k, mode) and tagged with the index
+  version they were computed from.
+
+The worker publishes a new manifest version before it flips a DataSource to
+COMPLETED, so the first query after that sees a newer version and drops all
+cached results of that chatbot (invalidate_chatbot can also be called
+directly).
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.ingestion.embeddings import get_embedding_backend
+from app.retrieval import hybrid
+from app.retrieval.vector_store import SearchHit, VectorStoreError, get_vector_store
+
+# Rough per-entry bookkeeping cost (key, OrderedDict node, small objects)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class SizedLRUCache:
+    """Thread-safe LRU cache bounded by the estimated byte size of its values."""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int]):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return  # Never let one huge value flush the whole cache
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes every entry whose key matches `predicate`; returns how many were removed."""
+        with self._lock:
+            doomed = [key for key in self._entries if predicate(key)]
+            for key in doomed:
+                self.current_bytes -= self._entries.pop(key)[1]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _hits_size(hits: List[SearchHit]) -> int:
+    return sum(len(hit.text) + 64 for hit in hits)
+
+
+embedding_cache = SizedLRUCache(settings.QUERY_EMBEDDING_CACHE_BYTES, sizeof=lambda v: v.nbytes)
+result_cache = SizedLRUCache(settings.QUERY_RESULT_CACHE_BYTES, sizeof=lambda v: _hits_size(v[1]))
+
+# Index version the cached results of each chatbot were computed from
+_result_versions: Dict[int, int] = {}
+_versions_lock = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """Collapses whitespace so trivially different spellings share cache entries."""
+    return " ".join(text.split())
+
+
+def invalidate_chatbot(chatbot_id: int) -> int:
+    """Drops all cached results of a chatbot (query embeddings stay valid)."""
+    with _versions_lock:
+        _result_versions.pop(chatbot_id, None)
+    return result_cache.discard_where(lambda key: key[0] == chatbot_id)
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embeds a normalized query, reusing a cached embedding when possible."""
+    backend = get_embedding_backend()
+    key = (backend.model_id, text)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        vector = backend.embed_query(text)
+        embedding_cache.put(key, vector)
+    return vector
+
+
+def run_query(chatbot_id: int, text: str, k: int, mode: Optional[str] = None) -> Tuple[List[SearchHit], bool]:
+    """
+    Returns the top-k hits for a query against a chatbot's index.
+    Blocking (NumPy + mmap reads): call it from a worker thread in async code.
+
+    :return: (hits, served_from_cache)
+    """
+    text = normalize_query(text)
+    mode = mode or settings.RETRIEVAL_MODE
+    store = get_vector_store(chatbot_id)
+
+    with _versions_lock:
+        stale = _result_versions.get(chatbot_id) != store.version
+        if stale:
+            _result_versions[chatbot_id] = store.version
+    if stale:
+        result_cache.discard_where(lambda key: key[0] == chatbot_id)
+
+    key = (chatbot_id, text, k, mode)
+    cached = result_cache.get(key)
+    if cached is not None and cached[0] == store.version:
+        return cached[1], True
+
+    backend = get_embedding_backend()
+    if store.model_id is not None and store.model_id != backend.model_id:
+        raise VectorStoreError(
+            f"Chatbot {chatbot_id} was indexed with {store.model_id}, queries use {backend.model_id}"
+        )
+    if not store.count:
+        hits = []
+    else:
+        # Pure keyword queries do not need an embedding at all
+        vector = embed_query(text) if mode != "bm25" else None
+        hits = hybrid.search(store, text, vector, k=k, mode=mode)
+    result_cache.put(key, (store.version, hits))
+    return hits, False
@@ -0,0 +1,725 @@
+# app/retrieval/vector_store.py
+"""
+Persistent per-chatbot vector store built from memory-mapped segments.
+
+On-disk layout (under settings.VECTOR_STORE_DIR, shared by the API server
+and the Celery workers):
+
+    chatbot_<id>/
+        manifest.json            # list of live segments (and retired files), replaced atomically
+        .lock                    # flock()ed by writers while editing the manifest
+        ivf/<ivf_id>.centroids.f32   # (n_lists, dim) IVF centroids (see app.retrieval.ivf)
+        segments/<segment_id>/   # immutable segment(s) of a processed data source (one per shard)
+            meta.json            # count, dim, model id, data source id
+            vectors.f32          # (count, dim) float32, row-major, no header
+            texts.bin            # chunk texts, utf-8, concatenated
+            text_offsets.i64     # (count + 1,) byte offsets into texts.bin
+            chunk_ids.i64        # (count,) chunk index within the data source
+            ivf-<ivf_id>.order.i64    # row ids grouped by IVF list
+            ivf-<ivf_id>.offsets.i64  # (n_lists + 1,) start of each list in the order file
+            codes-<codec_id>.u8       # quantized vectors (see app.retrieval.quantization)
+            lex_*                     # BM25 inverted index (see app.retrieval.lexical)
+
+Segments are written incrementally (batch by batch) into a temporary
+directory, renamed into place, and only then published in the manifest, so
+readers never see partial data. Readers np.memmap() the raw arrays: opening
+a chatbot's index reads two small JSON files per segment and maps the rest
+without copying it into the heap.
+
+Arrays are mapped lazily, so a query may open files of the manifest it
+started with after a newer manifest has replaced them. Files dropped from the
+manifest are therefore not deleted right away but listed as "retired" and
+deleted once settings.VECTOR_STORE_RETIRED_GRACE_SECONDS have passed, by the
+next manifest edit or the periodic sweep (sweep_retired_files).
+
+Large chatbots additionally get an IVF (inverted file) index whose files
+are added next to the segments; the manifest records which segments have
+inverted lists for the current centroids, and search falls back to exact
+scoring for everything else. Likewise, chatbots configured with an int8 or
+PQ codec are scored on compressed codes where available.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.retrieval.lexical import LexicalIndexWriter, LexicalSegment, bm25_idf, query_hashes
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+SEGMENT_META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+TEXTS_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "text_offsets.i64"
+CHUNK_IDS_FILE = "chunk_ids.i64"
+
+VECTOR_DTYPE = np.float32
+
+
+class VectorStoreError(Exception):
+    """Raised for inconsistent or incompatible vector store data."""
+
+
+@dataclass
+class SearchHit:
+    """A single retrieval result."""
+    score: float
+    data_source_id: int
+    chunk_index: int
+    text: str
+
+
+# --- Paths, atomic writes and locking ---
+
+def chatbot_dir(chatbot_id: int, root: Optional[str] = None) -> str:
+    """Directory holding the index of one chatbot."""
+    return os.path.join(root or settings.VECTOR_STORE_DIR, f"chatbot_{int(chatbot_id)}")
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    """Writes JSON to a temp file and renames it over `path` so readers never see a partial file."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextmanager
+def _chatbot_lock(directory: str) -> Iterator[None]:
+    """Exclusive advisory lock serializing manifest edits across processes."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _load_manifest(directory: str) -> dict:
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"version": 0, "model_id": None, "dim": None, "ivf": None, "codec": None, "segments": [], "retired": []}
+    manifest = _read_json(path)
+    manifest.setdefault("ivf", None)
+    manifest.setdefault("codec", None)
+    manifest.setdefault("retired", [])
+    return manifest
+
+
+def retire_files(manifest: dict, paths: Iterable[str]) -> None:
+    """
+    Schedules files or segment directories the manifest no longer references
+    for deletion after the grace period (see sweep_retired_files). Call under
+    the chatbot lock, before writing the manifest.
+
+    :param paths: Paths relative to the chatbot directory.
+    """
+    now = time.time()
+    manifest["retired"].extend({"path": path, "retired_at": now} for path in paths)
+
+
+def _delete_retired(directory: str, manifest: dict, grace_seconds: float) -> int:
+    """Deletes the retired files older than the grace period; returns how many were deleted."""
+    cutoff = time.time() - grace_seconds
+    kept = []
+    for entry in manifest["retired"]:
+        if entry["retired_at"] > cutoff:
+            kept.append(entry)
+            continue
+        path = os.path.join(directory, entry["path"])
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    deleted = len(manifest["retired"]) - len(kept)
+    manifest["retired"] = kept
+    return deleted
+
+
+def sweep_retired_files(root: Optional[str] = None, grace_seconds: Optional[float] = None) -> int:
+    """
+    Deletes the retired files of all chatbots once their grace period is over
+    (periodic task). Returns the number of files / segments deleted.
+    """
+    root = root or settings.VECTOR_STORE_DIR
+    if grace_seconds is None:
+        grace_seconds = settings.VECTOR_STORE_RETIRED_GRACE_SECONDS
+    if not os.path.isdir(root):
+        return 0
+    deleted = 0
+    for name in os.listdir(root):
+        directory = os.path.join(root, name)
+        if not name.startswith("chatbot_") or not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            continue
+        with _chatbot_lock(directory):
+            manifest = _load_manifest(directory)
+            swept = _delete_retired(directory, manifest, grace_seconds)
+            if swept:
+                _write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest)
+        deleted += swept
+    return deleted
+
+
+def ivf_centroids_path(directory: str, ivf_id: str) -> str:
+    return os.path.join(directory, "ivf", f"{ivf_id}.centroids.f32")
+
+
+def ivf_list_paths(segment_path: str, ivf_id: str) -> Tuple[str, str]:
+    """Paths of a segment's (order, offsets) inverted list files for the given centroids."""
+    return (
+        os.path.join(segment_path, f"ivf-{ivf_id}.order.i64"),
+        os.path.join(segment_path, f"ivf-{ivf_id}.offsets.i64"),
+    )
+
+
+# --- Writing ---
+
+class SegmentWriter:
+    """
+    Streams the chunks and embeddings of one data source into a new segment.
+
+    Usage:
+        writer = SegmentWriter(chatbot_id, data_source_id, model_id, dim)
+        for batch ...: writer.append(vectors, chunks)
+        writer.commit()   # or writer.abort() on failure
+    """
+
+    def __init__(
+        self,
+        chatbot_id: int,
+        data_source_id: int,
+        model_id: str,
+        dim: int,
+        root: Optional[str] = None,
+    ):
+        self.chatbot_id = chatbot_id
+        self.data_source_id = data_source_id
+        self.model_id = model_id
+        self.dim = dim
+        self.count = 0
+        self.segment_id = f"{data_source_id}-{uuid.uuid4().hex[:12]}"
+        self._root = root
+        self._chatbot_dir = chatbot_dir(chatbot_id, root)
+        self._segments_dir = os.path.join(self._chatbot_dir, "segments")
+        # Written under a hidden temp name; renamed into place on commit
+        self.path = os.path.join(self._segments_dir, f".tmp-{self.segment_id}")
+        os.makedirs(self.path)
+
+        self._text_bytes = 0
+        self._vectors = open(os.path.join(self.path, VECTORS_FILE), "wb")
+        self._texts = open(os.path.join(self.path, TEXTS_FILE), "wb")
+        self._offsets = open(os.path.join(self.path, TEXT_OFFSETS_FILE), "wb")
+        self._chunk_ids = open(os.path.join(self.path, CHUNK_IDS_FILE), "wb")
+        self._offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+        # BM25 postings are collected from the same batches, so the file is read once
+        self._lexical = LexicalIndexWriter(self.path)
+        self._closed = False
+
+    def append(self, vectors: np.ndarray, chunks: Sequence) -> None:
+        """
+        Appends a batch of embedded chunks.
+
+        :param vectors: Array of shape (len(chunks), dim).
+        :param chunks: TextChunk-like objects with `index` and `text` attributes.
+        """
+        if vectors.shape != (len(chunks), self.dim):
+            raise VectorStoreError(f"Expected vectors of shape {(len(chunks), self.dim)}, got {vectors.shape}")
+        encoded = [chunk.text.encode("utf-8") for chunk in chunks]
+        ends = self._text_bytes + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+
+        self._vectors.write(np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE).tobytes())
+        self._texts.write(b"".join(encoded))
+        self._offsets.write(ends.tobytes())
+        self._chunk_ids.write(np.fromiter((c.index for c in chunks), dtype=np.int64, count=len(chunks)).tobytes())
+        self._lexical.add([chunk.text for chunk in chunks])
+
+        self._text_bytes = int(ends[-1]) if len(encoded) else self._text_bytes
+        self.count += len(chunks)
+
+    def _close_files(self) -> None:
+        if self._closed:
+            return
+        for f in (self._vectors, self._texts, self._offsets, self._chunk_ids):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self._closed = True
+
+    def seal(self) -> str:
+        """
+        Finishes the segment files and moves the segment into place without
+        publishing it. Used by ingestion shards, whose segments are published
+        together once every shard is done (see publish_segments).
+
+        :return: The segment id.
+        """
+        self._close_files()
+        lexical_meta = self._lexical.finish()
+        _write_json_atomic(os.path.join(self.path, SEGMENT_META_FILE), {
+            "segment_id": self.segment_id,
+            "data_source_id": self.data_source_id,
+            "count": self.count,
+            "dim": self.dim,
+            "model_id": self.model_id,
+            "lexical": lexical_meta,
+        })
+        final_path = os.path.join(self._segments_dir, self.segment_id)
+        os.rename(self.path, final_path)
+        self.path = final_path
+        return self.segment_id
+
+    def commit(self) -> str:
+        """
+        Publishes the segment. Earlier segments of the same data source are
+        replaced, so re-processing a data source does not duplicate its chunks.
+
+        :return: The segment id.
+        """
+        self.seal()
+        publish_segments(
+            self.chatbot_id, self.data_source_id, [(self.segment_id, self.count)],
+            model_id=self.model_id, dim=self.dim, root=self._root,
+        )
+        return self.segment_id
+
+    def abort(self) -> None:
+        """Discards the partially written segment."""
+        try:
+            self._close_files()
+            self._lexical.abort()
+        finally:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def publish_segments(
+    chatbot_id: int,
+    data_source_id: int,
+    segments: Sequence[Tuple[str, int]],
+    model_id: str,
+    dim: int,
+    root: Optional[str] = None,
+) -> None:
+    """
+    Atomically makes sealed segments the live data of a data source,
+    replacing its earlier segments.
+
+    :param segments: (segment id, chunk count) pairs.
+    """
+    directory = chatbot_dir(chatbot_id, root)
+    with _chatbot_lock(directory):
+        manifest = _load_manifest(directory)
+        if manifest["model_id"] not in (None, model_id) and manifest["segments"]:
+            raise VectorStoreError(
+                f"Chatbot {chatbot_id} index uses model {manifest['model_id']}, not {model_id}"
+            )
+        replaced = [s for s in manifest["segments"] if s["data_source_id"] == data_source_id]
+        manifest["segments"] = [s for s in manifest["segments"] if s["data_source_id"] != data_source_id]
+        for segment_id, count in segments:
+            manifest["segments"].append({"id": segment_id, "data_source_id": data_source_id, "count": count})
+        manifest["model_id"] = model_id
+        manifest["dim"] = dim
+        manifest["version"] += 1
+        # Queries holding the previous manifest may still open the replaced
+        # segments' files (they are mapped lazily): delete them later
+        _delete_retired(directory, manifest, settings.VECTOR_STORE_RETIRED_GRACE_SECONDS)
+        retire_files(manifest, (os.path.join("segments", segment["id"]) for segment in replaced))
+        _write_json_atomic(os.path.join(directory, MANIFEST_FILE), manifest)
+
+    total = sum(count for _, count in segments)
+    logger.info(
+        f"Published {len(segments)} segment(s) ({total} chunks) of data source {data_source_id} for chatbot {chatbot_id}"
+    )
+
+
+def offset_segment_chunk_ids(chatbot_id: int, segment_id: str, offset: int, root: Optional[str] = None) -> None:
+    """Shifts the chunk indexes of a sealed, not yet published segment (shard merge)."""
+    path = os.path.join(chatbot_dir(chatbot_id, root), "segments", segment_id, CHUNK_IDS_FILE)
+    chunk_ids = np.fromfile(path, dtype=np.int64)
+    (chunk_ids + offset).tofile(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def discard_unpublished_segments(chatbot_id: int, data_source_id: int, root: Optional[str] = None) -> int:
+    """Removes sealed or partial segments of a data source that are not in the manifest (failed shards)."""
+    directory = chatbot_dir(chatbot_id, root)
+    segments_dir = os.path.join(directory, "segments")
+    if not os.path.isdir(segments_dir):
+        return 0
+    removed = 0
+    with _chatbot_lock(directory):
+        manifest = _load_manifest(directory)
+        # Retired segments are deleted by the sweep, after their grace period
+        live = {s["id"] for s in manifest["segments"]}
+        live.update(os.path.basename(entry["path"]) for entry in manifest["retired"])
+        for name in os.listdir(segments_dir):
+            segment_id = name[len(".tmp-"):] if name.startswith(".tmp-") else name
+            if segment_id.startswith(f"{data_source_id}-") and segment_id not in live:
+                shutil.rmtree(os.path.join(segments_dir, name), ignore_errors=True)
+                removed += 1
+    return removed
+
+
+def delete_chatbot_index(chatbot_id: int, root: Optional[str] = None) -> None:
+    """Removes all index data of a chatbot (e.g. after the chatbot is deleted)."""
+    shutil.rmtree(chatbot_dir(chatbot_id, root), ignore_errors=True)
+
+
+# --- Reading ---
+
+class Segment:
+    """Read-only, memory-mapped view of one segment."""
+
+    def __init__(self, path: str, ivf_id: Optional[str] = None, codec_id: Optional[str] = None):
+        self.path = path
+        # Id of the centroids this segment has inverted lists for (None: exact search only)
+        self.ivf_id = ivf_id
+        # Id of the codec this segment has codes for (None: full-precision scoring only)
+        self.codec_id = codec_id
+        meta = _read_json(os.path.join(path, SEGMENT_META_FILE))
+        self.segment_id: str = meta["segment_id"]
+        self.data_source_id: int = meta["data_source_id"]
+        self.count: int = meta["count"]
+        self.dim: int = meta["dim"]
+        self.model_id: str = meta["model_id"]
+        self._lexical_meta: Optional[dict] = meta.get("lexical")
+        self._lexical: Optional[LexicalSegment] = None
+        self._texts: Optional[np.memmap] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._chunk_ids: Optional[np.ndarray] = None
+        self._ivf_lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._codes: Optional[np.ndarray] = None
+
+    def _map(self, filename: str, dtype, shape) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, filename), dtype=dtype, mode="r", shape=shape)
+
+    # Arrays are mapped on first access so opening an index touches only meta.json
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            self._vectors = self._map(VECTORS_FILE, VECTOR_DTYPE, (self.count, self.dim))
+        return self._vectors
+
+    @property
+    def chunk_ids(self) -> np.ndarray:
+        if self._chunk_ids is None:
+            self._chunk_ids = self._map(CHUNK_IDS_FILE, np.int64, (self.count,))
+        return self._chunk_ids
+
+    def _text_offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._offsets = np.memmap(
+                os.path.join(self.path, TEXT_OFFSETS_FILE), dtype=np.int64, mode="r", shape=(self.count + 1,)
+            )
+        return self._offsets
+
+    def text(self, row: int) -> str:
+        """Returns the chunk text stored at `row`."""
+        offsets = self._text_offsets()
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        if start == end:
+            return ""
+        if self._texts is None:
+            self._texts = np.memmap(os.path.join(self.path, TEXTS_FILE), dtype=np.uint8, mode="r")
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def ivf_lists(self, n_lists: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-mapped (order, offsets) arrays of this segment's IVF lists."""
+        if self._ivf_lists is None:
+            order_path, offsets_path = ivf_list_paths(self.path, self.ivf_id)
+            offsets = np.memmap(offsets_path, dtype=np.int64, mode="r", shape=(n_lists + 1,))
+            order = self._map(os.path.basename(order_path), np.int64, (self.count,))
+            self._ivf_lists = (order, offsets)
+        return self._ivf_lists
+
+    @property
+    def lexical(self) -> Optional[LexicalSegment]:
+        """BM25 index of the segment (None for segments written without one)."""
+        if self._lexical is None and self._lexical_meta is not None:
+            self._lexical = LexicalSegment(self.path, self.count, self._lexical_meta)
+        return self._lexical
+
+    def codes(self, code_size: int) -> np.ndarray:
+        """Memory-mapped (count, code_size) uint8 codes of this segment."""
+        if self._codes is None:
+            self._codes = self._map(f"codes-{self.codec_id}.u8", np.uint8, (self.count, code_size))
+        return self._codes
+
+    def probe_rows(self, lists: np.ndarray, n_lists: int) -> np.ndarray:
+        """Sorted row ids stored in the given IVF lists."""
+        order, offsets = self.ivf_lists(n_lists)
+        parts = [order[offsets[l]:offsets[l + 1]] for l in lists]
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        # Ascending rows turn the gather below into a forward scan of the mapping
+        rows.sort()
+        return rows
+
+    def hit(self, row: int, score: float) -> SearchHit:
+        return SearchHit(
+            score=float(score),
+            data_source_id=self.data_source_id,
+            chunk_index=int(self.chunk_ids[row]),
+            text=self.text(row),
+        )
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first (argpartition + sort of k items only)."""
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorStore:
+    """Read-only view of a chatbot's index, as described by one manifest version."""
+
+    def __init__(self, chatbot_id: int, root: Optional[str] = None):
+        self.chatbot_id = chatbot_id
+        self.directory = chatbot_dir(chatbot_id, root)
+        manifest = _load_manifest(self.directory)
+        self.version: int = manifest["version"]
+        self.model_id: Optional[str] = manifest["model_id"]
+        self.dim: Optional[int] = manifest["dim"]
+        self.ivf: Optional[dict] = manifest["ivf"]
+        self.codec_info: Optional[dict] = manifest["codec"]
+        ivf_id = self.ivf["id"] if self.ivf else None
+        codec_id = self.codec_info["id"] if self.codec_info else None
+        self.segments: List[Segment] = [
+            Segment(
+                os.path.join(self.directory, "segments", s["id"]),
+                ivf_id=ivf_id if s.get("ivf") == ivf_id else None,
+                codec_id=codec_id if s.get("codec") == codec_id else None,
+            )
+            for s in manifest["segments"]
+        ]
+        self._centroids: Optional[np.ndarray] = None
+        self._codec = None
+        self._lexical_ready = False
+
+    @property
+    def count(self) -> int:
+        return sum(segment.count for segment in self.segments)
+
+    def _check_query(self, query: np.ndarray) -> np.ndarray:
+        query = np.asarray(query, dtype=VECTOR_DTYPE).reshape(-1)
+        if self.dim is not None and query.shape[0] != self.dim:
+            raise VectorStoreError(f"Query has dimension {query.shape[0]}, index has {self.dim}")
+        return query
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        if self.ivf is None:
+            return None
+        if self._centroids is None:
+            self._centroids = np.memmap(
+                ivf_centroids_path(self.directory, self.ivf["id"]),
+                dtype=VECTOR_DTYPE, mode="r", shape=(self.ivf["n_lists"], self.dim),
+            )
+        return self._centroids
+
+    @property
+    def codec(self):
+        if self.codec_info is None:
+            return None
+        if self._codec is None:
+            # Imported lazily: quantization depends on this module
+            from app.retrieval.quantization import codec_path, load_codec
+            self._codec = load_codec(codec_path(self.directory, self.codec_info["id"]))
+        return self._codec
+
+    def _score_segment(
+        self, segment: Segment, query: np.ndarray, rows: Optional[np.ndarray], k: int,
+        prepared, rerank_factor: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (rows, scores) of one segment, restricted to `rows` when given."""
+        if prepared is not None and segment.codec_id is not None:
+            # Imported lazily: quantization depends on this module
+            from app.retrieval.quantization import score_top_k
+            candidates, scores = score_top_k(
+                self.codec, prepared, segment.codes(self.codec.code_size),
+                k * rerank_factor if rerank_factor > 0 else k, rows,
+            )
+            if rerank_factor <= 0:
+                return candidates, scores
+            # Re-rank the short list against the full-precision vectors on disk
+            candidates = np.sort(candidates)
+            exact_scores = segment.vectors[candidates] @ query
+            best = top_k(exact_scores, k)
+            return candidates[best], exact_scores[best]
+
+        if rows is None:
+            scores = segment.vectors @ query
+            best = top_k(scores, k)
+            return best, scores[best]
+        scores = segment.vectors[rows] @ query
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+    def search(
+        self, query: np.ndarray, k: int = 5, nprobe: Optional[int] = None, exact: bool = False,
+        rerank_factor: Optional[int] = None,
+    ) -> List[SearchHit]:
+        """
+        Inner-product search over all segments. Vectors are L2-normalized, so
+        the score is the cosine similarity.
+
+        Segments with IVF lists only score the rows in the `nprobe` lists whose
+        centroids are closest to the query (more lists: better recall, slower).
+        Small chatbots (below settings.IVF_MIN_VECTORS) and segments without
+        lists are scored exhaustively. Segments with codes are scored with the
+        chatbot's codec and optionally re-ranked at full precision.
+
+        :param query: Query vector of shape (dim,).
+        :param k: Number of hits to return.
+        :param nprobe: IVF lists to probe (defaults to settings.IVF_NPROBE).
+        :param exact: Force brute-force, full-precision scoring even when an IVF index or codec exists.
+        :param rerank_factor: With a codec, re-rank k * rerank_factor code-scored candidates
+                              against full-precision vectors (defaults to
+                              settings.QUANTIZATION_RERANK_FACTOR; 0 returns code scores).
+        """
+        query = self._check_query(query)
+        probed_lists = None
+        if not exact and self.ivf is not None and self.count >= settings.IVF_MIN_VECTORS:
+            nprobe = nprobe or settings.IVF_NPROBE
+            probed_lists = top_k(self.centroids @ query, nprobe)
+
+        prepared = None
+        if not exact and self.codec is not None:
+            prepared = self.codec.prepare(query)
+        if rerank_factor is None:
+            rerank_factor = settings.QUANTIZATION_RERANK_FACTOR
+
+        candidates: List[Tuple[float, Segment, int]] = []
+        for segment in self.segments:
+            if segment.count == 0:
+                continue
+            rows = None
+            if probed_lists is not None and segment.ivf_id is not None:
+                rows = segment.probe_rows(probed_lists, self.ivf["n_lists"])
+            rows, scores = self._score_segment(segment, query, rows, k, prepared, rerank_factor)
+            candidates.extend((float(score), segment, int(row)) for score, row in zip(scores, rows))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [segment.hit(row, score) for score, segment, row in candidates[:k]]
+
+    def _lexical_segments(self) -> List[Segment]:
+        segments = [s for s in self.segments if s.count and s.lexical is not None]
+        if not self._lexical_ready:
+            # Length norms use the chatbot-wide average and are computed once per opened store
+            documents = sum(s.count for s in segments)
+            avg_length = sum(s.lexical.total_length for s in segments) / documents if documents else 0.0
+            for segment in segments:
+                segment.lexical.prepare_norms(avg_length, settings.BM25_K1, settings.BM25_B)
+            self._lexical_ready = True
+        return segments
+
+    def lexical_search(self, query_text: str, k: int = 5) -> List[SearchHit]:
+        """
+        BM25 keyword search over all segments. Good at exact identifiers
+        (part numbers, error codes) that embeddings tend to blur.
+        """
+        hashes = query_hashes(query_text)
+        segments = self._lexical_segments()
+        if hashes.size == 0 or not segments:
+            return []
+
+        # Collection statistics are summed over segments so scores are comparable
+        slots = [segment.lexical.lookup(hashes) for segment in segments]
+        frequencies: Dict[int, int] = {}
+        for segment, found in zip(segments, slots):
+            for h, slot in found.items():
+                frequencies[h] = frequencies.get(h, 0) + segment.lexical.document_frequency(slot)
+        total_docs = sum(segment.count for segment in segments)
+        idf = dict(zip(frequencies.keys(), bm25_idf(total_docs, frequencies.values())))
+
+        candidates: List[Tuple[float, Segment, int]] = []
+        for segment, found in zip(segments, slots):
+            if not found:
+                continue
+            scores = segment.lexical.score(found, idf, settings.BM25_K1)
+            for row in top_k(scores, k):
+                if scores[row] > 0:
+                    candidates.append((float(scores[row]), segment, int(row)))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [segment.hit(row, score) for score, segment, row in candidates[:k]]
+
+
+# --- Process-wide cache of opened stores ---
+# Keyed by chatbot id; an entry is reused while the manifest file is unchanged
+# (manifests are replaced by rename, so a new one has a new inode), so a warm
+# lookup costs a single stat() call.
+#
+# The cache holds the only long-lived reference to a store: once an entry is
+# replaced or evicted, the store and its memory maps are freed as soon as the
+# queries still using it finish. Entries are bounded (LRU, at most
+# VECTOR_STORE_OPEN_CACHE_SIZE) and also dropped after half the retirement grace
+# period without use, so an idle store never keeps mapping files of retired
+# segments after sweep_retired_files has deleted them (the disk space of a
+# deleted file is only released once nothing maps it).
+_open_stores: "OrderedDict[int, Tuple[Tuple[int, int], float, VectorStore]]" = OrderedDict()
+_open_stores_lock = threading.Lock()
+
+
+def _prune_open_stores(now: float) -> None:
+    # Under _open_stores_lock; least recently used entries come first
+    max_idle = settings.VECTOR_STORE_RETIRED_GRACE_SECONDS / 2
+    while _open_stores:
+        chatbot_id, (_, last_used, _) = next(iter(_open_stores.items()))
+        if len(_open_stores) <= settings.VECTOR_STORE_OPEN_CACHE_SIZE and now - last_used <= max_idle:
+            break
+        del _open_stores[chatbot_id]
+
+
+def get_vector_store(chatbot_id: int) -> VectorStore:
+    """Returns the (cached) read-only store of a chatbot, reopening it if the manifest changed."""
+    manifest_path = os.path.join(chatbot_dir(chatbot_id), MANIFEST_FILE)
+    try:
+        stat = os.stat(manifest_path)
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+    except FileNotFoundError:
+        stamp = (0, 0)
+    now = time.monotonic()
+    with _open_stores_lock:
+        cached = _open_stores.get(chatbot_id)
+        if cached and cached[0] == stamp:
+            _open_stores[chatbot_id] = (stamp, now, cached[2])
+            _open_stores.move_to_end(chatbot_id)
+            _prune_open_stores(now)
+            return cached[2]
+        # Drop the stale store now rather than after opening the new one
+        _open_stores.pop(chatbot_id, None)
+    # Opened outside the lock (reads JSON files); concurrent openers of the
+    # same chatbot may both open it, the last one is kept
+    store = VectorStore(chatbot_id)
+    with _open_stores_lock:
+        _open_stores[chatbot_id] = (stamp, now, store)
+        _open_stores.move_to_end(chatbot_id)
+        _prune_open_stores(now)
+    return store
@@ -5,14 +5,31 @@
 
 from .token import Token, TokenPayload # Import Token and TokenPayload from token.py
 from .user import UserBase, UserCreate, UserRead # Import user schemas
-from .chatbot import ChatbotBase, ChatbotCreate, ChatbotUpdate, ChatbotRead, ChatbotStatus # Import chatbot schemas
+from .chatbot import ( # Import chatbot schemas
+    ChatbotBase,
+    ChatbotCreate,
+    ChatbotUpdate,
+    ChatbotRead,
+    ChatbotStatus,
+    ChatbotBulkUpdate,
+    ChatbotBulkRequest,
+    ChatbotBulkResult,
+    ChatbotBulkResponse,
+)
 from .data_source import ( # Import data source schemas
     DataSourceBase,
     DataSourceCreate,
     DataSourceRead,
+    DataSourcePage,
     DataSourceType,
     ProcessingStatus,
     FileUploadResponse,
+    UploadByHashRequest,
+    StageProgress,
+    IngestionProgress,
+    DataSourceProgressRead,
 )
+from .query import QueryRequest, QueryHit, QueryResponse # Import query schemas
+from .upload import UploadSessionCreate, UploadSessionRead, UploadPartRead, UploadComplete # Import upload schemas
 
 # Add any other schema imports here as needed
\ No newline at end of file
@@ -3,7 +3,7 @@ from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from .user import UserRead
 
-from typing import Optional # Optional might be needed for update schemas later
+from typing import List, Literal, Optional # Optional might be needed for update schemas later
 import enum
 
 class ChatbotStatus(str, enum.Enum): # Use str mixin for better JSON serialization
@@ -50,4 +50,26 @@ class ChatbotRead(ChatbotBase):
  
 
     # Pydantic V2 config for ORM mode
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Bulk Schemas ---
+# One update of a bulk request: the chatbot id plus the fields to change.
+class ChatbotBulkUpdate(ChatbotUpdate):
+    id: int
+
+# Request body of POST /chatbots/bulk; all operations run in one transaction.
+class ChatbotBulkRequest(BaseModel):
+    create: List[ChatbotCreate] = []
+    update: List[ChatbotBulkUpdate] = []
+    delete: List[int] = [] # Chatbot ids
+
+# Result of one operation, in request order (create, then update, then delete).
+class ChatbotBulkResult(BaseModel):
+    op: Literal["create", "update", "delete"]
+    index: int # Position in the request's list for this operation
+    id: Optional[int] = None
+    status: int # 201 created, 200 updated, 204 deleted, 404 not found or not owned
+    chatbot: Optional[ChatbotRead] = None # Created/updated chatbot
+
+class ChatbotBulkResponse(BaseModel):
+    results: List[ChatbotBulkResult]
\ No newline at end of file
@@ -1,8 +1,8 @@
 # app/schemas/data_source.py
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 import enum
-from typing import Optional
+from typing import List, Optional
 
 # Enum for different source types we'll support later
 class DataSourceType(str, enum.Enum):
@@ -34,12 +34,51 @@ class DataSourceRead(DataSourceBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     # Maybe add filename for FILE type
+    filename: Optional[str] = None
+    content_hash: Optional[str] = None # SHA-256 of the uploaded file (hex)
+    size_bytes: Optional[int] = None
+    embedding_cache_hits: int = 0
+    embedding_cache_misses: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
+# One page of a keyset-paginated data source listing
+class DataSourcePage(BaseModel):
+    items: List[DataSourceRead]
+    next_cursor: Optional[str] = None # Pass as `cursor` to get the next page; None on the last page
+
+# Progress of one ingestion stage (total is unknown for chunks until parsing is done)
+class StageProgress(BaseModel):
+    done: int
+    total: Optional[int] = None
+
+# Per-stage ingestion progress (see app/ingestion/progress.py)
+class IngestionProgress(BaseModel):
+    unit: str # Unit of the parse stage: "bytes" (text) or "pages" (PDF)
+    parsed: StageProgress
+    embedded: StageProgress # Chunks
+    stored: StageProgress # Vectors
+    parts: int = 1 # Shards the file is processed in
+    started_at: Optional[float] = None # Unix timestamps
+    updated_at: float
+
+class DataSourceProgressRead(BaseModel):
+    data_source_id: int
+    status: ProcessingStatus
+    progress: Optional[IngestionProgress] = None
+    eta_seconds: Optional[float] = None # From the observed throughput; None until known
+
+# Request body for adding already uploaded content by its hash
+class UploadByHashRequest(BaseModel):
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+
 # Response model for file uploads specifically
 class FileUploadResponse(BaseModel):
     filename: str
     content_type: str
     message: str
-    # data_source_id: Optional[int] = None # Could add later
\ No newline at end of file
+    data_source_id: Optional[int] = None
+    size_bytes: Optional[int] = None
+    content_hash: Optional[str] = None # SHA-256 of the file (hex)
\ No newline at end of file
@@ -0,0 +1,21 @@
+# app/schemas/query.py
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class QueryRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=2000)
+    top_k: int = Field(5, ge=1, le=50)
+    # Retrieval mode; the server default (hybrid) is used when omitted
+    mode: Optional[Literal["vector", "bm25", "hybrid"]] = None
+
+class QueryHit(BaseModel):
+    score: float
+    data_source_id: int
+    chunk_index: int
+    text: str
+
+class QueryResponse(BaseModel):
+    chatbot_id: int
+    query: str
+    hits: List[QueryHit]
+    cached: bool # True if the result was served from the query cache
@@ -13,4 +13,5 @@ class TokenData(BaseModel):
     sub: Optional[str] = None
 
 class TokenPayload(BaseModel):
-    sub: int | None = None 
\ No newline at end of file
+    # Tokens are issued with the user's email as subject (see login endpoint)
+    sub: str | None = None 
\ No newline at end of file
@@ -0,0 +1,31 @@
+# app/schemas/upload.py
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+    total_size: Optional[int] = Field(None, ge=1) # Checked on finalize when given
+    # Size of every part except the last one; the server default is used when omitted
+    part_size: Optional[int] = Field(None, ge=256 * 1024, le=64 * 1024 * 1024)
+
+class UploadPartRead(BaseModel):
+    part_number: int
+    size: int
+    sha256: str
+
+class UploadSessionRead(BaseModel):
+    upload_id: str
+    chatbot_id: int
+    filename: str
+    content_type: str
+    part_size: int
+    total_size: Optional[int] = None
+    expires_at: datetime
+    received_parts: List[UploadPartRead] = []
+    received_ranges: List[Tuple[int, int]] = [] # Merged [start, end) byte ranges
+    received_bytes: int = 0
+
+class UploadComplete(BaseModel):
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64) # Verified against the assembled file
@@ -0,0 +1,2 @@
+# backend/app/storage/__init__.py
+# Storage of uploaded file contents (content-addressed blob store).
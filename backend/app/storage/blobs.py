@@ -0,0 +1,278 @@
+# app/storage/blobs.py
+"""
+Content-addressed blob store for uploaded files.
+
+Blobs are addressed by the SHA-256 of their content (computed while the
+upload is streamed, see app.ingestion.uploads), so identical files are stored
+once however many chatbots or users upload them, and same-named uploads can
+never overwrite each other. A blob is referenced by every DataSource row with
+its content_hash; blobs no longer referenced are deleted by the
+collect_blob_garbage task.
+
+Storage is pluggable (register_blob_backend). The "local" backend keeps blobs
+on a filesystem (a shared volume today); an object-store backend only has to
+implement the same small put/get/delete/list interface. Files are always
+received into a local staging directory first and then handed to the backend.
+"""
+import abc
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# DataSource.uri of files stored in the blob store
+BLOB_URI_PREFIX = "blob:sha256:"
+
+# Suffix of blobs being collected (see LocalBlobBackend.delete_if_older); a
+# quarantined file left by a crashed GC run is removed after this many seconds
+_QUARANTINE_SUFFIX = ".gc"
+_QUARANTINE_LEFTOVER_SECONDS = 60 * 60
+
+
+class BlobNotFoundError(LookupError):
+    """Raised when a blob is not in the store."""
+
+
+def blob_uri(sha256: str) -> str:
+    return f"{BLOB_URI_PREFIX}{sha256}"
+
+
+def _check_digest(sha256: str) -> str:
+    if not _SHA256_RE.match(sha256):
+        raise ValueError(f"Not a SHA-256 hex digest: {sha256!r}")
+    return sha256
+
+
+class BlobBackend(abc.ABC):
+    """Minimal storage interface; keys are SHA-256 hex digests."""
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        """True if the blob is stored."""
+
+    @abc.abstractmethod
+    def put_file(self, key: str, src_path: str) -> None:
+        """Stores a local file under `key`. The source file is consumed (moved or removed)."""
+
+    @abc.abstractmethod
+    def touch(self, key: str) -> None:
+        """Refreshes the blob's modification time (protects it from a concurrent GC run)."""
+
+    @abc.abstractmethod
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """Yields a local path with the blob's content, valid inside the `with` block."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Deletes a blob; deleting a missing blob is not an error."""
+
+    @abc.abstractmethod
+    def mtime(self, key: str) -> Optional[float]:
+        """Modification time of a blob, or None if it is not stored."""
+
+    @abc.abstractmethod
+    def delete_if_older(self, key: str, cutoff: float) -> bool:
+        """
+        Deletes a blob unless its modification time is at or after `cutoff`.
+        Must not lose a concurrent touch(): either the touch is seen and the
+        blob kept, or the touch raises BlobNotFoundError.
+
+        :return: True if the blob was deleted.
+        """
+
+    @abc.abstractmethod
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        """Yields (key, modification time) of every stored blob."""
+
+
+class LocalBlobBackend(BlobBackend):
+    """Blobs as read-only files under root/ab/cd/<sha256>."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, src_path: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(src_path, 0o444)
+        try:
+            # Same filesystem as the staging dir: a rename, no bytes copied
+            os.replace(src_path, path)
+        except OSError:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(src_path, tmp_path)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, path)
+            os.remove(src_path)
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise BlobNotFoundError(key)
+        yield path
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def mtime(self, key: str) -> Optional[float]:
+        try:
+            return os.stat(self._path(key)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def delete_if_older(self, key: str, cutoff: float) -> bool:
+        # Checking the mtime and then deleting would race touch(): a blob
+        # touched in between would be deleted, dropping the deduplicated upload.
+        # The blob is renamed out of the way first, so a later touch() fails and
+        # its upload is stored again; a touch that came before the rename shows
+        # in the mtime checked afterwards, and the blob is put back.
+        path = self._path(key)
+        quarantined = f"{path}.{uuid.uuid4().hex}{_QUARANTINE_SUFFIX}"
+        try:
+            os.rename(path, quarantined)
+        except FileNotFoundError:
+            return False
+        if os.stat(quarantined).st_mtime >= cutoff:
+            os.replace(quarantined, path)
+            return False
+        os.remove(quarantined)
+        return True
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        if not os.path.isdir(self.root):
+            return
+        leftover_cutoff = time.time() - _QUARANTINE_LEFTOVER_SECONDS
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    if _SHA256_RE.match(name):
+                        yield name, os.stat(os.path.join(dirpath, name)).st_mtime
+                    elif name.endswith(_QUARANTINE_SUFFIX):
+                        # The rename set ctime: an old one is not a GC run in progress
+                        path = os.path.join(dirpath, name)
+                        if os.stat(path).st_ctime < leftover_cutoff:
+                            os.remove(path)
+                except FileNotFoundError:
+                    continue
+
+
+class BlobStore:
+    """Deduplicating front end over a BlobBackend. All methods are blocking."""
+
+    def __init__(self, backend: BlobBackend, staging_dir: str):
+        self.backend = backend
+        self.staging_dir = staging_dir
+
+    def staging_path(self, prefix: str = ".upload-") -> str:
+        """A new, empty local file to receive an upload into (same filesystem as local blobs)."""
+        os.makedirs(self.staging_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=self.staging_dir, prefix=prefix)
+        os.close(fd)
+        return path
+
+    def exists(self, sha256: str) -> bool:
+        return self.backend.exists(_check_digest(sha256))
+
+    def ingest(self, src_path: str, sha256: str) -> bool:
+        """
+        Stores a received file under its hash. If an identical blob is already
+        stored, the received copy is dropped and nothing is rewritten.
+
+        :return: True if the blob is new, False if it was deduplicated.
+        """
+        key = _check_digest(sha256)
+        if self.backend.exists(key):
+            try:
+                self.backend.touch(key)
+                os.remove(src_path)
+                return False
+            except BlobNotFoundError:
+                pass  # Collected in the meantime; store it again
+        self.backend.put_file(key, src_path)
+        return True
+
+    def touch(self, sha256: str) -> None:
+        self.backend.touch(_check_digest(sha256))
+
+    @contextmanager
+    def open(self, sha256: str) -> Iterator[str]:
+        """Local path of a blob for the duration of the `with` block."""
+        with self.backend.local_path(_check_digest(sha256)) as path:
+            yield path
+
+    def delete(self, sha256: str) -> None:
+        self.backend.delete(_check_digest(sha256))
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        return self.backend.iter_blobs()
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], BlobBackend]] = {
+    "local": lambda: LocalBlobBackend(settings.BLOB_STORE_DIR),
+}
+
+
+def register_blob_backend(name: str, factory: Callable[[], BlobBackend]) -> None:
+    """Registers an additional backend (e.g. an S3-compatible object store) under `name`."""
+    _BACKEND_FACTORIES[name] = factory
+    get_blob_store.cache_clear()
+
+
+@lru_cache()
+def get_blob_store(name: Optional[str] = None) -> BlobStore:
+    """
+    Returns the (process-wide, cached) blob store.
+
+    :param name: Registered backend name; defaults to settings.BLOB_STORE_BACKEND.
+    """
+    name = name or settings.BLOB_STORE_BACKEND
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown blob store backend: {name}") from None
+    return BlobStore(factory(), staging_dir=settings.BLOB_STAGING_DIR)
+
+
+def iter_gc_candidates(store: BlobStore, grace_seconds: float) -> Iterator[str]:
+    """
+    Yields blobs old enough to be garbage collected if nothing references them.
+    The grace period keeps an upload whose DataSource row is not committed yet.
+    """
+    cutoff = time.time() - grace_seconds
+    for key, mtime in store.iter_blobs():
+        if mtime < cutoff:
+            yield key
+
+
+def delete_if_stale(store: BlobStore, sha256: str, grace_seconds: float) -> bool:
+    """Deletes a GC candidate unless it was touched (re-uploaded) since it was listed."""
+    return store.backend.delete_if_older(_check_digest(sha256), time.time() - grace_seconds)
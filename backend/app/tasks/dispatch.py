@@ -0,0 +1,26 @@
+# app/tasks/dispatch.py
+"""
+Enqueueing Celery tasks from the API.
+
+The API only sends task messages. Importing the task modules for their
+`.delay` would load the parsers, embedding backends, numpy and the vector
+store into every API process at startup, so tasks are sent by name instead,
+through the Celery client, which is itself created on first use.
+"""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from celery.result import AsyncResult
+
+PROCESS_UPLOADED_FILE = "app.tasks.process_data.process_uploaded_file"
+
+
+def send_task(name: str, *args) -> "AsyncResult":
+    from app.worker import celery_app  # Celery client, loaded on the first enqueue
+
+    return celery_app.send_task(name, args=list(args))
+
+
+def enqueue_uploaded_file(data_source_id: int, content_hash: str) -> "AsyncResult":
+    """Queues the processing of an uploaded file (see process_data.process_uploaded_file)."""
+    return send_task(PROCESS_UPLOADED_FILE, data_source_id, content_hash)
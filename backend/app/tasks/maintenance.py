@@ -0,0 +1,53 @@
+# app/tasks/maintenance.py
+import asyncio
+import logging
+from typing import List
+
+from app.worker import celery_app
+from app.tasks.runtime import run_async, worker_session # Worker-resident loop + DB pool
+from app.crud import crud_data_source
+from app.core.config import settings
+from app.ingestion import upload_sessions
+from app.retrieval.vector_store import sweep_retired_files
+from app.storage.blobs import delete_if_stale, get_blob_store, iter_gc_candidates
+
+logger = logging.getLogger(__name__)
+
+# Hashes checked against the data_sources table per query
+GC_BATCH_SIZE = 500
+
+
+async def collect_unreferenced_blobs(grace_seconds: float) -> dict:
+    """
+    Deletes blobs no DataSource references any more (its data sources were
+    deleted). Blobs younger than the grace period are skipped, so an upload
+    whose DataSource row is not committed yet is never collected.
+    """
+    store = get_blob_store()
+    candidates: List[str] = await asyncio.to_thread(lambda: list(iter_gc_candidates(store, grace_seconds)))
+    deleted = 0
+    async with worker_session() as db:
+        for start in range(0, len(candidates), GC_BATCH_SIZE):
+            batch = candidates[start:start + GC_BATCH_SIZE]
+            referenced = await crud_data_source.get_referenced_content_hashes(db, batch)
+            for sha256 in batch:
+                if sha256 not in referenced and await asyncio.to_thread(delete_if_stale, store, sha256, grace_seconds):
+                    deleted += 1
+    return {"candidates": len(candidates), "deleted": deleted}
+
+
+@celery_app.task(bind=True)
+def collect_blob_garbage(self):
+    """
+    Periodic task (celery beat): removes unreferenced blobs, expired upload
+    sessions and retired vector store files past their grace period.
+    """
+    result = run_async(collect_unreferenced_blobs(settings.BLOB_GC_GRACE_SECONDS))
+    result["expired_upload_sessions"] = upload_sessions.sweep_expired_sessions(settings.UPLOAD_SESSION_DIR)
+    result["retired_index_files"] = sweep_retired_files()
+    logger.info(
+        f"TASK COMPLETED: Blob GC deleted {result['deleted']} of {result['candidates']} candidate blobs, "
+        f"{result['expired_upload_sessions']} expired upload sessions, "
+        f"{result['retired_index_files']} retired index files"
+    )
+    return result
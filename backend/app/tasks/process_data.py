@@ -2,27 +2,214 @@
 import time
 import logging
 import asyncio # Need asyncio
+import os
+from typing import Iterable, List, Optional
+from celery import chord, group
 from app.worker import celery_app
 # --- DB Imports for task ---
-from app.db.session import AsyncSessionLocal # Import session maker
+from app.tasks.runtime import run_async, worker_session # Worker-resident loop + DB pool
 from app.crud import crud_data_source # Import CRUD functions
 from app.schemas.data_source import ProcessingStatus # Import Enum
 # -------------------------
+from app.core.config import settings
+from app.ingestion.chunking import TextChunk, iter_shard_chunks, plan_file_shards
+from app.ingestion.embeddings import get_embedding_backend, iter_batches
+from app.ingestion.embedding_cache import CachedEmbedder, get_embedding_cache
+from app.ingestion.status_events import publish_status_event
+from app.ingestion.progress import (
+    ProgressTracker,
+    merge_part_snapshots,
+    new_part_snapshot,
+    report_progress,
+    shard_work_units,
+)
+from app.retrieval.vector_store import (
+    SegmentWriter,
+    VectorStoreError,
+    discard_unpublished_segments,
+    offset_segment_chunk_ids,
+    publish_segments,
+)
+from app.storage.blobs import get_blob_store
+from app.retrieval.ivf import update_ivf_index
+from app.retrieval.quantization import update_codec_index
 
 logger = logging.getLogger(__name__)
 
-# --- Helper async context manager for DB session in task ---
-async def get_task_db_session():
-    async with AsyncSessionLocal() as session:
-        yield session
 
-@celery_app.task(bind=True)
-def process_uploaded_file(self, data_source_id: int, file_path: str):
-    logger.info(f"TASK STARTED: Processing data_source_id: {data_source_id}, file_path: {file_path}")
+class ShardAbandoned(Exception):
+    """Raised by a shard task whose data source already failed (another shard failed) or is gone."""
+
+
+def write_segment(
+    chatbot_id: int,
+    data_source_id: int,
+    chunks: Iterable[TextChunk],
+    publish: bool = True,
+    progress: Optional[ProgressTracker] = None,
+) -> dict:
+    """
+    Blocking part of the ingestion (parsing, embedding, disk writes) for a
+    whole file or one shard of it. Runs in a thread or a shard task so the
+    shared worker loop stays free for other tasks.
+
+    :param publish: Publish the segment right away; shards leave it sealed for the merge step.
+    :param progress: Tracker counting the chunks embedded and vectors stored.
+    :return: Segment id, chunk count, model, embedding cache statistics and final progress.
+    """
+    # Stream the file through the parser/chunker (never loaded whole),
+    # embed the chunks batch by batch as they are produced and append
+    # each batch to a new vector store segment for the chatbot.
+    # Chunks already embedded for any chatbot are served from the shared cache.
+    backend = get_embedding_backend()
+    embedder = CachedEmbedder(backend, get_embedding_cache())
+    writer = SegmentWriter(
+        chatbot_id=chatbot_id,
+        data_source_id=data_source_id,
+        model_id=backend.model_id,
+        dim=backend.dim,
+    )
+    try:
+        embed_seconds = 0.0
+        for batch in iter_batches(chunks, settings.EMBEDDING_BATCH_SIZE):
+            started = time.perf_counter()
+            vectors = embedder.embed([chunk.text for chunk in batch])
+            embed_seconds += time.perf_counter() - started
+            if progress is not None:
+                progress.add("embedded", len(batch))
+            writer.append(vectors, batch)
+            if progress is not None:
+                progress.add("stored", len(batch))
+        throughput = writer.count / embed_seconds if embed_seconds else 0.0
+        logger.info(
+            f"TASK STEP: Embedded {writer.count} chunks for {data_source_id} "
+            f"with {backend.model_id} ({throughput:.0f} chunks/s, "
+            f"cache hit rate {embedder.hit_rate:.1%}: {embedder.hits} hits, {embedder.misses} misses)"
+        )
+
+        logger.info(f"TASK STEP: Storing embeddings in Vector DB for {data_source_id}")
+        segment_id = writer.commit() if publish else writer.seal()
+    except Exception:
+        writer.abort()
+        raise
+    if progress is not None:
+        progress.flush()
+    return {
+        "segment_id": segment_id,
+        "count": writer.count,
+        "model_id": backend.model_id,
+        "dim": backend.dim,
+        "cache_hits": embedder.hits,
+        "cache_misses": embedder.misses,
+        "progress": progress.snapshot() if progress is not None else None,
+    }
+
+
+def update_chatbot_indexes(chatbot_id: int) -> None:
+    # Assign the new chunks to the chatbot's IVF lists (trains the
+    # centroids once the chatbot is large enough for approximate search)
+    logger.info(f"TASK STEP: Updating ANN index for chatbot {chatbot_id}")
+    update_ivf_index(chatbot_id)
+    # Train/apply the chatbot's configured codec (int8 / PQ), if any
+    update_codec_index(chatbot_id)
+
+
+def merge_shard_segments(chatbot_id: int, data_source_id: int, shard_results: List[dict]) -> None:
+    """
+    Fan-in: renumbers the chunks of every shard segment so indexes are
+    contiguous across the file, then publishes all of them in one manifest
+    update (readers see either the old data or the complete new data).
+    """
+    models = {(result["model_id"], result["dim"]) for result in shard_results}
+    if len(models) != 1:
+        raise VectorStoreError(f"Shards of data source {data_source_id} were embedded with different models: {models}")
+    model_id, dim = models.pop()
+    offset = 0
+    for result in shard_results:
+        if offset:
+            offset_segment_chunk_ids(chatbot_id, result["segment_id"], offset)
+        offset += result["count"]
+    publish_segments(
+        chatbot_id, data_source_id,
+        [(result["segment_id"], result["count"]) for result in shard_results],
+        model_id=model_id, dim=dim,
+    )
+    update_chatbot_indexes(chatbot_id)
+
+
+async def mark_data_source_failed(db, data_source_id: int) -> None:
+    # Update status to FAILED
+    logger.info(f"TASK STEP: Set status to FAILED for {data_source_id}")
+    try:
+        await db.rollback()
+        await crud_data_source.update_data_source_status(
+            db=db, data_source_id=data_source_id, status=ProcessingStatus.FAILED
+        )
+    except Exception as db_err:
+        logger.error(f"TASK FAILED: Could not update status to FAILED for {data_source_id}. DB Error: {db_err}", exc_info=True)
+    await asyncio.to_thread(publish_status_event, data_source_id, ProcessingStatus.FAILED.value)
+
+
+async def complete_data_source(
+    db, data_source_id: int, cache_hits: int, cache_misses: int, progress: Optional[dict] = None
+) -> dict:
+    await crud_data_source.update_data_source_embedding_stats(
+        db=db, data_source_id=data_source_id, hits=cache_hits, misses=cache_misses
+    )
+
+    # Update status to COMPLETED (with the final progress snapshot)
+    logger.info(f"TASK STEP: Set status to COMPLETED for {data_source_id}")
+    await crud_data_source.update_data_source_status(
+        db=db, data_source_id=data_source_id, status=ProcessingStatus.COMPLETED, progress=progress
+    )
+    await asyncio.to_thread(
+        publish_status_event, data_source_id, ProcessingStatus.COMPLETED.value,
+        chunks=cache_hits + cache_misses, progress=progress, eta_seconds=0.0,
+    )
 
-    async def async_process(): # Wrap core logic in an async function
-        db_session_gen = get_task_db_session()
-        db = await anext(db_session_gen) # Get session for this task run
+    logger.info(f"TASK COMPLETED: Successfully processed data_source_id: {data_source_id}")
+    total = cache_hits + cache_misses
+    return {
+        "status": "Completed",
+        "data_source_id": data_source_id,
+        "embedding_cache": {
+            "hits": cache_hits,
+            "misses": cache_misses,
+            "hit_rate": cache_hits / total if total else 0.0,
+        },
+    }
+
+
+async def _save_progress(data_source_id: int, progress: dict) -> None:
+    async with worker_session() as db:
+        await crud_data_source.update_data_source_progress(db=db, data_source_id=data_source_id, progress=progress)
+
+
+def persist_progress(data_source_id: int, progress: dict) -> None:
+    # Called from embedding threads (never from the worker loop itself)
+    run_async(_save_progress(data_source_id, progress))
+
+
+def _embed_blob_shard(
+    chatbot_id: int, data_source_id: int, content_hash: str, shard: dict, publish: bool, shard_index: Optional[int] = None
+) -> dict:
+    total, unit = shard_work_units(shard)
+    tracker = ProgressTracker(data_source_id, str(shard_index or 0), total, unit, persist=persist_progress)
+    # The blob's local path is only valid while it is open (a remote backend
+    # may download it to a temporary file).
+    with get_blob_store().open(content_hash) as file_path:
+        chunks = iter_shard_chunks(file_path, shard, on_read=lambda amount: tracker.add("parsed", amount))
+        return write_segment(chatbot_id, data_source_id, chunks, publish=publish, progress=tracker)
+
+
+def _plan_blob_shards(content_hash: str, extension: str) -> List[dict]:
+    with get_blob_store().open(content_hash) as file_path:
+        return plan_file_shards(file_path, extension=extension)
+
+
+async def process_data_source(data_source_id: int, content_hash: str) -> dict:
+    """Core ingestion logic, run on the worker-resident event loop."""
+    async with worker_session() as db: # Session from this worker's pool
         try:
             # Update status to PROCESSING
             logger.info(f"TASK STEP: Set status to PROCESSING for {data_source_id}")
@@ -30,52 +217,125 @@ def process_uploaded_file(self, data_source_id: int, file_path: str):
                 db=db, data_source_id=data_source_id, status=ProcessingStatus.PROCESSING
             )
 
-            # TODO: Implement actual file reading, parsing, chunking
-            logger.info(f"TASK STEP: Reading and parsing file {file_path}")
-            await asyncio.sleep(10) # Use asyncio.sleep
+            db_data_source = await crud_data_source.get_data_source(db, data_source_id)
+            if not db_data_source:
+                raise ValueError(f"Data source {data_source_id} not found")
+            chatbot_id = db_data_source.chatbot_id
 
-            # TODO: Implement embedding generation
-            logger.info(f"TASK STEP: Generating embeddings for {data_source_id}")
-            await asyncio.sleep(10)
-
-            # TODO: Implement storing chunks/embeddings in Vector DB
-            logger.info(f"TASK STEP: Storing embeddings in Vector DB for {data_source_id}")
-            await asyncio.sleep(5)
+            # Blobs are named by their hash: the file type comes from the uploaded filename
+            extension = os.path.splitext(db_data_source.filename or "")[1]
+            shards = await asyncio.to_thread(_plan_blob_shards, content_hash, extension)
+            if len(shards) > 1:
+                # Fan-out: one sub-task per shard across the workers; the chord
+                # callback merges their segments and flips the status to COMPLETED.
+                logger.info(f"TASK STEP: Dispatching {len(shards)} shards of blob {content_hash} for {data_source_id}")
+                workflow = chord(
+                    group(
+                        process_file_shard.s(data_source_id, chatbot_id, content_hash, shard, index)
+                        for index, shard in enumerate(shards)
+                    ),
+                    merge_data_source_shards.s(data_source_id, chatbot_id).on_error(
+                        fail_sharded_data_source.si(data_source_id, chatbot_id)
+                    ),
+                )
+                # Register every shard's total up front so progress and ETA cover the whole file
+                await asyncio.to_thread(
+                    report_progress, data_source_id,
+                    {str(index): new_part_snapshot(*shard_work_units(shard)) for index, shard in enumerate(shards)},
+                )
+                await asyncio.to_thread(workflow.apply_async)
+                return {"status": "Dispatched", "data_source_id": data_source_id, "shards": len(shards)}
 
-            # Update status to COMPLETED
-            logger.info(f"TASK STEP: Set status to COMPLETED for {data_source_id}")
-            await crud_data_source.update_data_source_status(
-                db=db, data_source_id=data_source_id, status=ProcessingStatus.COMPLETED
+            logger.info(f"TASK STEP: Reading, parsing and embedding blob {content_hash}")
+            result = await asyncio.to_thread(
+                _embed_blob_shard, chatbot_id, data_source_id, content_hash, shards[0], True
+            )
+            await asyncio.to_thread(update_chatbot_indexes, chatbot_id)
+            return await complete_data_source(
+                db, data_source_id, result["cache_hits"], result["cache_misses"],
+                progress=merge_part_snapshots({"0": result["progress"]}),
             )
-
-            logger.info(f"TASK COMPLETED: Successfully processed data_source_id: {data_source_id}")
-            return {"status": "Completed", "data_source_id": data_source_id}
 
         except Exception as e:
             logger.error(f"TASK FAILED: Error processing data_source_id: {data_source_id}. Error: {e}", exc_info=True)
-            # Update status to FAILED
-            logger.info(f"TASK STEP: Set status to FAILED for {data_source_id}")
-            try:
-                await crud_data_source.update_data_source_status(
-                    db=db, data_source_id=data_source_id, status=ProcessingStatus.FAILED
-                )
-            except Exception as db_err:
-                logger.error(f"TASK FAILED: Could not update status to FAILED for {data_source_id}. DB Error: {db_err}", exc_info=True)
-
+            await mark_data_source_failed(db, data_source_id)
             raise # Re-raise exception to mark task as failed
+        # The blob itself is kept either way: other data sources may share it,
+        # and unreferenced blobs are removed by the collect_blob_garbage task.
+
+
+async def finalize_sharded_data_source(shard_results: List[dict], data_source_id: int, chatbot_id: int) -> dict:
+    async with worker_session() as db:
+        try:
+            logger.info(f"TASK STEP: Merging {len(shard_results)} shard segments for {data_source_id}")
+            await asyncio.to_thread(merge_shard_segments, chatbot_id, data_source_id, shard_results)
+            return await complete_data_source(
+                db, data_source_id,
+                sum(result["cache_hits"] for result in shard_results),
+                sum(result["cache_misses"] for result in shard_results),
+                progress=merge_part_snapshots({str(index): result["progress"] for index, result in enumerate(shard_results)}),
+            )
+        except Exception as e:
+            logger.error(f"TASK FAILED: Could not merge shards of data_source_id: {data_source_id}. Error: {e}", exc_info=True)
+            await asyncio.to_thread(discard_unpublished_segments, chatbot_id, data_source_id)
+            await mark_data_source_failed(db, data_source_id)
+            raise
+
+
+async def fail_data_source(data_source_id: int) -> None:
+    async with worker_session() as db:
+        await mark_data_source_failed(db, data_source_id)
+
 
-        finally:
-            # TODO: Cleanup temporary files if necessary
-            # IMPORTANT: Close the session manually if using context manager approach
-            await db.close() # Close session obtained from get_task_db_session
-            logger.info(f"TASK FINALLY: Cleanup for {data_source_id} if needed.")
-            # --- REMOVE os.remove(file_path) if file needs to persist ---
-            # import os
-            # try: os.remove(file_path)
-            # except OSError: pass
-
-    # Run the async processing function within the sync Celery task
-    # This is one way to bridge sync Celery task and async DB operations
-    return asyncio.run(async_process())
-
-# ... (example_task remains) ...
\ No newline at end of file
+async def data_source_abandoned(data_source_id: int) -> bool:
+    """True if the data source was marked FAILED (e.g. by a sibling shard) or deleted."""
+    async with worker_session() as db:
+        status = await crud_data_source.get_data_source_status(db, data_source_id)
+    return status is None or status == ProcessingStatus.FAILED
+
+
+@celery_app.task(bind=True)
+def process_uploaded_file(self, data_source_id: int, content_hash: str):
+    logger.info(f"TASK STARTED: Processing data_source_id: {data_source_id}, blob: {content_hash}")
+    # Run on this worker process's long-lived event loop (see app/tasks/runtime.py)
+    # instead of creating a new loop per task with asyncio.run().
+    return run_async(process_data_source(data_source_id, content_hash))
+
+
+@celery_app.task(bind=True)
+def process_file_shard(
+    self, data_source_id: int, chatbot_id: int, content_hash: str, shard: dict, shard_index: Optional[int] = None
+):
+    """
+    Embeds one shard of a large file into a sealed (unpublished) segment.
+
+    Sibling shards keep running after one of them failed. fail_sharded_data_source
+    marks the data source FAILED before discarding its unpublished segments,
+    so a shard that seals after that discard sees the status here and
+    removes its segment itself.
+    """
+    logger.info(f"TASK STARTED: Shard {shard} of data_source_id: {data_source_id}")
+    if run_async(data_source_abandoned(data_source_id)):
+        raise ShardAbandoned(f"Data source {data_source_id} failed or was deleted; shard {shard_index} skipped")
+    result = _embed_blob_shard(chatbot_id, data_source_id, content_hash, shard, publish=False, shard_index=shard_index)
+    if run_async(data_source_abandoned(data_source_id)):
+        discard_unpublished_segments(chatbot_id, data_source_id)
+        raise ShardAbandoned(f"Data source {data_source_id} failed or was deleted; segment of shard {shard_index} discarded")
+    return result
+
+
+@celery_app.task(bind=True)
+def merge_data_source_shards(self, shard_results: List[dict], data_source_id: int, chatbot_id: int):
+    """Chord callback: merges the shard segments and marks the data source COMPLETED."""
+    return run_async(finalize_sharded_data_source(shard_results, data_source_id, chatbot_id))
+
+
+@celery_app.task(bind=True)
+def fail_sharded_data_source(self, data_source_id: int, chatbot_id: int):
+    """
+    Chord error callback: marks the data source FAILED, then drops the segments
+    of finished shards (in this order: see process_file_shard).
+    """
+    logger.error(f"TASK FAILED: A shard of data_source_id: {data_source_id} failed")
+    run_async(fail_data_source(data_source_id))
+    discard_unpublished_segments(chatbot_id, data_source_id)
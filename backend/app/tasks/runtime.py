@@ -0,0 +1,127 @@
+# app/tasks/runtime.py
+"""
+Worker-resident asyncio runtime for Celery tasks.
+
+Each worker process owns ONE event loop, running forever in a background
+thread, and ONE async engine (connection pool) created for that loop. Tasks
+submit their coroutines to it with run_async() instead of calling
+asyncio.run(), so there is no per-task loop setup and pooled connections are
+never used from a loop other than the one they were opened on.
+
+Because the loop is shared, several tasks can be in flight on it at once
+(e.g. with `celery worker --pool threads --concurrency N`): their DB, disk
+and embedding waits overlap. Blocking work must therefore be pushed off the
+loop (asyncio.to_thread) by the task code.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """An event loop thread plus the engine/session factory bound to it."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="worker-asyncio", daemon=True)
+        self._thread.start()
+        self.engine: AsyncEngine = create_async_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=settings.WORKER_DB_POOL_SIZE,
+        )
+        self.session_factory = async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Runs a coroutine on the worker loop and blocks the calling (task) thread for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run() called from the worker loop itself; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def close(self) -> None:
+        """Disposes of the pool and stops the loop thread."""
+        try:
+            self.run(self.engine.dispose(), timeout=30)
+        except Exception as e:
+            logger.warning(f"Worker runtime: could not dispose engine cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=30)
+        self.loop.close()
+
+
+_runtime: Optional[WorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_worker_runtime() -> WorkerRuntime:
+    """The runtime of this process, started on first use if the worker signal did not start it."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = WorkerRuntime()
+                logger.info("Worker runtime started (event loop + DB pool)")
+    return _runtime
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Entry point for sync Celery tasks: runs `coro` on the worker-resident loop."""
+    return get_worker_runtime().run(coro)
+
+
+@asynccontextmanager
+async def worker_session() -> AsyncIterator[AsyncSession]:
+    """Session from the worker pool; only valid inside coroutines run with run_async()."""
+    async with get_worker_runtime().session_factory() as session:
+        yield session
+
+
+def shutdown_worker_runtime() -> None:
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.close()
+        logger.info("Worker runtime stopped")
+
+
+# --- Celery lifecycle hooks ---
+# Prefork children start their own runtime right after the fork, so nothing
+# created in the parent (loop, pooled sockets) is ever shared between processes.
+@worker_process_init.connect
+def _start_runtime_in_child(**kwargs):
+    global _runtime
+    _runtime = None  # Never reuse a runtime inherited from the parent process
+    get_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def _stop_runtime_in_child(**kwargs):
+    shutdown_worker_runtime()
+
+
+# Solo / threads pools run tasks in the main process
+@worker_shutdown.connect
+def _stop_runtime(**kwargs):
+    shutdown_worker_runtime()
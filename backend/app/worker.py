@@ -20,7 +20,7 @@ celery_app = Celery(
     backend=result_backend,
     # List of modules where Celery should look for tasks.
     # Ensure this matches the actual path to your task files.
-    include=["app.tasks.process_data"]
+    include=["app.tasks.process_data", "app.tasks.maintenance"]
 )
 
 # Optional Celery configuration
@@ -33,6 +33,14 @@ celery_app.conf.update(
     # result_expires=3600, # Example: Keep results for 1 hour
 )
 
+# Periodic tasks (run by `celery worker --beat` or a separate `celery beat`)
+celery_app.conf.beat_schedule = {
+    "collect-blob-garbage": {
+        "task": "app.tasks.maintenance.collect_blob_garbage",
+        "schedule": float(settings.BLOB_GC_INTERVAL_SECONDS),
+    },
+}
+
 # Optional: Configure Task Routing (Advanced)
 # celery_app.conf.task_routes = {'app.tasks.process_data.*': {'queue': 'processing'}}
 
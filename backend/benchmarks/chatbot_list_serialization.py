@@ -0,0 +1,148 @@
+# benchmarks/chatbot_list_serialization.py
+"""
+Micro-benchmark of the chatbot list (GET /chatbots/my/) response paths.
+
+    orm      ORM objects (get_chatbots_by_owner), validated through the route's
+             response model by FastAPI's serialize_response, json.dumps
+             (JSONResponse): the previous path
+    rows     ChatbotRead columns as plain rows (get_chatbot_rows_by_owner),
+             encoded by FastJSONResponse: the current path
+
+Each path is timed with and without the database query, for pages of each
+--rows size, against a throwaway SQLite database. Both paths must produce
+the same bytes.
+
+The database is always a temporary SQLite one (DATABASE_URL is ignored: its
+tables are dropped between page sizes), removed on exit.
+
+Run from backend/, with the development requirements installed (aiosqlite:
+`pip install -r requirements-dev.txt`):
+
+    python -m benchmarks.chatbot_list_serialization --rows 100 1000
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# Overrides the environment: inside the compose containers DATABASE_URL is the real database
+_DB_DIR = tempfile.mkdtemp(prefix="bench-serialization-")
+atexit.register(shutil.rmtree, _DB_DIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_DIR}/bench.db"
+os.environ["CHATBOT_CACHE_BACKEND"] = "memory"
+os.environ["PRINCIPAL_CACHE_BACKEND"] = "memory"
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.api.responses import FastJSONResponse, rows_to_dicts  # noqa: E402
+from app.crud import crud_chatbot  # noqa: E402
+from app.db.models.base_class import Base  # noqa: E402
+from app.db.models.chatbot import Chatbot  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.db.session import AsyncSessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _response_field():
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.name == "read_my_chatbots":
+            return route.secure_cloned_response_field
+    raise RuntimeError("read_my_chatbots route not found")
+
+
+async def _seed(rows: int) -> int:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = User(email="bench@example.com", hashed_password="x", is_active=True, is_superuser=False)
+        db.add(user)
+        await db.flush()
+        db.add_all(Chatbot(name=f"chatbot-{i:05d}", owner_id=user.id) for i in range(rows))
+        await db.commit()
+        return user.id
+
+
+async def _orm_body(db, owner_id: int, rows: int, field, chatbots=None) -> bytes:
+    if chatbots is None:
+        chatbots = await crud_chatbot.get_chatbots_by_owner(db, owner_id=owner_id, limit=rows)
+    content = await serialize_response(field=field, response_content=chatbots, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def _rows_body(db, owner_id: int, rows: int, records=None) -> bytes:
+    if records is None:
+        records = await crud_chatbot.get_chatbot_rows_by_owner(db, owner_id=owner_id, limit=rows)
+    return FastJSONResponse(rows_to_dicts(records)).body
+
+
+async def _time(func, iterations: int) -> dict:
+    for _ in range(max(1, iterations // 10)):  # Warm-up
+        await func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+async def run(rows_sizes, iterations: int) -> list:
+    field = _response_field()
+    results = []
+    for rows in rows_sizes:
+        owner_id = await _seed(rows)
+        async with AsyncSessionLocal() as db:
+            chatbots = await crud_chatbot.get_chatbots_by_owner(db, owner_id=owner_id, limit=rows)
+            records = await crud_chatbot.get_chatbot_rows_by_owner(db, owner_id=owner_id, limit=rows)
+            if await _orm_body(db, owner_id, rows, field, chatbots) != await _rows_body(db, owner_id, rows, records):
+                raise AssertionError("orm and rows paths produce different responses")
+
+            cases = {
+                "orm (query + serialize)": lambda: _orm_body(db, owner_id, rows, field),
+                "rows (query + serialize)": lambda: _rows_body(db, owner_id, rows),
+                "orm (serialize only)": lambda: _orm_body(db, owner_id, rows, field, chatbots),
+                "rows (serialize only)": lambda: _rows_body(db, owner_id, rows, records),
+            }
+            for name, func in cases.items():
+                result = await _time(func, iterations)
+                result.update(path=name, rows=rows)
+                results.append(result)
+    await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000], help="Page sizes")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per path and page size")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.rows, args.iterations))
+
+    print(f"{'rows':>6}  {'path':<26} {'median ms':>10} {'p95 ms':>10}")
+    for result in results:
+        print(f"{result['rows']:>6}  {result['path']:<26} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f}")
+    for rows in args.rows:
+        by_path = {r["path"]: r["median_ms"] for r in results if r["rows"] == rows}
+        for kind in ("query + serialize", "serialize only"):
+            speedup = by_path[f"orm ({kind})"] / by_path[f"rows ({kind})"]
+            print(f"{rows} rows, {kind}: {speedup:.1f}x faster")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# benchmarks/load.py
+"""
+In-process HTTP load benchmark of the API.
+
+Drives the FastAPI app through httpx's ASGI transport (no server, no network)
+against throwaway local stand-ins: a SQLite database, in-memory principal /
+chatbot caches and status broker, an in-memory Celery broker (uploads are
+queued, never processed) and temporary blob / vector store directories.
+The database is seeded with users, chatbots and data sources first.
+
+`--concurrency` clients run for `--duration` seconds, each repeatedly picking
+a scenario of the mix (weighted, from a seeded RNG):
+
+    login          POST /login/access-token (bcrypt at PASSWORD_BCRYPT_ROUNDS)
+    users_me       GET  /users/me
+    chatbots_list  GET  /chatbots/my/
+    chatbot_crud   POST /chatbots/, GET/PATCH/DELETE /chatbots/{id}
+    upload         POST /chatbots/{id}/upload-file (small text file)
+    status_poll    GET  /chatbots/data-sources/{id}/status and /progress
+
+The report has throughput and p50/p95/p99 latency per endpoint. `--output`
+writes it as JSON (with the git commit), `--compare` prints the change
+against an earlier result file:
+
+    python -m benchmarks.load --mix default --duration 30 --output before.json
+    python -m benchmarks.load --mix default --duration 30 --compare before.json
+
+Other settings are read from the environment as usual (e.g.
+PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS), but DATABASE_URL is ignored:
+the run always uses its own temporary SQLite database, removed on exit. To
+benchmark against a dedicated PostgreSQL database instead, set
+BENCH_DATABASE_URL and pass --drop-tables: all tables of that database are
+DROPPED and re-created. Never point it at a database holding real data.
+
+Run from backend/, with the development requirements installed (httpx,
+aiosqlite: `pip install -r requirements-dev.txt`). Absolute numbers depend on
+the machine (and SQLite is not PostgreSQL): compare results of the same
+machine and settings only.
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+# The stand-ins replace whatever the environment configures (inside the compose
+# containers DATABASE_URL & co. are the real services): only an explicit
+# BENCH_DATABASE_URL points the run at another database.
+_WORK_DIR = tempfile.mkdtemp(prefix="bench-load-")
+atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL")
+for _name, _value in {
+    "DATABASE_URL": BENCH_DATABASE_URL or f"sqlite+aiosqlite:///{_WORK_DIR}/bench.db",
+    "PRINCIPAL_CACHE_BACKEND": "memory",
+    "CHATBOT_CACHE_BACKEND": "memory",
+    "STATUS_BROKER_BACKEND": "memory",
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+    "BLOB_STORE_DIR": f"{_WORK_DIR}/blobs",
+    "BLOB_STAGING_DIR": f"{_WORK_DIR}/blobs/.staging",
+    "UPLOAD_SESSION_DIR": f"{_WORK_DIR}/blobs/.sessions",
+    "VECTOR_STORE_DIR": f"{_WORK_DIR}/vector_store",
+    "EMBEDDING_CACHE_PATH": f"{_WORK_DIR}/vector_store/embedding_cache.sqlite3",
+}.items():
+    os.environ[_name] = _value
+
+import httpx  # noqa: E402
+
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.db.models.base_class import Base  # noqa: E402
+from app.db.models.chatbot import Chatbot  # noqa: E402
+from app.db.models.data_source import DataSource  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.db.session import AsyncSessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.data_source import DataSourceType, ProcessingStatus  # noqa: E402
+
+API = "/api/v1"
+PASSWORD = "benchmark-password"
+
+# Scenario weights of each mix
+MIXES: Dict[str, Dict[str, int]] = {
+    "default": {
+        "users_me": 20,
+        "chatbots_list": 25,
+        "status_poll": 30,
+        "chatbot_crud": 10,
+        "upload": 5,
+        "login": 2,
+    },
+    "read": {"users_me": 30, "chatbots_list": 40, "status_poll": 30},
+    "write": {"chatbot_crud": 70, "upload": 30},
+    "auth": {"login": 100},
+}
+
+
+class Recorder:
+    """Latencies and status codes per endpoint of the requests started in [start_at, stop_at)."""
+
+    def __init__(self, start_at: float, stop_at: float):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.start_at = start_at
+        self.stop_at = stop_at
+
+    async def request(
+        self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, expected=(200,), **kwargs
+    ) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if self.start_at <= start < self.stop_at:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][response.status_code] += 1
+            if response.status_code not in expected:
+                self.errors[endpoint] += 1
+        return response
+
+
+class Fixture:
+    """Seeded users and their tokens, chatbots and data sources."""
+
+    def __init__(self):
+        self.users: List[dict] = []  # {"email", "headers", "chatbot_ids", "data_source_ids"}
+
+
+async def seed(users: int, chatbots_per_user: int, data_sources_per_chatbot: int, drop_tables: bool = False) -> Fixture:
+    """
+    Creates the tables and the benchmark rows.
+
+    :param drop_tables: Drop existing tables first; only with BENCH_DATABASE_URL
+                        (the temporary SQLite database starts empty).
+    """
+    async with async_engine.begin() as conn:
+        if drop_tables:
+            if not BENCH_DATABASE_URL:
+                raise RuntimeError("Refusing to drop tables of a database not given as BENCH_DATABASE_URL")
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    fixture = Fixture()
+    hashed_password = get_password_hash(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        for u in range(users):
+            user = User(email=f"bench-{u}@example.com", hashed_password=hashed_password, is_active=True, is_superuser=False)
+            db.add(user)
+            await db.flush()
+            chatbots = [Chatbot(name=f"bench-{u}-{c}", owner_id=user.id) for c in range(chatbots_per_user)]
+            db.add_all(chatbots)
+            await db.flush()
+            data_sources = [
+                DataSource(
+                    chatbot_id=chatbot.id,
+                    type=DataSourceType.FILE,
+                    status=ProcessingStatus.COMPLETED,
+                    uri=f"blob://seed-{chatbot.id}-{d}",
+                    filename=f"seed-{d}.txt",
+                )
+                for chatbot in chatbots
+                for d in range(data_sources_per_chatbot)
+            ]
+            db.add_all(data_sources)
+            await db.flush()
+            fixture.users.append({
+                "email": user.email,
+                "headers": {"Authorization": f"Bearer {create_access_token(subject=user.email)}"},
+                "chatbot_ids": [chatbot.id for chatbot in chatbots],
+                "data_source_ids": [data_source.id for data_source in data_sources],
+            })
+        await db.commit()
+    return fixture
+
+
+# --- Scenarios ---
+
+async def login(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    await recorder.request(
+        client, "POST /login/access-token", "POST", f"{API}/login/login/access-token",
+        data={"username": user["email"], "password": PASSWORD},
+        expected=(200, 503),  # 503: password hashing saturated (load shedding)
+    )
+
+
+async def users_me(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    await recorder.request(client, "GET /users/me", "GET", f"{API}/users/me", headers=user["headers"])
+
+
+async def chatbots_list(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    await recorder.request(
+        client, "GET /chatbots/my/", "GET", f"{API}/chatbots/my/", headers=user["headers"], params={"limit": 100}
+    )
+
+
+async def chatbot_crud(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    headers = user["headers"]
+    response = await recorder.request(
+        client, "POST /chatbots/", "POST", f"{API}/chatbots/", headers=headers,
+        json={"name": f"crud-{rng.random():.8f}"}, expected=(201,),
+    )
+    if response.status_code != 201:
+        return
+    url = f"{API}/chatbots/{response.json()['id']}"
+    await recorder.request(client, "GET /chatbots/{id}", "GET", url, headers=headers)
+    await recorder.request(client, "PATCH /chatbots/{id}", "PATCH", url, headers=headers, json={"name": "renamed"})
+    await recorder.request(client, "DELETE /chatbots/{id}", "DELETE", url, headers=headers, expected=(204,))
+
+
+async def upload(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    chatbot_id = rng.choice(user["chatbot_ids"])
+    # Distinct content per upload: every request stores a new blob
+    content = f"benchmark upload {rng.random()}\n".encode() * 256
+    await recorder.request(
+        client, "POST /chatbots/{id}/upload-file", "POST", f"{API}/chatbots/{chatbot_id}/upload-file",
+        headers=user["headers"], files={"file": ("bench.txt", content, "text/plain")}, expected=(202,),
+    )
+
+
+async def status_poll(client, recorder: Recorder, user: dict, rng: random.Random) -> None:
+    data_source_id = rng.choice(user["data_source_ids"])
+    await recorder.request(
+        client, "GET /data-sources/{id}/status", "GET", f"{API}/chatbots/data-sources/{data_source_id}/status",
+        headers=user["headers"],
+    )
+    await recorder.request(
+        client, "GET /data-sources/{id}/progress", "GET", f"{API}/chatbots/data-sources/{data_source_id}/progress",
+        headers=user["headers"],
+    )
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "login": login,
+    "users_me": users_me,
+    "chatbots_list": chatbots_list,
+    "chatbot_crud": chatbot_crud,
+    "upload": upload,
+    "status_poll": status_poll,
+}
+
+
+# --- Driver ---
+
+async def _client_loop(
+    client: httpx.AsyncClient, recorder: Recorder, fixture: Fixture, mix: Dict[str, int],
+    rng: random.Random, stop_at: float,
+) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < stop_at:
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        await scenario(client, recorder, rng.choice(fixture.users), rng)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, duration: float) -> Dict[str, dict]:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        values = sorted(latencies)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "throughput_rps": len(values) / duration,
+            "p50_ms": _percentile(values, 0.50) * 1000,
+            "p95_ms": _percentile(values, 0.95) * 1000,
+            "p99_ms": _percentile(values, 0.99) * 1000,
+            "mean_ms": statistics.fmean(values) * 1000,
+            "errors": recorder.errors.get(endpoint, 0),
+            "status_codes": {str(code): count for code, count in sorted(recorder.statuses[endpoint].items())},
+        }
+    return endpoints
+
+
+async def run(args) -> dict:
+    mix = MIXES[args.mix] if args.mix in MIXES else {args.mix: 1}
+    fixture = await seed(args.users, args.chatbots_per_user, args.data_sources_per_chatbot, args.drop_tables)
+    start_at = time.perf_counter() + args.warmup
+    recorder = Recorder(start_at, start_at + args.duration)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Requests still in flight at stop_at are completed (and counted) before the clients stop
+        await asyncio.gather(*[
+            _client_loop(client, recorder, fixture, mix, random.Random(args.seed + i), recorder.stop_at)
+            for i in range(args.concurrency)
+        ])
+    await async_engine.dispose()
+    duration = args.duration
+
+    endpoints = summarize(recorder, duration)
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "mix": args.mix,
+            "weights": mix,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "chatbots_per_user": args.chatbots_per_user,
+            "data_sources_per_chatbot": args.data_sources_per_chatbot,
+            "seed": args.seed,
+            "database_url": os.environ["DATABASE_URL"].split("@")[-1],
+        },
+        "total": {
+            "requests": total,
+            "throughput_rps": total / duration,
+            "errors": sum(stats["errors"] for stats in endpoints.values()),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict, baseline: Optional[dict] = None) -> None:
+    print(
+        f"commit {result['commit'] or 'unknown'}  mix {result['config']['mix']}  "
+        f"concurrency {result['config']['concurrency']}  {result['config']['duration_s']:.1f}s"
+    )
+    header = f"{'endpoint':<34} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:<34} {stats['requests']:>7} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['errors']:>6}"
+        )
+        if baseline and endpoint in baseline["endpoints"]:
+            before = baseline["endpoints"][endpoint]
+            print(
+                f"{'  vs baseline':<34} {'':>7} {_change(before['throughput_rps'], stats['throughput_rps']):>8} "
+                f"{_change(before['p50_ms'], stats['p50_ms']):>8} {_change(before['p95_ms'], stats['p95_ms']):>8} "
+                f"{_change(before['p99_ms'], stats['p99_ms']):>8}"
+            )
+    total = result["total"]
+    print(f"{'total':<34} {total['requests']:>7} {total['throughput_rps']:>8.1f} {'':>8} {'':>8} {'':>8} {total['errors']:>6}")
+    if baseline:
+        print(f"baseline: commit {baseline.get('commit') or 'unknown'}, total "
+              f"{_change(baseline['total']['throughput_rps'], total['throughput_rps'])} req/s")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", default="default", choices=sorted([*MIXES, *SCENARIOS]),
+                        help="Scenario mix, or a single scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds run before measuring")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--chatbots-per-user", type=int, default=20)
+    parser.add_argument("--data-sources-per-chatbot", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the clients' scenario choices")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--drop-tables", action="store_true",
+                        help="Drop and re-create all tables of BENCH_DATABASE_URL (required with it)")
+    args = parser.parse_args()
+    if BENCH_DATABASE_URL and not args.drop_tables:
+        parser.error("BENCH_DATABASE_URL is set: pass --drop-tables to confirm its tables may be dropped")
+    if args.drop_tables and not BENCH_DATABASE_URL:
+        parser.error("--drop-tables needs BENCH_DATABASE_URL (the temporary database starts empty)")
+    # httpx and the app log INFO lines per request (uploads several), burying the report
+    for logger_name in ("httpx", "app"):
+        logging.getLogger(logger_name).setLevel(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(1 if result["total"]["requests"] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# tests/conftest.py
+"""
+Test fixtures. The app runs in-process against a temporary SQLite database
+and the in-memory stand-ins of Redis (principal / chatbot caches, status
+broker); the environment's settings are overridden before `app` is imported.
+
+Needs the development requirements (pytest, httpx, aiosqlite):
+
+    pip install -r requirements-dev.txt
+    python -m pytest          # from backend/
+"""
+import itertools
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_WORK_DIR = tempfile.mkdtemp(prefix="tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_WORK_DIR}/test.db",
+    "PRINCIPAL_CACHE_BACKEND": "memory",
+    "CHATBOT_CACHE_BACKEND": "memory",
+    "STATUS_BROKER_BACKEND": "memory",
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+    "BLOB_STORE_DIR": f"{_WORK_DIR}/blobs",
+    "BLOB_STAGING_DIR": f"{_WORK_DIR}/blobs/.staging",
+    "UPLOAD_SESSION_DIR": f"{_WORK_DIR}/blobs/.sessions",
+    "VECTOR_STORE_DIR": f"{_WORK_DIR}/vector_store",
+    "EMBEDDING_CACHE_PATH": f"{_WORK_DIR}/vector_store/embedding_cache.sqlite3",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.models.base_class import Base  # noqa: E402
+from app.db.models.chatbot import Chatbot  # noqa: E402
+from app.db.models.data_source import DataSource  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.db.session import AsyncSessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.data_source import DataSourceType, ProcessingStatus  # noqa: E402
+
+
+_user_numbers = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient of the app; its event loop (client.portal) also runs the DB setup."""
+    async def create_tables():
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def dispose():
+        await async_engine.dispose()
+
+    with TestClient(app) as test_client:
+        test_client.portal.call(create_tables)
+        yield test_client
+        test_client.portal.call(dispose)
+    shutil.rmtree(_WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture()
+def make_data_source(client):
+    """
+    Creates a user, a chatbot and a data source with the given status.
+
+    :return: (data source id, access token of the owner)
+    """
+    async def create(status: ProcessingStatus):
+        async with AsyncSessionLocal() as db:
+            user = User(email=f"user-{next(_user_numbers)}@example.com", hashed_password="x", is_active=True)
+            db.add(user)
+            await db.flush()
+            chatbot = Chatbot(name="bot", owner_id=user.id)
+            db.add(chatbot)
+            await db.flush()
+            data_source = DataSource(chatbot_id=chatbot.id, type=DataSourceType.FILE, status=status, filename="a.txt")
+            db.add(data_source)
+            await db.commit()
+            return data_source.id, create_access_token(subject=user.email)
+
+    return lambda status: client.portal.call(create, status)
@@ -0,0 +1,74 @@
+# tests/test_blobs.py
+"""Blob GC never deletes a blob an upload was just deduplicated against."""
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.storage import blobs
+from app.storage.blobs import BlobStore, LocalBlobBackend, delete_if_stale
+
+CONTENT = b"uploaded file"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+GRACE_SECONDS = 60
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BlobStore(LocalBlobBackend(str(tmp_path / "blobs")), staging_dir=str(tmp_path / "staging"))
+    store.ingest(received(store), SHA256)
+    stale = time.time() - 2 * GRACE_SECONDS
+    os.utime(store.backend._path(SHA256), (stale, stale))
+    return store
+
+
+def received(store: BlobStore) -> str:
+    path = store.staging_path()
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    return path
+
+
+def read_blob(store: BlobStore) -> bytes:
+    with store.open(SHA256) as path, open(path, "rb") as f:
+        return f.read()
+
+
+def race_gc_rename(monkeypatch, upload, before: bool):
+    """Runs `upload` right before or right after delete_if_stale renames the blob away."""
+    rename = os.rename
+
+    def racing_rename(src, dst):
+        if before:
+            upload()
+        rename(src, dst)
+        if not before:
+            upload()
+
+    monkeypatch.setattr(blobs.os, "rename", racing_rename)
+
+
+def test_upload_deduplicated_before_the_gc_rename_keeps_the_blob(store, monkeypatch):
+    results = []
+    race_gc_rename(monkeypatch, lambda: results.append(store.ingest(received(store), SHA256)), before=True)
+
+    assert not delete_if_stale(store, SHA256, GRACE_SECONDS)
+    assert results == [False]  # Deduplicated
+    assert read_blob(store) == CONTENT
+
+
+def test_upload_after_the_gc_rename_stores_the_blob_again(store, monkeypatch):
+    results = []
+    race_gc_rename(monkeypatch, lambda: results.append(store.ingest(received(store), SHA256)), before=False)
+
+    assert delete_if_stale(store, SHA256, GRACE_SECONDS)  # The stale copy
+    assert results == [True]  # touch() failed, the received copy was stored
+    assert read_blob(store) == CONTENT
+    assert sorted(os.listdir(os.path.dirname(store.backend._path(SHA256)))) == [SHA256]
+
+
+def test_untouched_stale_blob_is_deleted(store):
+    assert delete_if_stale(store, SHA256, GRACE_SECONDS)
+    assert not store.exists(SHA256)
+    assert not delete_if_stale(store, SHA256, GRACE_SECONDS)
@@ -0,0 +1,67 @@
+# tests/test_chatbot_cache.py
+"""Invalidation of the chatbot cache (in-memory shared tier)."""
+import asyncio
+import time
+
+from app.core.chatbot_cache import ChatbotCache, InMemorySharedChatbotCache
+
+TOMBSTONE_SECONDS = 0.05
+
+
+def make_cache() -> ChatbotCache:
+    shared = InMemorySharedChatbotCache(300, 100, TOMBSTONE_SECONDS)
+    return ChatbotCache(shared, 300, 100, TOMBSTONE_SECONDS)
+
+
+class Loader:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+
+    async def __call__(self) -> dict:
+        self.calls += 1
+        return {"id": 1, "name": self.name}
+
+
+def test_invalidated_chatbot_is_cached_again_after_the_tombstone_window():
+    async def scenario():
+        cache = make_cache()
+        assert await cache.get_or_load(1, Loader("old")) == {"id": 1, "name": "old"}
+
+        await cache.invalidate(1)
+        new = Loader("new")
+        # Within the window loads are served but not cached (one may have read the old row)
+        assert await cache.get_or_load(1, new) == {"id": 1, "name": "new"}
+        assert await cache.get_or_load(1, new) == {"id": 1, "name": "new"}
+        assert new.calls == 2
+
+        time.sleep(TOMBSTONE_SECONDS * 2)
+        assert await cache.get_or_load(1, new) == {"id": 1, "name": "new"}
+        assert await cache.get_or_load(1, new) == {"id": 1, "name": "new"}
+        assert new.calls == 3  # Cached again: well before CHATBOT_CACHE_TTL_SECONDS
+
+    asyncio.run(scenario())
+
+
+def test_load_racing_an_invalidation_does_not_restore_the_old_row():
+    async def scenario():
+        cache = make_cache()
+        read_old_row = asyncio.Event()
+        invalidated = asyncio.Event()
+
+        async def slow_old_loader():
+            read_old_row.set()
+            await invalidated.wait()  # The write commits and invalidates meanwhile
+            return {"id": 1, "name": "old"}
+
+        racing_load = asyncio.create_task(cache.get_or_load(1, slow_old_loader))
+        await read_old_row.wait()
+        await cache.invalidate(1)
+        invalidated.set()
+        assert await racing_load == {"id": 1, "name": "old"}
+
+        new = Loader("new")
+        assert await cache.get_or_load(1, new) == {"id": 1, "name": "new"}
+        assert new.calls == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+# tests/test_http_cache.py
+"""Chatbot ETags (weak, shared by all content-codings) and Vary: Accept-Encoding."""
+import itertools
+
+import pytest
+
+from app.api import deps
+from app.db.models.chatbot import Chatbot
+from app.db.models.user import User
+from app.db.session import AsyncSessionLocal
+from app.main import app
+
+API = "/api/v1/chatbots"
+
+_numbers = itertools.count()
+
+
+@pytest.fixture()
+def owner_with_chatbots(client):
+    """Signed-in user (dependency override) owning enough chatbots for a compressed list page."""
+    async def create():
+        async with AsyncSessionLocal() as db:
+            user = User(email=f"etag-{next(_numbers)}@example.com", hashed_password="x", is_active=True)
+            db.add(user)
+            await db.flush()
+            chatbots = [Chatbot(name=f"bot {i} " + "x" * 40, owner_id=user.id) for i in range(30)]
+            db.add_all(chatbots)
+            await db.commit()
+            return user, chatbots[0].id
+
+    user, chatbot_id = client.portal.call(create)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    yield chatbot_id
+    app.dependency_overrides.pop(deps.get_current_active_user, None)
+
+
+@pytest.mark.parametrize("path", ["/my/", "/{chatbot_id}"])
+def test_etag_is_weak_and_revalidates_across_content_codings(client, owner_with_chatbots, path):
+    url = API + path.format(chatbot_id=owner_with_chatbots)
+
+    gzip = client.get(url, headers={"Accept-Encoding": "gzip"})
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+
+    assert gzip.status_code == identity.status_code == 200
+    etag = gzip.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert identity.headers["ETag"] == etag
+    for response in (gzip, identity):
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    # The ETag of a gzip body revalidates an identity request (and vice versa)
+    revalidated = client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert revalidated.headers["Vary"] == "Accept-Encoding"
+    # Clients that drop the W/ prefix still match
+    assert client.get(url, headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+
+
+def test_list_page_is_compressed_with_vary(client, owner_with_chatbots):
+    response = client.get(f"{API}/my/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"].count("Accept-Encoding") == 1
@@ -0,0 +1,46 @@
+# tests/test_principal_cache.py
+"""Invalidation of the principal cache (in-memory backend)."""
+import asyncio
+import time
+
+from app.core.principal_cache import LocalPrincipalCache, get_principal_cache, invalidate_principal
+
+TTL_SECONDS = 0.05
+SUBJECT = "principal-cache@example.com"  # No conftest user: the shared cache keeps its tombstone
+
+
+def principal(is_active: bool) -> dict:
+    return {"id": 1, "email": SUBJECT, "is_active": is_active, "is_superuser": False}
+
+
+def test_invalidated_principal_is_not_cached_again_within_the_ttl():
+    async def scenario():
+        cache = LocalPrincipalCache(TTL_SECONDS, 100)
+        await cache.set(SUBJECT, principal(True))
+        assert await cache.get(SUBJECT) == principal(True)
+
+        await cache.invalidate(SUBJECT)
+        assert await cache.get(SUBJECT) is None
+        # A request that read the row before the change cannot restore it
+        await cache.set(SUBJECT, principal(True))
+        assert await cache.get(SUBJECT) is None
+
+        time.sleep(TTL_SECONDS * 2)
+        await cache.set(SUBJECT, principal(False))
+        assert await cache.get(SUBJECT) == principal(False)
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_principal_drops_the_configured_cache_entry():
+    async def scenario():
+        cache = get_principal_cache()
+        await cache.set(SUBJECT, principal(True))
+        assert await cache.get(SUBJECT) == principal(True)
+
+        await invalidate_principal(SUBJECT)
+        assert await cache.get(SUBJECT) is None
+        await cache.set(SUBJECT, principal(True))
+        assert await cache.get(SUBJECT) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+# tests/test_quantization.py
+"""Blocked code scoring returns the same top-k as scoring every row at once."""
+import numpy as np
+
+from app.retrieval import quantization
+from app.retrieval.quantization import ProductQuantizer, ScalarQuantizer, score_top_k
+from app.retrieval.vector_store import top_k
+
+
+def check_blocked_scoring(codec, vectors, monkeypatch):
+    codes = codec.encode(vectors)
+    prepared = codec.prepare(vectors[0])
+    all_scores = codec.score(prepared, codes)
+    rows = np.arange(3, codes.shape[0], 2)
+    monkeypatch.setattr(quantization, "_SCORE_BLOCK_ROWS", 37)
+
+    best_rows, best_scores = score_top_k(codec, prepared, codes, 10)
+    expected = top_k(all_scores, 10)
+    np.testing.assert_array_equal(best_rows, expected)
+    np.testing.assert_allclose(best_scores, all_scores[expected], rtol=1e-6)
+
+    best_rows, _ = score_top_k(codec, prepared, codes, 10, rows)
+    np.testing.assert_array_equal(best_rows, rows[top_k(all_scores[rows], 10)])
+
+
+def test_scalar_quantizer_blocked_scoring(monkeypatch):
+    vectors = np.random.default_rng(0).standard_normal((500, 16)).astype(np.float32)
+    check_blocked_scoring(ScalarQuantizer.train(vectors), vectors, monkeypatch)
+
+
+def test_product_quantizer_blocked_scoring(monkeypatch):
+    vectors = np.random.default_rng(1).standard_normal((500, 16)).astype(np.float32)
+    codec = ProductQuantizer.train(vectors, n_subvectors=4, iterations=3)
+    lookup = codec.prepare(vectors[0])
+    codes = codec.encode(vectors)
+    # Same scores as gathering every (row, sub-vector) lookup at once
+    np.testing.assert_allclose(
+        codec.score(lookup, codes), lookup[np.arange(codec.code_size), codes].sum(axis=1), rtol=1e-5
+    )
+    check_blocked_scoring(codec, vectors, monkeypatch)
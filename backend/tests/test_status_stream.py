@@ -0,0 +1,152 @@
+# tests/test_status_stream.py
+"""Status stream endpoints (SSE / WebSocket) fed by the in-memory status broker."""
+import json
+import threading
+import time
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.ingestion.status_events import InMemoryStatusBroker, get_status_broker, make_status_event, status_channel
+from app.schemas.data_source import ProcessingStatus
+
+API = "/api/v1/chatbots"
+
+
+@pytest.fixture()
+def broker():
+    broker = get_status_broker()
+    assert isinstance(broker, InMemoryStatusBroker)
+    return broker
+
+
+def publish(broker, data_source_id: int, status: str, **fields) -> None:
+    broker.publish(data_source_id, make_status_event(data_source_id, status, **fields))
+
+
+def publish_once_subscribed(broker, data_source_id: int, events: list) -> threading.Thread:
+    """
+    Publishes (status, fields) events from another thread once the stream has
+    subscribed. TestClient returns an HTTP response only after its body is
+    complete, so the SSE events cannot be published from the test itself.
+    """
+    def run():
+        deadline = time.monotonic() + 10
+        while status_channel(data_source_id) not in broker._subscribers:
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+        for status, fields in events:
+            publish(broker, data_source_id, status, **fields)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def sse_events(body: str) -> list:
+    return [
+        json.loads(block.split("data: ", 1)[1])
+        for block in body.split("\n\n")
+        if block.startswith("event: status\n")
+    ]
+
+
+def test_sse_forwards_events_until_terminal_status(client, make_data_source, broker):
+    data_source_id, token = make_data_source(ProcessingStatus.PROCESSING)
+    publisher = publish_once_subscribed(broker, data_source_id, [
+        ("PROCESSING", {"chunks": 10}),
+        ("PROCESSING", {"chunks": 20}),
+        ("COMPLETED", {"chunks": 30}),
+    ])
+
+    response = client.get(
+        f"{API}/data-sources/{data_source_id}/status/stream", headers={"Authorization": f"Bearer {token}"}
+    )
+    publisher.join(timeout=10)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    # Snapshot from the DB (nothing published yet), then the published events;
+    # the response completing at all means the COMPLETED event ended the stream.
+    assert [(e["status"], e.get("chunks")) for e in events] == [
+        ("PROCESSING", None),
+        ("PROCESSING", 10),
+        ("PROCESSING", 20),
+        ("COMPLETED", 30),
+    ]
+    assert all(e["data_source_id"] == data_source_id for e in events)
+
+
+def test_sse_terminal_db_status_overrides_stale_latest_event(client, make_data_source, broker):
+    data_source_id, token = make_data_source(ProcessingStatus.COMPLETED)
+    publish(broker, data_source_id, "PROCESSING", chunks=5)  # Stale: COMPLETED was never published
+
+    response = client.get(
+        f"{API}/data-sources/{data_source_id}/status/stream", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert [e["status"] for e in sse_events(response.text)] == ["COMPLETED"]
+
+
+def test_sse_starts_from_latest_event(client, make_data_source, broker):
+    data_source_id, token = make_data_source(ProcessingStatus.PROCESSING)
+    publish(broker, data_source_id, "PROCESSING", chunks=7)
+    publisher = publish_once_subscribed(broker, data_source_id, [("FAILED", {"error": "boom"})])
+
+    response = client.get(
+        f"{API}/data-sources/{data_source_id}/status/stream", headers={"Authorization": f"Bearer {token}"}
+    )
+    publisher.join(timeout=10)
+
+    events = sse_events(response.text)
+    assert [(e["status"], e.get("chunks")) for e in events] == [("PROCESSING", 7), ("FAILED", None)]
+    assert events[-1]["error"] == "boom"
+
+
+def test_sse_of_another_users_data_source_is_not_found(client, make_data_source):
+    data_source_id, _ = make_data_source(ProcessingStatus.PROCESSING)
+    _, other_token = make_data_source(ProcessingStatus.PROCESSING)
+
+    response = client.get(
+        f"{API}/data-sources/{data_source_id}/status/stream", headers={"Authorization": f"Bearer {other_token}"}
+    )
+
+    assert response.status_code == 404
+
+
+def test_websocket_forwards_events_until_terminal_status(client, make_data_source, broker):
+    data_source_id, token = make_data_source(ProcessingStatus.PENDING)
+
+    with client.websocket_connect(f"{API}/data-sources/{data_source_id}/status/ws?token={token}") as websocket:
+        assert websocket.receive_json()["status"] == "PENDING"
+        publish(broker, data_source_id, "PROCESSING", chunks=1)
+        event = websocket.receive_json()
+        assert (event["data_source_id"], event["status"], event["chunks"]) == (data_source_id, "PROCESSING", 1)
+        publish(broker, data_source_id, "COMPLETED", chunks=2)
+        event = websocket.receive_json()
+        assert (event["status"], event["chunks"]) == ("COMPLETED", 2)
+        # The server closes the socket after the terminal event
+        with pytest.raises(WebSocketDisconnect):
+            websocket.receive_json()
+
+
+def test_websocket_terminal_db_status_overrides_stale_latest_event(client, make_data_source, broker):
+    data_source_id, token = make_data_source(ProcessingStatus.FAILED)
+    publish(broker, data_source_id, "PROCESSING", chunks=5)
+
+    with client.websocket_connect(f"{API}/data-sources/{data_source_id}/status/ws?token={token}") as websocket:
+        assert websocket.receive_json()["status"] == "FAILED"
+        with pytest.raises(WebSocketDisconnect):
+            websocket.receive_json()
+
+
+def test_websocket_rejects_invalid_token(client, make_data_source):
+    data_source_id, _ = make_data_source(ProcessingStatus.PROCESSING)
+
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect(f"{API}/data-sources/{data_source_id}/status/ws?token=invalid") as websocket:
+            websocket.receive_json()
+    assert exc_info.value.code == 1008
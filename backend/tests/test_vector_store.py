@@ -0,0 +1,105 @@
+# tests/test_vector_store.py
+"""Replaced segments stay readable for stores opened on the previous manifest."""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.retrieval.vector_store import (
+    SegmentWriter,
+    VectorStore,
+    discard_unpublished_segments,
+    sweep_retired_files,
+)
+
+DIM = 8
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+
+
+def write_segment(root: str, data_source_id: int, texts: list, chatbot_id: int = 1) -> str:
+    vectors = np.eye(len(texts), DIM, dtype=np.float32)
+    writer = SegmentWriter(chatbot_id, data_source_id, "test-model", DIM, root=root)
+    writer.append(vectors, [Chunk(i, text) for i, text in enumerate(texts)])
+    return writer.commit()
+
+
+def test_store_opened_before_a_republish_can_still_read_its_segments(tmp_path):
+    root = str(tmp_path)
+    old_segment = write_segment(root, 7, ["old a", "old b"])
+    old_store = VectorStore(1, root=root)  # Manifest read, no array mapped yet
+
+    new_segment = write_segment(root, 7, ["new a", "new b"])
+
+    new_store = VectorStore(1, root=root)
+    assert [s.segment_id for s in new_store.segments] == [new_segment]
+    hits = old_store.search(np.eye(1, DIM, dtype=np.float32)[0], k=1)
+    assert [hit.text for hit in hits] == ["old a"]
+    # Not reclaimed as an "unpublished" segment either
+    assert discard_unpublished_segments(1, 7, root=root) == 0
+
+    segment_path = os.path.join(root, "chatbot_1", "segments", old_segment)
+    assert sweep_retired_files(root) == 0  # Within the grace period
+    assert os.path.isdir(segment_path)
+    assert sweep_retired_files(root, grace_seconds=0) == 1
+    assert not os.path.exists(segment_path)
+    assert [hit.text for hit in new_store.search(np.eye(1, DIM, dtype=np.float32)[0], k=1)] == ["new a"]
+
+
+def test_publish_deletes_segments_retired_past_the_grace_period(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    first = write_segment(root, 7, ["one"])
+    write_segment(root, 7, ["two"])
+    first_path = os.path.join(root, "chatbot_1", "segments", first)
+    assert os.path.isdir(first_path)
+
+    monkeypatch.setattr("app.retrieval.vector_store.settings.VECTOR_STORE_RETIRED_GRACE_SECONDS", 0)
+    write_segment(root, 7, ["three"])
+
+    assert not os.path.exists(first_path)
+
+
+def test_open_store_cache_is_bounded_and_drops_replaced_stores(tmp_path, monkeypatch):
+    import weakref
+
+    from app.retrieval import vector_store
+
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_OPEN_CACHE_SIZE", 2)
+    monkeypatch.setattr(vector_store, "_open_stores", vector_store.OrderedDict())
+    for chatbot_id in (1, 2, 3):
+        write_segment(str(tmp_path), 7, ["text"], chatbot_id=chatbot_id)
+
+    first = vector_store.get_vector_store(1)
+    assert vector_store.get_vector_store(1) is first
+    first.search(np.eye(1, DIM, dtype=np.float32)[0], k=1)  # Maps the segment files
+    first_ref = weakref.ref(first)
+    del first
+    vector_store.get_vector_store(2)
+    vector_store.get_vector_store(3)  # Evicts chatbot 1, the least recently used
+
+    assert list(vector_store._open_stores) == [2, 3]
+    assert first_ref() is None  # Freed with its memory maps
+
+    replaced_ref = weakref.ref(vector_store.get_vector_store(3))
+    write_segment(str(tmp_path), 7, ["new text"], chatbot_id=3)
+    assert vector_store.get_vector_store(3) is not replaced_ref()
+    assert replaced_ref() is None
+
+
+def test_idle_open_stores_are_dropped(tmp_path, monkeypatch):
+    from app.retrieval import vector_store
+
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(vector_store, "_open_stores", vector_store.OrderedDict())
+    vector_store.get_vector_store(1)
+    vector_store.get_vector_store(2)
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_RETIRED_GRACE_SECONDS", 0)
+    vector_store.get_vector_store(2)
+
+    assert list(vector_store._open_stores) == [2]
+